@@ -1,12 +1,21 @@
-import pandas as pd
 import tkinter as tk
 from tkinter import Text
 import customtkinter
 import os
-import re
-
-customtkinter.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
-customtkinter.set_default_color_theme("dark-blue")  # Themes: "blue" (standard), "green", "dark-blue"
+import queue
+import sys
+import threading
+from collections import namedtuple
+import compatibility_matrix
+from device_select_window import DeviceSelectWindow
+from instrumentation import timed
+from matrix_grid_window import MatrixGridWindow
+from matrix_cache import MatrixCache
+from matrix_watcher import WorkbookWatcher
+from result_cache import ResultCache
+
+# Finished answer of one Submit: status code, results label text and special requirements text
+SubmitResult = namedtuple('SubmitResult', ['status', 'message', 'notes'])
 
 
 class App(customtkinter.CTk):
@@ -21,11 +30,26 @@ class App(customtkinter.CTk):
     # Application name
     APP_NAME = "Eagle Compatibility Master"
 
+    # How often (milliseconds) the Tk loop checks whether the background matrix load has finished
+    LOAD_POLL_INTERVAL = 50
+
+    # How often (seconds) the Excel file is checked for changes while watching it
+    WATCH_INTERVAL = 2.0
+
+    # Compatibility results label text shown once the matrix is ready
+    RESULTS_PLACEHOLDER = "Compatibility results will \npopulate here."
+
     # Base file path
     PATH = os.path.dirname(os.path.realpath(__file__))
 
     # Store Excel file path - default path is current project path
-    file_path = PATH + "/Compatibility_Matrix_LST-1592.xlsx"
+    file_path = compatibility_matrix.DEFAULT_WORKBOOK_PATH
+
+    # Directory that holds the compiled matrix cache
+    cache_directory = compatibility_matrix.DEFAULT_CACHE_DIRECTORY
+
+    # Re-read the Excel file whenever it changes on disk (opt-in, see main.py --watch)
+    watch_workbook = False
 
     # Eagle version menu option will start off with 'V1002 – V1303'
     global_eagle_version_choice = 'V1002 – V1303'
@@ -33,65 +57,31 @@ class App(customtkinter.CTk):
     # Device/software version menu option will start off with 'SafetyNet'
     global_software_device_choice = 'SafetyNet'
 
-    # Matrix dictionary
-    matrix_dictionary = {}
-
-    # List of columns
-    software_device_list = ['SafetyNet', 'MICT', 'Sketch', 'Trace', 'Tir-1',
-                            'Radius-7', 'Radius-7 Wifi', 'Radius T', 'Centroid', 'VSM', 'SedLine',
-                            'MOA', 'External SatShare', 'Iris - DMS', 'Iris Gateway']
-
-    # Eagle version list
-    eagle_versions_list = ['V1002 – V1303', 'V1412', 'V1434', 'V1437',
-                           'V1448', 'V1461', 'V1470', 'V1514', 'V1518',
-                           'V1536', 'V1544',
-                           'V1569', 'V1578', 'V1593', 'V1615', 'V1616',
-                           'V1617', 'V1621',
-                           'V1624', 'V1625', 'V1631', 'V1728', 'V1748',
-                           'V1750', 'V1767',
-                           'V1773', 'V1798', 'V1814', 'V1818', 'V1819',
-                           'V1820', 'V1945',
-                           'V1973', 'V1983', 'V1988', 'V1992', 'V2061',
-                           'V2096', 'V2101',
-                           'V2103', 'V2104', 'V2105', 'V2106', 'V2116',
-                           'V2118', 'V2120[3]',
-                           'V2122', 'V2124', 'V2131', 'V2135', 'V2140',
-                           'V2142', 'V2145',
-                           'V2146']
-
-    # Dictionary that contains compatible exceptions.
-    compatibility_exceptions_dictionary = {'[1]': 'Requires minimum SafetyNet V4400',
-                                           '[2]': 'Requires minimum SafetyNet V5008',
-                                           '[3]': 'Requires Sedline V1203 to support all features',
-                                           '[4]': 'Requires minimum MICT V1049',
-                                           '[5]': 'Requires minimum Radius-7 IB V1012 for all features supported',
-                                           '[6]': 'Minimum Eagle version to support Falcon-pro.',
-                                           '[7]': 'Requires minimum MICT V1109',
-                                           '[8]': 'Requires minimum Radius-7 V1020',
-                                           '[9]': 'Requires minimum Trace V2026',
-                                           '[10]': 'Requires minimum IB-Pro V205X, requires minimum Radius-7 BB V2015 to support all features',
-                                           '[11]': 'Requires minimum SedLine V2320 for all Eagle enhancements to be available',
-                                           '[12]': 'Added support for Safety Net V5027-5085',
-                                           '[13]': 'Minimum eagle version to support PSN V5647',
-                                           '[14]': 'Requires minimum IB-Pro V206x and minimum IB V103x with minimum BBV202x to support all features',
-                                           '[15]': 'Minimum Eagle version to support PSN V5672',
-                                           '[16]': 'Requires minimum Trace V2.0.2.8',
-                                           '[17]': 'Minimum Eagle version to support Iris Gateway V1613',
-                                           '[18]': 'Minimum Eagle version to support PSN V5675',
-                                           '[19]': 'Requires minimum Trace V3025',
-                                           '[20]': 'Minimum Eagle version to support VSM V1020',
-                                           '[21]': 'V2120 is built from V2106',
-                                           '[22]': 'Requires minimum MICT V1248 to support all features',
-                                           '[23]': 'Requires minimum MICT V1252 to support all features',
-                                           '[24]': 'Requires minimum MICT V1253 to support all features',
-                                           '[25]': 'Requires minimum Trace V3025',
-                                           '[26]': 'Requires minimum Centroid V2101'}
+    # Compatibility matrix (compatibility_matrix.CompatibilityMatrix)
+    matrix = None
+
+    # List of columns - read from the Excel sheet, see refresh_option_menus
+    software_device_list = []
+
+    # Eagle version list - read from the Excel sheet, see refresh_option_menus
+    eagle_versions_list = []
 
     # Initialization method
-    def __init__(self):
+    def __init__(self, watch_workbook=False):
+        # Set the theme when the window is created, not when the module is imported
+        customtkinter.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
+        customtkinter.set_default_color_theme("dark-blue")  # Themes: "blue" (standard), "green", "dark-blue"
+
         # Initialize everything upon app creation contained in this section
         super().__init__()
 
+        # Watch the Excel file for new revisions once the matrix is loaded
+        self.watch_workbook = watch_workbook
+        self.workbook_watcher = None
+
+        # Finished Submit answers of the current matrix revision, see build_submit_result
+        self.result_cache = ResultCache(self.build_submit_result)
+
         # Application title
         self.title(App.APP_NAME)
 
@@ -171,7 +161,7 @@ class App(customtkinter.CTk):
 
         # Compatibility results label
         self.compatibility_results_label = customtkinter.CTkLabel(master=self.center_container_frame_overlay1,
-                                                                  text="Compatibility results will \npopulate here.",
+                                                                  text=self.RESULTS_PLACEHOLDER,
                                                                   height=50,
                                                                   fg_color=("white", "gray38"),
                                                                   text_font=('Verdana', 12))
@@ -199,15 +189,15 @@ class App(customtkinter.CTk):
 
         # ============ Option Menu Start ============
 
-        # Eagle option menu
+        # Eagle option menu - the values are replaced with the versions from the Excel sheet once it is read
         self.eagle_version_option_menu = customtkinter.CTkOptionMenu(master=self.center_container_frame_overlay2,
-                                                                     values=self.eagle_versions_list,
+                                                                     values=[self.global_eagle_version_choice],
                                                                      command=self.eagle_version_option_menu_callback)
         self.eagle_version_option_menu.grid(row=2, column=0, columnspan=2, pady=10, padx=45)
 
-        # Software/device compatibility option menu
+        # Software/device compatibility option menu - the values are replaced with the devices from the Excel sheet
         self.software_version_option_menu = customtkinter.CTkOptionMenu(master=self.center_container_frame_overlay2,
-                                                                        values=self.software_device_list,
+                                                                        values=[self.global_software_device_choice],
                                                                         command=self.device_software_menu_callback)
         self.software_version_option_menu.grid(row=4, column=0, columnspan=2, pady=10, padx=5)
 
@@ -235,12 +225,32 @@ class App(customtkinter.CTk):
                                                      border_color='cyan')
         self.submit_button.grid(row=5, column=0, columnspan=2, pady=10, padx=5, sticky='n')
 
+        # Multi-device search button - opens the window for 'all/any/none of these devices' queries
+        self.device_select_button = customtkinter.CTkButton(master=self.center_container_frame,
+                                                            text="Multi-Device Search",
+                                                            command=self.open_device_select_window)
+        self.device_select_button.grid(row=9, column=0, columnspan=2, pady=(0, 10), padx=5, sticky='n')
+        self.device_select_window = None
+
+        # Full matrix button - opens the grid of every Eagle version against every device
+        self.matrix_grid_button = customtkinter.CTkButton(master=self.center_container_frame,
+                                                          text="Full Matrix",
+                                                          command=self.open_matrix_grid_window)
+        self.matrix_grid_button.grid(row=10, column=0, columnspan=2, pady=(0, 10), padx=5, sticky='n')
+        self.matrix_grid_window = None
+
         # ============ Buttons End ============
 
         # ============ App Start Method Start ============
 
-        # Read the Excel file into matrix upon app creation
-        self.matrix_dictionary = self.get_matrix_dictionary()
+        # Compiled on-disk cache of the parsed matrix
+        self.matrix_cache = MatrixCache(self.cache_directory)
+
+        # Disable Submit and show a loading state until the matrix is ready
+        self.show_loading_state()
+
+        # Read the Excel file into matrix on a worker thread so the window paints right away
+        self.start_matrix_load()
 
         # ============ App Start Method End ==============
 
@@ -252,6 +262,9 @@ class App(customtkinter.CTk):
     '''
 
     def on_closing(self, event=0):
+        # Stop watching the Excel file before the window goes away
+        if self.workbook_watcher is not None:
+            self.workbook_watcher.stop()
         return self.destroy()  # Destroy the entire application i.e. close out
 
     '''
@@ -275,209 +288,365 @@ class App(customtkinter.CTk):
         return ''
 
     '''
-        Method: get_device_index_from_list
-        Purpose: To return the index of the user's device/software choice,
-                 so it can be mapped to the compatibility list.
-                 
-                 - device: Contains the user's device/software choice i.e. 'SafetyNet', 'MICT', 'Sketch' etc..
+         Method: get_exceptions
+         Purpose: Returns the special requirements of an Eagle version and device, every
+                  footnote of the Eagle version (i.e. 'V2120[3]') and of the cell (i.e. 'Yes[1][4]').
+                  The footnotes are indexed when the matrix is loaded, so no pattern is searched here.
     '''
 
-    def get_device_index_from_list(self, device):
-        return self.software_device_list.index(device)
+    def get_exceptions(self, matrix, version, device):
+        eagle_version_exception = "\n\n".join(matrix.get_version_notes(version))
+        device_version_exception = "\n\n".join(matrix.get_cell_notes(version, device))
+        return eagle_version_exception, device_version_exception
 
     '''
-        Method: open_excel_file
-        Purpose: Open the Excel file, find the second table (header=16) located in the Excel sheet, 
-                 and load columns B through Q (usecols='B:Q'), load rows (nrows=54) into a pandas dataframe.
+         Method: reverse_eagle_version_list
+         Purpose: To allow the user to display oldest Eagle version
+                  first or newest by reversing the Eagle versions list.
     '''
 
-    def open_excel_file(self):
-        return pd.read_excel(self.file_path, header=16, usecols='B:Q', nrows=54)
+    def reverse_eagle_version_list(self):
+        # Reverse the versions list
+        self.eagle_versions_list.reverse()
+
+        # Everytime the reverse button is pressed, the first element in the eagle versions list will be the current
+        # selected value i.e. version 'V1002 – V1303' or 'V2146'.
+        self.global_eagle_version_choice = self.eagle_versions_list[0]
+
+        # Replace the values of the existing Eagle option menu instead of building a new one
+        self.eagle_version_option_menu.configure(values=self.eagle_versions_list)
+        return self.eagle_version_option_menu.set(self.global_eagle_version_choice)
 
     '''
-        Method: get_columns
-        Purpose: Simple helper method that returns the columns in a Pandas dataframe.
-        
-                - df: contains the Pandas dataframe
+          Method: software_device_menu
+          Purpose: Update the drop down menu that contains software/devices for root compatibility
+                   i.e. Safetynet, Iris, Sedline etc... in place, keeping the current selection.
+     '''
+
+    def software_device_menu(self):
+        # Software/device compatibility option menu
+        self.software_version_option_menu.configure(values=self.software_device_list)
+        return self.software_version_option_menu.set(self.global_software_device_choice)
+
     '''
+          Method: open_device_select_window
+          Purpose: Open the multi-device search window, or bring it to the front when it is already open.
+     '''
 
-    def get_columns(self, df):
-        return df.columns
+    def open_device_select_window(self):
+        if self.device_select_window is None or not self.device_select_window.winfo_exists():
+            self.device_select_window = DeviceSelectWindow(self)
+        else:
+            self.device_select_window.refresh_devices()
+        return self.device_select_window.focus()
 
     '''
-        Method: convert_dataframe_to_numpy_array
-        Purpose: Convert pandas dataframe to numpy array.  The numpy array is a list of lists
-                 in the following format:
-                 
-                 [['V1002 – V1303' 'Yes[1]' 'Yes' 'No' 'No' 'No' 'No' 'No' 'No' 'No' 'No'
-                   'Yes' 'No' 'No' 'No' 'No']]
-        
-                - df: contains pandas dataframe - which contains the entire excel table.
+          Method: open_matrix_grid_window
+          Purpose: Open the full matrix grid window, or bring it to the front when it is already open.
+     '''
+
+    def open_matrix_grid_window(self):
+        if self.matrix_grid_window is None or not self.matrix_grid_window.winfo_exists():
+            self.matrix_grid_window = MatrixGridWindow(self)
+        return self.matrix_grid_window.focus()
+
+    '''
+           Method: get_compatibility_message
+           Purpose: Returns the results label text of a cell i.e. 'Yes: eagle version V1412 is compatible with MICT'.
+
+                   - compatibility_result: Excel cell text i.e. 'Yes', 'Yes[4]' or 'No'.
+    '''
+
+    def get_compatibility_message(self, compatibility_result, version, device):
+        # Make sure to display the results with proper grammar
+        # if for example the result is Yes[4] etc.. only take 'Yes' and exclude [4]
+        if compatibility_result[0:3] == 'Yes':
+            compatibility_result = "Yes"
+            is_or_is_not_var = 'is'
+        else:
+            is_or_is_not_var = 'is not'
+
+        return compatibility_result + ': eagle version ' + version + \
+            f'\n {is_or_is_not_var} compatible with ' + device
+
     '''
+           Method: get_notes_text
+           Purpose: Returns the special requirements text of an Eagle version and device.
+    '''
+
+    def get_notes_text(self, matrix, version, device):
+        # Find exceptions if they exist for the Eagle version and the selected device
+        eagle_version_exception, device_version_exception = self.get_exceptions(matrix, version, device)
 
-    def convert_dataframe_to_numpy_array(self, df):
-        return df.to_numpy()
+        # If the selected eagle version and device both do not have any special requirements
+        if eagle_version_exception == '' and device_version_exception == '':
+            return "There are no special requirements for " + version + " and " + device + " compatibility."
+        # Else if the selected device does have a special requirement and the eagle version does not
+        elif eagle_version_exception == '':
+            return device_version_exception
+        # Else if the eagle version does have a special requirement and the selected device does not
+        elif device_version_exception == '':
+            return eagle_version_exception
+        # Else both the eagle version and device have special requirements
+        return eagle_version_exception + "\n\n" + device_version_exception
 
     '''
-          Method: convert_numpy_array_to_dictionary
-          Purpose: Convert numpy array which is a list of lists to a dictionary.
-                   A dictionary will allow quick lookups by key.
-                   
-                   - array_np: contains the numpy array.
+           Method: build_submit_result
+           Purpose: Build the finished answer of a Submit.  Only called by the result cache on a miss,
+                    or for every pair when a small matrix is precomputed on the loader or watcher thread.
     '''
 
-    def convert_numpy_array_to_dictionary(self, array_np):
+    @timed('gui.build_submit_result')
+    def build_submit_result(self, matrix, version, device):
+        compatibility_result = matrix.get_cell_text(version, device)
+        return SubmitResult(matrix.get_status(version, device),
+                            self.get_compatibility_message(compatibility_result, version, device),
+                            self.get_notes_text(matrix, version, device))
 
-        # Extract the eagle version as the key and compatibility matrix as the values
-        for ls in array_np:
-            # Grab eagle version as key
-            key = ls[0]
-            # Grab the rest of the list and use it as values
-            values = ls[1:]
-            # Set the key value pair
-            self.matrix_dictionary[key] = values
+    '''
+           Method: load_matrix
+           Purpose: Returns the compatibility matrix with eagle software as rows and
+                    all devices as columns, read from the compiled cache when the Excel sheet is unchanged.
+    '''
 
-        return self.matrix_dictionary  # Return the numpy matrix to caller
+    def load_matrix(self):
+        # Get the matrix of the Excel sheet
+        return compatibility_matrix.load_matrix(self.file_path, self.matrix_cache)
 
     '''
-        Method: process_excel_file
-        Purpose: Read the Excel file into a pandas dataframe
-                 then convert the dataframe to numpy array.
+           Method: start_matrix_load
+           Purpose: Start reading the Excel file on a worker thread.  The result is handed back
+                    to the Tk loop through a queue that check_matrix_load polls.
     '''
 
-    def process_excel_file(self):
-        # This dataframe contains the second table starting with column 'Eagle Version'
-        data_frame = self.open_excel_file()
+    def start_matrix_load(self):
+        self.matrix_load_queue = queue.Queue(maxsize=1)
+        self.matrix_load_thread = threading.Thread(target=self.load_matrix_worker, name='matrix-loader', daemon=True)
+        self.matrix_load_thread.start()
+        return self.after(self.LOAD_POLL_INTERVAL, self.check_matrix_load)
 
-        # Convert pandas dataframe to Numpy array
-        array_np = self.convert_dataframe_to_numpy_array(data_frame)
+    '''
+           Method: load_matrix_worker
+           Purpose: Runs on the worker thread.  Loads the matrix, precomputes the Submit answers of small
+                    matrices and puts the outcome on the queue, it must never touch a widget because
+                    Tk is not thread safe.
+    '''
 
-        return self.convert_numpy_array_to_dictionary(array_np)  # Return numpy array
+    def load_matrix_worker(self):
+        try:
+            matrix = self.load_matrix()
+            self.matrix_load_queue.put(('loaded', (matrix, self.result_cache.precompute(matrix))))
+        except Exception as error:
+            self.matrix_load_queue.put(('failed', error))
 
     '''
-         Method: find_exceptions_regex
-         Purpose: to find pattern which contains one or two digits 
-                  enclosed in brackets example [2] or [10]
+           Method: check_matrix_load
+           Purpose: Runs on the Tk loop.  Installs the matrix once the worker thread is done,
+                    or shows the error if loading failed.
     '''
 
-    def find_exceptions_regex(self, string):
-        # Find pattern which contains one or two digits enclosed in brackets example [2] or [10]
-        pattern = self.get_pattern()
+    def check_matrix_load(self):
+        try:
+            outcome, result = self.matrix_load_queue.get_nowait()
+        except queue.Empty:
+            # Still loading, check again later
+            return self.after(self.LOAD_POLL_INTERVAL, self.check_matrix_load)
 
-        # If the pattern is found in the string
-        if pattern.search(string):
-            # Grab the entire pattern example [2] or [10]
-            result = pattern.search(string).group(0)
-            # Return the results
-            return self.compatibility_exceptions_dictionary[result]
-        else:
-            return ''  # Return an empty string
+        if outcome == 'failed':
+            return self.show_load_error(result)
+
+        self.matrix, results = result
+
+        # Report the cache hit or miss so start up times can be measured
+        print(self.matrix_cache.report())
+
+        # Install the answers the worker precomputed before the first Submit
+        self.result_cache.reset(self.matrix, results)
+
+        # Fill the option menus with the Eagle versions and devices found in the Excel sheet
+        self.refresh_option_menus()
+
+        # Pick up new revisions of the Excel file while the app is running
+        if self.watch_workbook:
+            self.start_workbook_watcher()
+
+        return self.show_ready_state()
 
     '''
-         Method: reverse_eagle_version_list
-         Purpose: To allow the user to display oldest Eagle version
-                  first or newest by reversing the Eagle versions list.
+           Method: start_workbook_watcher
+           Purpose: Start polling the Excel file for changes.  Changed matrices are parsed and diffed on the
+                    watcher thread and handed to the Tk loop through a queue that check_matrix_reload polls.
     '''
 
-    def reverse_eagle_version_list(self):
-        # Erase the current options menu versions
-        self.eagle_version_option_menu.destroy()
+    def start_workbook_watcher(self):
+        # The watcher thread diffs every new revision against the previous one it parsed,
+        # the queued diffs are applied in order so the live matrix always ends up in sync
+        self.reload_base_matrix = self.matrix
+        self.matrix_reload_queue = queue.Queue()
 
-        # Reverse the versions list
-        self.eagle_versions_list.reverse()
+        self.workbook_watcher = WorkbookWatcher(self.file_path, self.reload_matrix_worker, self.WATCH_INTERVAL)
+        self.workbook_watcher.start()
 
-        # Everytime the reverse button is pressed, the first element in the eagle versions list will be the current
-        # selected value i.e. version 'V1002 – V1303' or 'V2146'.
-        self.global_eagle_version_choice = self.eagle_versions_list[0]
+        return self.after(self.LOAD_POLL_INTERVAL, self.check_matrix_reload)
 
-        # Display the updated Eagle option menu
-        self.eagle_version_option_menu = customtkinter.CTkOptionMenu(master=self.center_container_frame_overlay2,
-                                                                     values=self.eagle_versions_list,
-                                                                     command=self.eagle_version_option_menu_callback)
-        self.eagle_version_option_menu.grid(row=2, column=0, columnspan=2, pady=10, padx=5)
+    '''
+           Method: reload_matrix_worker
+           Purpose: Runs on the watcher thread.  Re-reads the changed Excel file and queues the rows that
+                    differ from the previous revision with the precomputed Submit answers of the new revision,
+                    or the error when the file could not be read.  It must never touch a widget or the live matrix.
+    '''
 
-        # When user presses 'reverse' button make sure software/device menu doesn't disappear.
-        return self.software_device_menu()
+    def reload_matrix_worker(self):
+        try:
+            matrix = self.load_matrix()
+        except Exception as error:
+            # Keep the current matrix, the next change of the Excel file triggers another attempt
+            self.matrix_reload_queue.put(('failed', error))
+            return None
+
+        diff = self.reload_base_matrix.diff(matrix)
+        self.reload_base_matrix = matrix
+
+        if not diff.is_empty:
+            self.matrix_reload_queue.put(('loaded', (diff, self.result_cache.precompute(matrix))))
 
     '''
-          Method: software_device_menu
-          Purpose: Display drop down menu that contains software/devices for root compatibility.
-                   i.e. Safetynet, Iris, Sedline etc...
-     '''
+           Method: check_matrix_reload
+           Purpose: Runs on the Tk loop.  Applies queued diffs between two user interactions,
+                    so a query never sees a partly updated matrix.
+    '''
 
-    def software_device_menu(self):
-        # Software/device compatibility option menu
-        self.software_version_option_menu = customtkinter.CTkOptionMenu(master=self.center_container_frame_overlay2,
-                                                                        values=
-                                                                        self.software_device_list[
-                                                                            self.global_software_device_choice],
-                                                                        command=self.device_software_menu_callback)
-        return self.software_version_option_menu.grid(row=4, column=0, columnspan=2, pady=10, padx=5)
+    def check_matrix_reload(self):
+        while True:
+            try:
+                outcome, result = self.matrix_reload_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if outcome == 'failed':
+                self.show_reload_error(result)
+            else:
+                self.apply_matrix_diff(*result)
+
+        return self.after(self.LOAD_POLL_INTERVAL, self.check_matrix_reload)
 
     '''
-           Method: get_compatibility_list
-           Purpose: Pass the eagle version the user chose - for example ('V1002 – V1303') - as 'key' to the dictionary 
-                    that contains a list of corresponding 'yes' or 'no' values for example ['Yes','No'].
+           Method: apply_matrix_diff
+           Purpose: Swap the changed rows into the live matrix.  The option menus are only rebuilt
+                    when the Eagle versions or devices changed.
+
+                   - diff: compatibility_matrix.MatrixDiff between the live matrix and the new revision.
+                   - results: Submit answers of the new revision precomputed by the watcher thread, or None.
     '''
 
-    def get_compatibility_list(self):
-        return self.matrix_dictionary[self.global_eagle_version_choice]
+    def apply_matrix_diff(self, diff, results=None):
+        # Either patches the changed rows in place or swaps in the new matrix in one assignment
+        self.matrix = self.matrix.apply_diff(diff)
+
+        # Answers of the previous revision are stale, the patched matrix has the cells of the new revision
+        self.result_cache.reset(self.matrix, results)
+
+        print(f"Reloaded {self.file_path}: {len(diff.changed_versions)} changed, "
+              f"{len(diff.added_versions)} added, {len(diff.removed_versions)} removed Eagle versions", file=sys.stderr)
+
+        # Keep the device list of an open multi-device search window in sync
+        if diff.devices_changed and self.device_select_window is not None and self.device_select_window.winfo_exists():
+            self.device_select_window.refresh_devices()
+
+        # Redraw an open grid window from the new revision
+        if self.matrix_grid_window is not None and self.matrix_grid_window.winfo_exists():
+            self.matrix_grid_window.refresh()
+
+        if diff.versions_changed or diff.devices_changed:
+            return self.refresh_option_menus()
 
     '''
-        Method: is_compatible
-        Purpose: To map the device/software to it's corresponding 'Yes' or 'No' value.
-                 This method takes two parameters compatibility_list and device_choice.
-                  
-                - compatibility_list: contains a list of 'Yes' or 'No' values example ['Yes', 'No', 'Yes']
-                  which maps to the software/device by index. 
-                  
-                - device_choice: contains 'SafetyNet', 'MICT', 'Sketch' etc.. selected by user.
+           Method: show_loading_state
+           Purpose: Disable the submit, search and toggle buttons and tell the user the Excel sheet is being read.
     '''
 
-    def is_compatible(self, compatibility_list, device_choice):
-        return compatibility_list[self.get_device_index_from_list(device_choice)]  # Yes or No
+    def show_loading_state(self):
+        self.submit_button.configure(state='disabled')
+        self.device_select_button.configure(state='disabled')
+        self.matrix_grid_button.configure(state='disabled')
+        self.reverse_eagle_version_radio_button.configure(state='disabled')
+        return self.compatibility_results_label.configure(text="Loading compatibility matrix...")
 
     '''
-           Method: get_matrix_dictionary
-           Purpose: Returns a dictionary with eagle software as key and
-                    compatibility list as values for all devices.
+           Method: show_ready_state
+           Purpose: Enable the submit, search and toggle buttons once the matrix is ready.
     '''
 
-    def get_matrix_dictionary(self):
-        # Get a matrix/dictionary of the Excel sheet
-        return self.process_excel_file()
+    def show_ready_state(self):
+        self.submit_button.configure(state='normal')
+        self.device_select_button.configure(state='normal')
+        self.matrix_grid_button.configure(state='normal')
+        self.reverse_eagle_version_radio_button.configure(state='normal')
+        return self.compatibility_results_label.configure(text=self.RESULTS_PLACEHOLDER)
 
     '''
-            Method: display_compatibility_results
-            Purpose: Display compatibility results to the user.
+           Method: show_load_error
+           Purpose: Display why the Excel sheet could not be read instead of crashing.
+                    The submit, search and toggle buttons stay disabled.
+
+                   - error: the exception raised while loading the matrix.
     '''
 
-    def display_compatibility_results(self, compatibility_result):
-        # Destroy previous results before displaying new results
-        self.compatibility_results_label.destroy()
+    def show_load_error(self, error):
+        self.compatibility_results_label.configure(text="Unable to load the \ncompatibility matrix.")
+        return self.display_exceptions_text_box(f"Could not read {self.file_path}:\n\n{type(error).__name__}: {error}")
 
-        # Make sure to display the results with proper grammar
-        # if for example the result is Yes[4] etc.. only take 'Yes' and exclude [4]
-        if compatibility_result[0:3] == 'Yes':
-            compatibility_result = "Yes"
-            is_or_is_not_var = 'is'
-        else:
-            is_or_is_not_var = 'is not'
+    '''
+           Method: show_reload_error
+           Purpose: Tell the user a changed Excel sheet could not be read.  The previous revision stays loaded
+                    and usable, the next save of the file triggers another attempt.
 
-        # Compatibility results label
-        self.compatibility_results_label = customtkinter.CTkLabel(master=self.center_container_frame_overlay1,
-                                                                  text=compatibility_result + ': eagle version ' + self.global_eagle_version_choice + f'\n {is_or_is_not_var} compatible with ' + self.global_software_device_choice,
-                                                                  height=50,
-                                                                  fg_color=("white", "gray38"),
-                                                                  text_font=('Verdana', 12))
-        # Set the Compatibility results label grid configuration
-        return self.compatibility_results_label.grid(row=6, column=0, columnspan=2, pady=20, padx=5, sticky='n')
+                   - error: the exception raised while reloading the matrix.
+    '''
+
+    def show_reload_error(self, error):
+        message = f"Could not reload {self.file_path}:\n\n{type(error).__name__}: {error}"
+        print(message.replace('\n\n', ' '), file=sys.stderr)
+        self.compatibility_results_label.configure(text="Unable to reload the \ncompatibility matrix.")
+        return self.display_exceptions_text_box(message + "\n\nThe previous revision is still in use.")
+
+    '''
+           Method: refresh_option_menus
+           Purpose: Replace the values of the Eagle version and software/device option menus
+                    with the versions and devices read from the Excel sheet.
+    '''
+
+    def refresh_option_menus(self):
+        self.eagle_versions_list = list(self.matrix.versions)
+        self.software_device_list = list(self.matrix.devices)
+
+        # Keep the current selections when they still exist in the Excel sheet
+        if self.eagle_versions_list and self.global_eagle_version_choice not in self.matrix.version_index:
+            self.global_eagle_version_choice = self.eagle_versions_list[0]
+        if self.software_device_list and self.global_software_device_choice not in self.matrix.device_index:
+            self.global_software_device_choice = self.software_device_list[0]
+
+        self.eagle_version_option_menu.configure(values=self.eagle_versions_list)
+        self.eagle_version_option_menu.set(self.global_eagle_version_choice)
+
+        return self.software_device_menu()
+
+    '''
+            Method: display_compatibility_results
+            Purpose: Display compatibility results to the user.
+    '''
+
+    @timed('gui.display_compatibility_results')
+    def display_compatibility_results(self, message):
+        # Replace the text of the existing compatibility results label, it keeps its place in the grid
+        return self.compatibility_results_label.configure(text=message)
 
     '''
             Method: display_exceptions_text_box
             Purpose: Display any special requirements to user in the notes text box.
     '''
 
+    @timed('gui.display_exceptions_text_box')
     def display_exceptions_text_box(self, exception):
         self.delete_text_from_exceptions_text_box()  # Delete current text in text box
         self.insert_text_into_text_box(exception)  # Insert any special requirements into text box
@@ -501,20 +670,12 @@ class App(customtkinter.CTk):
 
     '''
              Method: update_text_box_with_new_text
-             Purpose: Update special notes text box with new text.
+             Purpose: Redraw the special notes text box with the new text.  Only pending redraws are run,
+                      a full update() would also process every queued event on each click.
     '''
 
     def update_text_box_with_new_text(self):
-        return self.display_exceptions.update()
-
-    '''
-             Method: get_pattern
-             Purpose: Returns compiled regular expression that matches 
-    '''
-
-    def get_pattern(self):
-        # Find pattern which contains one or two digits enclosed in brackets example [2] or [10]
-        return re.compile(r'\[(\d){1,2}\]')
+        return self.display_exceptions.update_idletasks()
 
     '''
               Method: submit_choice_button
@@ -523,37 +684,19 @@ class App(customtkinter.CTk):
                        compatibility methods and display the results to the user.
      '''
 
+    @timed('gui.submit')
     def submit_choice_button(self):
 
-        # Pass the eagle version the user chose - for example ('V1002 – V1303') - as 'key' to the matrix/dictionary.
-        # A list of 'yes' or 'no' values will be returned for example ['Yes','No'].
-        compatibility_list = self.get_compatibility_list()
-
-        # Yes or No value will be returned
-        compatibility_result = self.is_compatible(compatibility_list, self.global_software_device_choice)
+        # The finished answer of the eagle version and device the user chose - for example ('V1002 – V1303', 'MICT').
+        # Repeat queries are a single lookup in the result cache, it is only built on the first query of a revision.
+        result = self.result_cache.get(self.matrix, self.global_eagle_version_choice,
+                                       self.global_software_device_choice)
 
         # Display compatibility results to user
-        self.display_compatibility_results(compatibility_result)
-
-        # Find exceptions if they exist for the Eagle version
-        eagle_version_exception = self.find_exceptions_regex(self.global_eagle_version_choice)
-
-        # Find exceptions if they exist for the selected device
-        device_version_exception = self.find_exceptions_regex(compatibility_result)
+        self.display_compatibility_results(result.message)
 
-        # If the selected eagle version and device both do not have any special requirements
-        if eagle_version_exception == '' and device_version_exception == '':
-            self.display_exceptions_text_box(
-                "There are no special requirements for " + self.global_eagle_version_choice + " and " + self.global_software_device_choice + " compatibility.")
-        # Else if the selected device does have a special requirement and the eagle version does not
-        elif device_version_exception != '' and eagle_version_exception == '':
-            self.display_exceptions_text_box(device_version_exception)
-        elif eagle_version_exception == '':
-            self.display_exceptions_text_box(eagle_version_exception)
-        # Else both the eagle version and device have special requirements
-        else:
-            self.display_exceptions_text_box(eagle_version_exception + "\n\n")
-            self.insert_text_into_text_box(device_version_exception)
+        # Display the special requirements of the Eagle version and the selected device
+        self.display_exceptions_text_box(result.notes)
 
         return ''
 
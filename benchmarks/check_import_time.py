@@ -0,0 +1,91 @@
+'''
+    Import-time regression check for the core modules.
+
+    Imports every module in a fresh interpreter under python -X importtime, keeps the best cumulative
+    time over a few runs and fails when it is over budget or when a heavy dependency (pandas, numpy,
+    openpyxl, tkinter, customtkinter) got pulled into the import, i.e.
+
+        python benchmarks/check_import_time.py
+        python benchmarks/check_import_time.py --budget compatibility_matrix=40 --runs 10
+'''
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budget per module in milliseconds
+DEFAULT_BUDGETS_MS = {'compatibility_matrix': 60, 'compat_cli': 120}
+
+# Modules that must only be imported when a command actually needs them
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'tkinter', 'customtkinter', 'pyarrow']
+
+'''
+    Function: get_import_time
+    Purpose: Returns the cumulative import time of a module in milliseconds, read from -X importtime output.
+'''
+
+
+def get_import_time(module):
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+
+    for line in completed.stderr.splitlines():
+        # 'import time:  self [us] | cumulative | imported package', top level imports are not indented
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].rstrip() == ' ' + module:
+            return int(parts[1]) / 1000
+
+    raise RuntimeError(f'No import time reported for {module}')
+
+
+'''
+    Function: get_heavy_imports
+    Purpose: Returns the heavy modules loaded by importing a module.
+'''
+
+
+def get_heavy_imports(module):
+    code = (f'import sys, {module}; '
+            f'print(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))')
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in completed.stdout.strip().split(',') if name]
+
+
+'''
+    Function: parse_budgets
+    Purpose: Returns the budgets with the module=milliseconds overrides of the command line applied.
+'''
+
+
+def parse_budgets(overrides):
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for override in overrides:
+        module, _, milliseconds = override.partition('=')
+        budgets[module] = float(milliseconds)
+    return budgets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the import time of the core modules against a budget')
+    parser.add_argument('--budget', action='append', default=[], metavar='MODULE=MS',
+                        help='import budget of a module in milliseconds, may be repeated')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per module, the best run counts')
+    args = parser.parse_args(argv)
+
+    report = []
+    for module, budget in parse_budgets(args.budget).items():
+        best = min(get_import_time(module) for _ in range(args.runs))
+        heavy = get_heavy_imports(module)
+        report.append({'module': module, 'import_ms': round(best, 2), 'budget_ms': budget,
+                       'heavy_imports': heavy, 'ok': best <= budget and not heavy})
+
+    print(json.dumps(report, indent=2))
+    return 0 if all(entry['ok'] for entry in report) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+'''
+    Synthetic workbook generator for the benchmarks.
+
+    Writes an Excel file shaped like the LST-1592 compatibility matrix: a hardware table at the top,
+    the 'Eagle Version' table with one row per Eagle version ('V1002 – V1303', 'V2120[3]', ...) and one
+    column per software/device, cells such as 'Yes', 'No', 'Yes[4]' and 'Yes[1][4]', and the footnote
+    notes section below it, i.e.
+
+        python benchmarks/generate_workbook.py --size medium -o /tmp/medium.xlsx
+        python benchmarks/generate_workbook.py --versions 5000 --devices 200 -o /tmp/custom.xlsx
+'''
+
+import argparse
+import random
+import sys
+
+# Named sizes as (Eagle versions, devices), 'small' is the size of the real workbook
+SIZES = {'small': (54, 15),
+         'medium': (1000, 100),
+         'large': (10000, 300),
+         'huge': (100000, 1000)}
+
+# Device names of the real workbook, used first before numbered synthetic devices
+DEVICE_NAMES = ['SafetyNet', 'MICT', 'Sketch', 'Trace', 'Tir-1', 'Radius-7', 'Radius-7 Wifi', 'Radius T',
+                'Centroid', 'VSM', 'SedLine', 'MOA', 'External SatShare', 'Iris - DMS', 'Iris Gateway']
+
+# Share of cells that are 'No', blank (unknown), carry one footnote or carry two footnotes
+NO_RATE = 0.08
+BLANK_RATE = 0.01
+FOOTNOTE_RATE = 0.03
+DOUBLE_FOOTNOTE_RATE = 0.005
+
+# Share of Eagle versions with a footnote of their own i.e. 'V2120[3]'
+VERSION_FOOTNOTE_RATE = 0.02
+
+# Rows of the hardware table written above the compatibility table
+HARDWARE_ROWS = 8
+
+'''
+    Function: get_devices
+    Purpose: Returns the device names of a synthetic workbook.
+'''
+
+
+def get_devices(count):
+    return (DEVICE_NAMES + [f'Device-{number:04d}' for number in range(len(DEVICE_NAMES) + 1, count + 1)])[:count]
+
+
+'''
+    Function: get_versions
+    Purpose: Returns ascending Eagle version labels, starting with the range of the real workbook.
+'''
+
+
+def get_versions(count, generator, footnote_count):
+    versions = ['V1002 – V1303']
+    build = 1303
+
+    while len(versions) < count:
+        build += generator.randint(1, 4)
+        label = f'V{build}'
+        if footnote_count and generator.random() < VERSION_FOOTNOTE_RATE:
+            label += f'[{generator.randint(1, footnote_count)}]'
+        versions.append(label)
+
+    return versions[:count]
+
+
+'''
+    Function: get_cell
+    Purpose: Returns the text of one random cell.
+'''
+
+
+def get_cell(generator, footnote_count):
+    draw = generator.random()
+
+    if draw < BLANK_RATE:
+        return None
+    if draw < BLANK_RATE + NO_RATE:
+        return 'No'
+    if footnote_count and draw < BLANK_RATE + NO_RATE + DOUBLE_FOOTNOTE_RATE:
+        first, second = sorted(generator.sample(range(1, footnote_count + 1), 2))
+        return f'Yes[{first}][{second}]'
+    if footnote_count and draw < BLANK_RATE + NO_RATE + DOUBLE_FOOTNOTE_RATE + FOOTNOTE_RATE:
+        return f'Yes[{generator.randint(1, footnote_count)}]'
+    return 'Yes'
+
+
+'''
+    Function: get_footnote_text
+    Purpose: Returns the text of a synthetic footnote i.e. 'Requires minimum MICT V1049'.
+'''
+
+
+def get_footnote_text(generator, devices):
+    device = generator.choice(devices)
+    version = generator.randint(1000, 5999)
+    if generator.random() < 0.3:
+        return f'Requires minimum {device} V{version} to support all features'
+    return f'Requires minimum {device} V{version}'
+
+
+'''
+    Function: generate_workbook
+    Purpose: Write a synthetic compatibility matrix workbook, streaming the rows so memory stays flat.
+
+            - path: output .xlsx file.
+            - version_count: number of Eagle version rows.
+            - device_count: number of software/device columns.
+            - footnote_count: number of footnotes in the notes section.
+            - seed: random seed, the same arguments always produce the same workbook.
+'''
+
+
+def generate_workbook(path, version_count, device_count, footnote_count=26, seed=0):
+    import openpyxl
+
+    generator = random.Random(seed)
+    devices = get_devices(device_count)
+    footnote_count = footnote_count if footnote_count >= 2 else 0
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Compatibility Matrix')
+
+    # Hardware table above the compatibility table, like the real workbook
+    sheet.append(['Boxed Assemblies', 'Top-Assembly', 'Hardware Description', 'Minimum SW Version'])
+    for number in range(1, HARDWARE_ROWS):
+        sheet.append([f'{25000 + number}', f'23908-{number:03d}', f'Assembly, Eagle, Vital Signs {number}',
+                      f'V1.5.1.{number}'])
+    sheet.append([])
+
+    sheet.append(['Eagle Version'] + devices)
+    for version in get_versions(version_count, generator, footnote_count):
+        sheet.append([version] + [get_cell(generator, footnote_count) for _ in range(device_count)])
+
+    # Notes section below the table
+    for _ in range(3):
+        sheet.append([])
+    for footnote_id in range(1, footnote_count + 1):
+        sheet.append([f'[{footnote_id}] {get_footnote_text(generator, devices)}'])
+
+    workbook.save(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic LST-1592 shaped compatibility workbook')
+    parser.add_argument('-o', '--output', required=True, help='output .xlsx file')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='named size (default: %(default)s)')
+    parser.add_argument('--versions', type=int, help='Eagle version rows (overrides --size)')
+    parser.add_argument('--devices', type=int, help='software/device columns (overrides --size)')
+    parser.add_argument('--footnotes', type=int, default=26, help='footnotes in the notes section')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    version_count, device_count = SIZES[args.size]
+    generate_workbook(args.output, args.versions or version_count, args.devices or device_count,
+                      args.footnotes, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+'''
+    Rendering benchmark for the GUI.
+
+    Starts the application, waits for the matrix to load and simulates user interactions
+    (select an Eagle version and a device, Submit, and every few clicks the oldest/newest toggle).
+    Reports per-click latency and, at regular checkpoints, the traced Python memory and the
+    number of Tk widgets, which must stay flat across the run, i.e.
+
+        python benchmarks/gui_render.py --interactions 10000
+
+    A display is required, on a headless machine run it under xvfb-run.
+'''
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# The benchmark lives one directory below the application modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+'''
+    Function: count_widgets
+    Purpose: Returns the number of widgets below a Tk widget, recursively.
+'''
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+'''
+    Function: wait_for_matrix
+    Purpose: Run the Tk loop until the background load installed the matrix.
+'''
+
+
+def wait_for_matrix(app, timeout):
+    deadline = time.perf_counter() + timeout
+    while app.matrix is None:
+        if time.perf_counter() > deadline:
+            raise RuntimeError('The compatibility matrix did not load in time')
+        app.update()
+        time.sleep(0.01)
+
+    # Let the ready state and option menus settle before measuring
+    app.update()
+
+
+'''
+    Function: percentile
+    Purpose: Returns the given percentile (0-100) of a list of samples.
+'''
+
+
+def percentile(samples, percent):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+'''
+    Function: run_benchmark
+    Purpose: Simulate the interactions and return the report as a dictionary.
+'''
+
+
+def run_benchmark(args):
+    import app_gui
+
+    app = app_gui.App()
+    try:
+        wait_for_matrix(app, args.timeout)
+
+        generator = random.Random(args.seed)
+        versions = list(app.matrix.versions)
+        devices = list(app.matrix.devices)
+        checkpoint_every = max(1, args.interactions // args.checkpoints)
+
+        latencies = []
+        checkpoints = []
+        tracemalloc.start()
+
+        for number in range(1, args.interactions + 1):
+            start = time.perf_counter()
+
+            if number % args.toggle_every == 0:
+                app.reverse_eagle_version_list()
+            else:
+                app.eagle_version_option_menu.set(app.eagle_version_option_menu_callback(generator.choice(versions)))
+                device = generator.choice(devices)
+                app.device_software_menu_callback(device)
+                app.software_version_option_menu.set(device)
+
+            app.submit_choice_button()
+            app.update_idletasks()
+            latencies.append(time.perf_counter() - start)
+
+            if number % checkpoint_every == 0:
+                app.update()
+                checkpoints.append({'interactions': number,
+                                    'traced_kib': round(tracemalloc.get_traced_memory()[0] / 1024, 1),
+                                    'widgets': count_widgets(app),
+                                    'p50_ms': round(percentile(latencies[-checkpoint_every:], 50) * 1000, 3)})
+
+        tracemalloc.stop()
+    finally:
+        app.on_closing()
+
+    first, last = checkpoints[0], checkpoints[-1]
+    return {'interactions': args.interactions,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'max_ms': round(max(latencies) * 1000, 3),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+            'widget_growth': last['widgets'] - first['widgets'],
+            'traced_kib_growth': round(last['traced_kib'] - first['traced_kib'], 1),
+            'checkpoints': checkpoints}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark GUI rendering over many simulated interactions')
+    parser.add_argument('--interactions', type=int, default=10000)
+    parser.add_argument('--toggle-every', type=int, default=10, help='press the toggle every N interactions')
+    parser.add_argument('--checkpoints', type=int, default=10, help='memory/widget samples taken over the run')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds to wait for the matrix to load')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2))
+
+    # Widgets created per click mean something is rebuilt instead of updated in place
+    return 1 if report['widget_growth'] > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+'''
+    Load test for the local HTTP query service (python main.py serve).
+
+    Opens a number of keep-alive connections, sends random single lookups for the given duration
+    and reports requests/second and p50/p99 latency, i.e.
+
+        python benchmarks/load_test.py --port 8080 --connections 16 --duration 10
+'''
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import urllib.parse
+
+
+'''
+    Function: send_request
+    Purpose: Send one request on a keep-alive connection and return (status, headers, body).
+'''
+
+
+async def send_request(reader, writer, method, path, host, body=b'', etag=None):
+    head = f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n'
+    if etag is not None:
+        head += f'If-None-Match: {etag}\r\n'
+    writer.write((head + '\r\n').encode('latin-1') + body)
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    response_body = await reader.readexactly(length) if length else b''
+    return status, headers, response_body
+
+
+'''
+    Function: get_paths
+    Purpose: Ask the server for its versions and devices and build the lookup paths to request.
+'''
+
+
+async def get_paths(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, _, body = await send_request(reader, writer, 'GET', '/versions', host)
+    finally:
+        writer.close()
+
+    if status != 200:
+        raise RuntimeError(f'GET /versions answered {status}')
+
+    matrix = json.loads(body)
+    return ['/compatibility?' + urllib.parse.urlencode({'version': version, 'device': device})
+            for version in matrix['versions'] for device in matrix['devices']]
+
+
+'''
+    Function: run_connection
+    Purpose: Send requests on one connection until the deadline and record every latency in seconds.
+'''
+
+
+async def run_connection(host, port, paths, deadline, latencies, errors, revalidate, seed):
+    generator = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        while time.perf_counter() < deadline:
+            path = generator.choice(paths)
+            start = time.perf_counter()
+            status, headers, _ = await send_request(reader, writer, 'GET', path, host,
+                                                    etag=etags.get(path) if revalidate else None)
+            latencies.append(time.perf_counter() - start)
+
+            if status == 200:
+                etags[path] = headers.get('etag')
+            elif status != 304:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+'''
+    Function: percentile
+    Purpose: Returns the given percentile (0-100) of a list of samples.
+'''
+
+
+def percentile(samples, percent):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+'''
+    Function: run_load_test
+    Purpose: Run the load test and return the report as a dictionary.
+'''
+
+
+async def run_load_test(args):
+    paths = await get_paths(args.host, args.port)
+    latencies = []
+    errors = []
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(run_connection(args.host, args.port, paths, deadline, latencies, errors,
+                                          args.revalidate, args.seed + number)
+                           for number in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    return {'requests': len(latencies),
+            'errors': len(errors),
+            'connections': args.connections,
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the local compatibility query service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--connections', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--revalidate', action='store_true',
+                        help='send If-None-Match with the last ETag of each path (exercises 304 responses)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load_test(args))
+    print(json.dumps(report, indent=2))
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+'''
+    Benchmark suite of the compatibility matrix core, headless (no tkinter needed).
+
+    For every size a synthetic workbook is generated (see generate_workbook.py) and measured:
+
+        import          start a fresh interpreter and import the core / command line modules
+        parse           stream the workbook into a CompatibilityMatrix (process_excel_file)
+        build           build the matrix from rows already read (CompatibilityMatrix.from_records)
+        cache_store     parse and write the compiled cache (load_matrix, cache miss)
+        cache_load      load the compiled cache (load_matrix, cache hit)
+        mapped_open     memory-map the binary matrix file (open_matrix_file)
+        single_lookup   uncached lookup per pair: get_row + the device cell + the footnote notes
+        cached_lookup   the same pairs through a ResultCache around a cell text + notes builder, the cache the
+                        GUI uses per Submit (its own message formatting is not included, it needs tkinter)
+        batch_lookup    query_many over random pairs
+        batch_statuses  get_statuses over random pairs
+        cli_query       the query command's JSON lines output over random pairs
+
+    Results are written as JSON.  Pass a previous result file as --baseline to flag regressions, i.e.
+
+        python benchmarks/run_benchmarks.py --sizes small medium -o results.json
+        python benchmarks/run_benchmarks.py --sizes small medium --baseline results.json
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# The benchmarks live one directory below the application modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import compat_cli  # noqa: E402
+import compatibility_matrix  # noqa: E402
+from generate_workbook import SIZES, generate_workbook  # noqa: E402
+from matrix_cache import MatrixCache  # noqa: E402
+from matrix_file import open_matrix_file, write_matrix_file  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from workbook_reader import MatrixTableReader  # noqa: E402
+
+# Modules whose import time is measured in a fresh interpreter
+IMPORT_MODULES = ['compatibility_matrix', 'compat_cli']
+
+# Random (version, device) pairs per lookup benchmark
+LOOKUP_PAIRS = 100000
+
+# Relative slow down over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+'''
+    Function: measure
+    Purpose: Run a function repeat times and return (best, median) wall time in seconds.
+'''
+
+
+def measure(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return min(samples), statistics.median(samples)
+
+
+'''
+    Function: make_result
+    Purpose: Returns one result entry, operations > 1 adds the time per operation.
+'''
+
+
+def make_result(size, case, timings, operations=1):
+    best, median = timings
+    result = {'size': size, 'case': case, 'best_s': round(best, 6), 'median_s': round(median, 6)}
+    if operations > 1:
+        result['operations'] = operations
+        result['best_ns_per_op'] = round(best / operations * 1e9, 1)
+    return result
+
+
+'''
+    Function: measure_import
+    Purpose: Returns the best/median time to start an interpreter and import a module, minus a bare start.
+'''
+
+
+def measure_import(module, repeat):
+    def run(code):
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+
+    bare = measure(lambda: run('pass'), repeat)
+    loaded = measure(lambda: run(f'import {module}'), repeat)
+    return max(loaded[0] - bare[0], 0.0), max(loaded[1] - bare[1], 0.0)
+
+
+'''
+    Function: get_workbook
+    Purpose: Returns the path of the synthetic workbook of a size, generating it once per work directory.
+'''
+
+
+def get_workbook(size, work_directory, seed):
+    version_count, device_count = SIZES[size]
+    path = os.path.join(work_directory, f'{size}-{version_count}x{device_count}-{seed}.xlsx')
+    if not os.path.exists(path):
+        generate_workbook(path, version_count, device_count, seed=seed)
+    return path
+
+
+'''
+    Function: run_size
+    Purpose: Run every benchmark against the workbook of one size and return the result entries.
+'''
+
+
+def run_size(size, path, work_directory, args):
+    results = []
+    repeat = args.repeat
+
+    results.append(make_result(size, 'parse', measure(lambda: compatibility_matrix.process_excel_file(path), repeat)))
+
+    with MatrixTableReader(path) as reader:
+        devices = reader.devices
+        records = list(reader)
+    results.append(make_result(size, 'build', measure(
+        lambda: compatibility_matrix.CompatibilityMatrix.from_records(devices, records), repeat)))
+
+    # Cache entries and the matrix file of this size are removed once measured
+    with tempfile.TemporaryDirectory(dir=work_directory, prefix='cache-') as cache_directory:
+        cache = MatrixCache(cache_directory)
+
+        def store():
+            # Drop the stored entry so every run is a miss
+            cache_path = cache.get_cache_path(path)
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            compatibility_matrix.load_matrix(path, cache)
+
+        results.append(make_result(size, 'cache_store', measure(store, repeat)))
+        results.append(make_result(size, 'cache_load', measure(lambda: compatibility_matrix.load_matrix(path, cache),
+                                                               repeat)))
+
+        matrix = compatibility_matrix.load_matrix(path, cache)
+
+        matrix_file = write_matrix_file(matrix, os.path.join(cache_directory, size + '.eaglemx'))
+        results.append(make_result(size, 'mapped_open', measure(lambda: open_matrix_file(matrix_file), repeat)))
+
+    generator = random.Random(args.seed)
+    pairs = [(generator.choice(matrix.versions), generator.choice(matrix.devices)) for _ in range(args.pairs)]
+    versions = [version for version, _ in pairs]
+    device_names = [device for _, device in pairs]
+
+    def single_lookups():
+        for version, device in pairs:
+            compatibility_list = matrix.get_row(version)
+            compatibility_list[matrix.device_index[device]]
+            matrix.get_notes(version, device)
+
+    results.append(make_result(size, 'single_lookup', measure(single_lookups, repeat), len(pairs)))
+
+    result_cache = ResultCache(lambda matrix, version, device: (matrix.get_cell_text(version, device),
+                                                                matrix.get_notes(version, device)))
+
+    def cached_lookups():
+        for version, device in pairs:
+            result_cache.get(matrix, version, device)
+
+    results.append(make_result(size, 'cached_lookup', measure(cached_lookups, repeat), len(pairs)))
+    results.append(make_result(size, 'batch_lookup', measure(lambda: sum(1 for _ in matrix.query_many(pairs)),
+                                                             repeat), len(pairs)))
+    results.append(make_result(size, 'batch_statuses', measure(lambda: matrix.get_statuses(versions, device_names),
+                                                               repeat), len(pairs)))
+    results.append(make_result(size, 'cli_query', measure(
+        lambda: sum(1 for _ in compat_cli.iter_output_lines(matrix, pairs, compat_cli.format_jsonl)), repeat),
+        len(pairs)))
+
+    return results
+
+
+'''
+    Function: find_regressions
+    Purpose: Returns the results that are slower than the same size/case of a baseline by more than tolerance.
+'''
+
+
+def find_regressions(results, baseline, tolerance):
+    previous = {(result['size'], result['case']): result for result in baseline['results']}
+    regressions = []
+
+    for result in results:
+        old = previous.get((result['size'], result['case']))
+        if old is None or old['best_s'] <= 0:
+            continue
+        ratio = result['best_s'] / old['best_s']
+        if ratio > 1 + tolerance:
+            regressions.append({'size': result['size'], 'case': result['case'],
+                                'baseline_s': old['best_s'], 'best_s': result['best_s'], 'ratio': round(ratio, 2)})
+
+    return regressions
+
+
+'''
+    Function: get_revision
+    Purpose: Returns the git revision of the working tree, or None outside a git checkout.
+'''
+
+
+def get_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the compatibility matrix core on synthetic workbooks')
+    parser.add_argument('--sizes', nargs='+', choices=sorted(SIZES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark, the best and median are kept')
+    parser.add_argument('--pairs', type=int, default=LOOKUP_PAIRS, help='random pairs per lookup benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-directory', help='where generated workbooks are kept between runs '
+                                                 '(default: a temporary directory)')
+    parser.add_argument('-o', '--output', default='-', help='JSON results file (default: stdout)')
+    parser.add_argument('--baseline', help='previous JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='relative slow down reported as a regression (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='eagle-benchmarks-') as temporary_directory:
+        work_directory = args.work_directory or temporary_directory
+        os.makedirs(work_directory, exist_ok=True)
+
+        results = [make_result('-', f'import {module}', measure_import(module, args.repeat))
+                   for module in IMPORT_MODULES]
+        for size in args.sizes:
+            path = get_workbook(size, work_directory, args.seed)
+            results.extend(run_size(size, path, work_directory, args))
+
+    report = {'revision': get_revision(),
+              'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'results': results}
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            report['regressions'] = find_regressions(results, json.load(baseline_file), args.tolerance)
+
+    with compat_cli.open_output(args.output) as output_file:
+        json.dump(report, output_file, indent=2)
+        output_file.write('\n')
+
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+from itertools import compress
+
+from compatibility_matrix import STATUS_YES
+
+# Maps every status byte to '1' for a plain 'Yes' and '0' otherwise, so a row of
+# the packed status grid becomes a bit string with one translate call
+BIT_TABLE = bytes(ord('1') if code == STATUS_YES else ord('0') for code in range(256))
+
+# Maps the digits of a bit string back to 0/1 bytes for itertools.compress
+SELECTOR_TABLE = bytes.maketrans(b'01', b'\x00\x01')
+
+
+'''
+    Function: select_bits
+    Purpose: Returns the items whose bit is set in a mask, in order.  The mask is expanded
+             to one selector byte per item, so no Python loop runs per bit.
+
+            - items: list of versions or devices, item i maps to bit i.
+            - mask: integer bitmask.
+'''
+
+
+def select_bits(items, mask):
+    if not mask:
+        return []
+
+    selectors = format(mask, f'0{len(items)}b')[::-1].encode('ascii').translate(SELECTOR_TABLE)
+    return list(compress(items, selectors))
+
+
+class BitsetIndex:
+    '''
+        Method: __init__
+        Purpose: Create a bitset index of a matrix: one integer bitmask per Eagle version with bit c set when
+                 device column c is compatible, and the inverted index of one bitmask per device with bit r
+                 set when Eagle version row r is compatible.  Set queries over several devices are then a
+                 handful of AND/OR operations on Python integers, whatever the size of the matrix.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+    '''
+
+    def __init__(self, matrix):
+        self.versions = matrix.versions
+        self.devices = matrix.devices
+        self.version_index = matrix.version_index
+        self.device_index = matrix.device_index
+
+        device_count = matrix.device_count
+        bits = matrix.status.tobytes().translate(BIT_TABLE).decode('ascii')
+
+        # Bit strings are written most significant bit first, so they are reversed before parsing
+        self.version_masks = [int(bits[row * device_count:(row + 1) * device_count][::-1] or '0', 2)
+                              for row in range(matrix.version_count)]
+        self.device_masks = [int(bits[column::device_count][::-1] or '0', 2) for column in range(device_count)]
+
+        # Every Eagle version row, used to invert a mask
+        self.all_versions_mask = (1 << matrix.version_count) - 1
+
+    '''
+        Method: get_device_mask
+        Purpose: Returns the bitmask of a set of devices over the device columns.
+
+                - devices: software/devices i.e. ['SafetyNet', 'MICT'], KeyError for unknown devices.
+    '''
+
+    def get_device_mask(self, devices):
+        mask = 0
+        for device in devices:
+            mask |= 1 << self.device_index[device]
+        return mask
+
+    '''
+        Method: find_version_mask
+        Purpose: Returns the bitmask of the Eagle version rows compatible with all of all_devices,
+                 at least one of any_devices and none of none_devices.  Empty arguments do not filter.
+    '''
+
+    def find_version_mask(self, all_devices=(), any_devices=(), none_devices=()):
+        mask = self.all_versions_mask
+
+        for device in all_devices:
+            mask &= self.device_masks[self.device_index[device]]
+
+        if any_devices:
+            any_mask = 0
+            for device in any_devices:
+                any_mask |= self.device_masks[self.device_index[device]]
+            mask &= any_mask
+
+        for device in none_devices:
+            mask &= ~self.device_masks[self.device_index[device]]
+
+        return mask
+
+    '''
+        Method: find_versions
+        Purpose: Returns the Eagle versions, in sheet order, matching a device set query, see find_version_mask
+                 i.e. find_versions(all_devices=['SafetyNet', 'MICT', 'SedLine']).
+    '''
+
+    def find_versions(self, all_devices=(), any_devices=(), none_devices=()):
+        return select_bits(self.versions, self.find_version_mask(all_devices, any_devices, none_devices))
+
+    '''
+        Method: get_compatible_devices
+        Purpose: Returns the devices compatible with an Eagle version, in column order.
+    '''
+
+    def get_compatible_devices(self, version):
+        return select_bits(self.devices, self.version_masks[self.version_index[version]])
+
+    '''
+        Method: supports_all
+        Purpose: Returns True when an Eagle version is compatible with every device of a set.
+    '''
+
+    def supports_all(self, version, devices):
+        device_mask = self.get_device_mask(devices)
+        return self.version_masks[self.version_index[version]] & device_mask == device_mask
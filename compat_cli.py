@@ -0,0 +1,789 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+from collections import namedtuple
+
+import compatibility_matrix
+from instrumentation import METRICS
+from matrix_cache import MatrixCache
+from version_index import RESOLVE_EXACT, RESOLVE_FLOOR
+
+# Supported input and output formats of the query command
+INPUT_FORMATS = ('csv', 'jsonl')
+OUTPUT_FORMATS = ('jsonl', 'csv')
+
+# Columns written by the query command in CSV mode
+CSV_FIELDS = ['version', 'matched_version', 'device', 'status', 'compatible', 'notes', 'error']
+
+# How raw Eagle versions are matched to the versions listed in the sheet, 'none' only accepts listed spellings
+RESOLVE_MODES = ('none', RESOLVE_EXACT, RESOLVE_FLOOR)
+
+# Separator used to join several notes into one CSV cell
+CSV_NOTES_SEPARATOR = ' | '
+
+# Columns written by the plan command in CSV mode
+PLAN_CSV_FIELDS = ['site', 'version', 'matched_version', 'target_version', 'upgrade_required',
+                   'incompatible_devices', 'prerequisites', 'error']
+
+# Matrices up to this many cells have all their HTTP responses serialized at start up
+PRECOMPUTE_CELL_LIMIT = 100000
+
+# Input line that could not be read as a pair, answered with an error result instead of aborting the stream
+InvalidRecord = namedtuple('InvalidRecord', ['line_number', 'error'])
+
+'''
+    Function: detect_format
+    Purpose: Returns the format of a file from its extension i.e. 'jsonl' for 'pairs.jsonl',
+             or the default for stdin/stdout and unknown extensions.
+
+            - path: file path or '-' for stdin/stdout.
+            - formats: supported formats.
+            - default: format used when the extension does not tell.
+'''
+
+
+def detect_format(path, formats, default):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension == 'json':
+        extension = 'jsonl'
+    return extension if extension in formats else default
+
+
+'''
+    Function: read_csv_pairs
+    Purpose: Yield (version, device) pairs from CSV lines.  An optional 'version,device' header is skipped.
+
+            - file: text file opened with newline=''.
+'''
+
+
+def read_csv_pairs(file):
+    for line_number, row in enumerate(csv.reader(file), start=1):
+        if not row:
+            continue
+
+        version = row[0].strip()
+        device = row[1].strip() if len(row) > 1 else ''
+
+        # Skip the header line
+        if line_number == 1 and version.lower() in ('version', 'eagle version') and device.lower() == 'device':
+            continue
+
+        yield version, device
+
+
+'''
+    Function: read_jsonl_pairs
+    Purpose: Yield (version, device) pairs from JSON lines i.e. {"version": "V2124", "device": "Radius-7"}
+             Lines that are not JSON objects yield an InvalidRecord, so one bad line does not abort the stream.
+
+            - file: text file.
+'''
+
+
+def read_jsonl_pairs(file):
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield InvalidRecord(line_number, f'Line {line_number}: invalid JSON ({error.msg})')
+            continue
+
+        if not isinstance(record, dict):
+            yield InvalidRecord(line_number, f'Line {line_number}: expected a JSON object')
+            continue
+
+        yield str(record.get('version', '')), str(record.get('device', ''))
+
+
+'''
+    Function: get_matched_version
+    Purpose: Returns the listed Eagle version a queried version resolves to, or None.
+
+            - matrix: CompatibilityMatrix.
+            - version: Eagle version i.e. 'V2124', taken as listed when resolve is 'none'.
+            - resolve: one of RESOLVE_MODES.
+'''
+
+
+def get_matched_version(matrix, version, resolve=RESOLVE_EXACT):
+    return version if resolve == 'none' else matrix.resolve_version(version, resolve)
+
+
+'''
+    Function: build_result
+    Purpose: Answer one query as a dictionary with the Yes/No status and the footnote text,
+             or an error for unknown Eagle versions and devices.
+
+            - matrix: CompatibilityMatrix.
+            - version: Eagle version i.e. 'V2124', resolved to a listed version unless resolve is 'none'.
+            - device: software/device i.e. 'Radius-7'
+            - resolve: one of RESOLVE_MODES.
+'''
+
+
+def build_result(matrix, version, device, resolve=RESOLVE_EXACT):
+    return build_matched_result(matrix, version, get_matched_version(matrix, version, resolve), device)
+
+
+'''
+    Function: build_matched_result
+    Purpose: Like build_result, for a version already resolved to matched_version (None if it did not resolve).
+'''
+
+
+def build_matched_result(matrix, version, matched_version, device):
+    try:
+        result = matrix.query(matched_version, device)
+    except KeyError:
+        error = 'Unknown Eagle version' if matched_version not in matrix.version_index else 'Unknown device'
+        return {'version': version, 'matched_version': matched_version, 'device': device, 'status': None,
+                'compatible': None, 'notes': [], 'error': error}
+
+    return {'version': version,
+            'matched_version': matched_version,
+            'device': device,
+            'status': compatibility_matrix.STATUS_LABELS[result.status],
+            'compatible': result.compatible,
+            'notes': matrix.get_notes(matched_version, device),
+            'error': None}
+
+
+'''
+    Function: get_memoized_result
+    Purpose: Returns the result of a pair through a memo keyed by (matched version, device).  The version is
+             resolved first, so the memo never holds more entries than the matrix has cells whatever raw
+             spellings clients send; the raw version is put back into a copy of the memoized result.
+             Errors are never memoized.
+
+            - matrix: CompatibilityMatrix.
+            - results: memo dictionary owned by the caller.
+            - version: Eagle version as queried.
+            - device: software/device.
+            - resolve: one of RESOLVE_MODES.
+'''
+
+
+def get_memoized_result(matrix, results, version, device, resolve=RESOLVE_EXACT):
+    matched_version = get_matched_version(matrix, version, resolve)
+    key = (matched_version, device)
+    result = results.get(key)
+
+    if result is None:
+        result = build_matched_result(matrix, matched_version, matched_version, device)
+        if result['error'] is not None:
+            return dict(result, version=version)
+        results[key] = result
+
+    return result if version == matched_version else dict(result, version=version)
+
+
+'''
+    Function: format_jsonl
+    Purpose: Serialize a result as one JSON line.
+'''
+
+
+def format_jsonl(result):
+    return json.dumps(result, ensure_ascii=False) + '\n'
+
+
+'''
+    Function: get_csv_formatter
+    Purpose: Returns a function that serializes a result as one CSV line.
+'''
+
+
+def get_csv_formatter():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    def format_csv(result):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([result['version'], result['matched_version'] or '', result['device'], result['status'] or '',
+                         '' if result['compatible'] is None else str(result['compatible']).lower(),
+                         CSV_NOTES_SEPARATOR.join(result['notes']), result['error'] or ''])
+        return buffer.getvalue()
+
+    return format_csv
+
+
+'''
+    Function: iter_output_lines
+    Purpose: Answer a stream of pairs lazily and yield the serialized result lines.
+             Results are memoized by (matched version, device), see get_memoized_result.  The serialized
+             line is memoized too when the pair was asked by its listed version, so a repeated listed pair
+             costs one dictionary lookup.  Both memos are keyed by listed versions only and never grow
+             beyond the number of cells in the matrix; raw versions are resolved and serialized per line.
+
+            - matrix: CompatibilityMatrix.
+            - pairs: iterable of (version, device) pairs or InvalidRecord, answered with an error result.
+            - format_result: function that serializes one result.
+            - resolve: one of RESOLVE_MODES.
+'''
+
+
+def iter_output_lines(matrix, pairs, format_result, resolve=RESOLVE_EXACT):
+    lines = {}
+    results = {}
+
+    for pair in pairs:
+        line = lines.get(pair)
+
+        if line is None:
+            if type(pair) is InvalidRecord:
+                yield format_result({'version': None, 'matched_version': None, 'device': None, 'status': None,
+                                     'compatible': None, 'notes': [], 'error': pair.error})
+                continue
+
+            result = get_memoized_result(matrix, results, *pair, resolve)
+            line = format_result(result)
+            if result['error'] is None and result['version'] == result['matched_version']:
+                lines[pair] = line
+
+        yield line
+
+
+'''
+    Function: load_workbook_matrix
+    Purpose: Load the matrix of the workbook given on the command line once, using the compiled cache
+             unless --no-cache was given.  The cache hit/miss report goes to stderr.  With --matrix-file
+             the binary matrix file is memory-mapped instead.
+
+            - args: parsed command line arguments.
+'''
+
+
+def load_workbook_matrix(args):
+    if args.matrix_file:
+        from matrix_file import open_matrix_file
+
+        return open_matrix_file(args.matrix_file)
+
+    cache = None if args.no_cache else MatrixCache(compatibility_matrix.DEFAULT_CACHE_DIRECTORY)
+    matrix = compatibility_matrix.load_matrix(args.workbook, cache)
+
+    if cache is not None:
+        print(cache.report(), file=sys.stderr)
+
+    return matrix
+
+
+'''
+    Function: open_input
+    Purpose: Open a text input file, '-' means stdin.
+'''
+
+
+def open_input(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, encoding='utf-8', newline='')
+
+
+'''
+    Function: open_output
+    Purpose: Open a text output file, '-' means stdout.
+'''
+
+
+def open_output(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdout)
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+'''
+    Function: run_query
+    Purpose: The query command.  Reads (version, device) pairs as CSV or JSON lines and streams one
+             result per pair as JSON lines or CSV, in constant memory.
+'''
+
+
+def run_query(args):
+    input_format = args.input_format or detect_format(args.input, INPUT_FORMATS, 'csv')
+    output_format = args.output_format or detect_format(args.output, OUTPUT_FORMATS, 'jsonl')
+
+    matrix = load_workbook_matrix(args)
+
+    if output_format == 'csv':
+        format_result = get_csv_formatter()
+        header = ','.join(CSV_FIELDS) + '\n'
+    else:
+        format_result = format_jsonl
+        header = ''
+
+    with open_input(args.input) as input_file, open_output(args.output) as output_file:
+        pairs = read_csv_pairs(input_file) if input_format == 'csv' else read_jsonl_pairs(input_file)
+        output_file.write(header)
+        output_file.writelines(iter_output_lines(matrix, pairs, format_result, args.resolve))
+
+    return 0
+
+
+'''
+    Function: run_serve
+    Purpose: The serve command.  Loads the matrix once and answers lookups over HTTP until interrupted.
+'''
+
+
+def run_serve(args):
+    import asyncio
+
+    from compat_server import CompatibilityServer
+
+    server = CompatibilityServer(load_workbook_matrix(args))
+
+    # Small matrices get every response serialized up front, larger ones are memoized on first use
+    if len(server.matrix.versions) * len(server.matrix.devices) <= PRECOMPUTE_CELL_LIMIT:
+        server.precompute()
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+'''
+    Function: run_audit
+    Purpose: The audit command.  Joins a fleet inventory (CSV or Parquet, one row per site) against the matrix
+             chunk by chunk and writes a per-site report plus summary counts.
+'''
+
+
+def run_audit(args):
+    # numpy and pandas are only needed by the audit
+    import fleet_audit
+
+    matrix = load_workbook_matrix(args)
+    columns = (args.site_column, args.version_column, args.devices_column)
+
+    with open_output(args.output) as output_file:
+        summary = fleet_audit.audit_inventory(matrix, args.inventory, output_file, columns, args.chunk_size)
+
+    with open_output(args.summary) if args.summary != '-' else contextlib.nullcontext(sys.stderr) as summary_file:
+        json.dump(summary, summary_file, indent=2, ensure_ascii=False)
+        summary_file.write('\n')
+
+    return 0
+
+
+'''
+    Function: run_prerequisites
+    Purpose: The prerequisites command.  Checks a fleet inventory with peripheral firmware versions against
+             the rules compiled from the footnotes and writes a per-site report plus summary counts per rule.
+'''
+
+
+def run_prerequisites(args):
+    # numpy and pandas are only needed by the check
+    import fleet_audit
+
+    matrix = load_workbook_matrix(args)
+    columns = (args.site_column, args.version_column, args.devices_column)
+
+    with open_output(args.output) as output_file:
+        summary = fleet_audit.check_prerequisites(matrix, args.inventory, output_file, columns, args.chunk_size)
+
+    with open_output(args.summary) if args.summary != '-' else contextlib.nullcontext(sys.stderr) as summary_file:
+        json.dump(summary, summary_file, indent=2, ensure_ascii=False)
+        summary_file.write('\n')
+
+    return 0
+
+
+'''
+    Function: run_select
+    Purpose: The select command.  Prints the Eagle versions compatible with a set of devices,
+             answered from the bitset index of the matrix.
+'''
+
+
+def run_select(args):
+    matrix = load_workbook_matrix(args)
+
+    try:
+        versions = matrix.find_versions(args.all_devices, args.any_devices, args.none_devices)
+    except KeyError as error:
+        print(f'Unknown device: {error.args[0]}', file=sys.stderr)
+        return 2
+
+    if args.json:
+        json.dump(versions, sys.stdout, ensure_ascii=False)
+        sys.stdout.write('\n')
+    else:
+        sys.stdout.writelines(version + '\n' for version in versions)
+
+    return 0
+
+
+'''
+    Function: get_plan_csv_formatter
+    Purpose: Returns a function that serializes an UpgradePlan as one CSV line.
+'''
+
+
+def get_plan_csv_formatter():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    def format_csv(plan):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([plan.site, plan.version, plan.matched_version or '', plan.target_version or '',
+                         '' if plan.upgrade_required is None else str(plan.upgrade_required).lower(),
+                         ';'.join(plan.incompatible_devices), CSV_NOTES_SEPARATOR.join(plan.prerequisites),
+                         plan.error or ''])
+        return buffer.getvalue()
+
+    return format_csv
+
+
+'''
+    Function: run_plan
+    Purpose: The plan command.  Reads a site inventory and streams the minimal Eagle upgrade of every site
+             that makes all of its devices compatible, with the footnote prerequisites of the target version.
+'''
+
+
+def run_plan(args):
+    from upgrade_planner import UpgradePlanner, read_inventory_sites
+
+    output_format = args.output_format or detect_format(args.output, OUTPUT_FORMATS, 'jsonl')
+    planner = UpgradePlanner(load_workbook_matrix(args))
+    columns = (args.site_column, args.version_column, args.devices_column)
+
+    if output_format == 'csv':
+        format_plan = get_plan_csv_formatter()
+        header = ','.join(PLAN_CSV_FIELDS) + '\n'
+    else:
+        def format_plan(plan):
+            return json.dumps(plan._asdict(), ensure_ascii=False) + '\n'
+        header = ''
+
+    with open_input(args.inventory) as input_file, open_output(args.output) as output_file:
+        output_file.write(header)
+        output_file.writelines(format_plan(plan)
+                               for plan in planner.plan_many(read_inventory_sites(input_file, columns)))
+
+    return 0
+
+
+'''
+    Function: run_diff
+    Purpose: The diff command.  Compares two revisions of the workbook and writes a readable report or JSON.
+             Like diff(1) the exit code is 0 when the revisions are identical and 1 when they differ.
+'''
+
+
+def run_diff(args):
+    from revision_diff import diff_workbooks, format_report
+
+    cache = None if args.no_cache else MatrixCache(compatibility_matrix.DEFAULT_CACHE_DIRECTORY)
+    diff = diff_workbooks(args.old, args.new, cache)
+
+    with open_output(args.output) as output_file:
+        if args.json:
+            json.dump(diff, output_file, ensure_ascii=False, indent=2)
+            output_file.write('\n')
+        else:
+            output_file.write(format_report(diff))
+
+    return 0 if diff['summary']['identical'] else 1
+
+
+'''
+    Function: run_store
+    Purpose: The store command.  Imports workbook revisions into the SQLite revision store, lists them,
+             or answers a lookup against the current revision or the one in force at an earlier date.
+'''
+
+
+def run_store(args):
+    from matrix_store import MatrixStore, parse_timestamp
+
+    # Reject unreadable dates before opening the store
+    for option, value in (('--effective', getattr(args, 'effective', None)), ('--as-of', getattr(args, 'as_of', None))):
+        if value is not None:
+            try:
+                parse_timestamp(value)
+            except ValueError:
+                print(f'Invalid {option} date: {value!r}, expected i.e. 2026-03-15 or 2026-03-15T08:30:00',
+                      file=sys.stderr)
+                return 2
+
+    with MatrixStore(args.store) as store:
+        if args.action == 'import':
+            for path in args.workbooks:
+                revision_id, imported = store.import_workbook(path, args.effective)
+                state = 'imported' if imported else 'already imported'
+                print(f'{path}: revision {revision_id} {state}', file=sys.stderr)
+
+        elif args.action == 'revisions':
+            for revision in store.get_revisions():
+                print(json.dumps(revision._asdict(), ensure_ascii=False))
+
+        else:
+            try:
+                result = store.query(args.version, args.device, args.as_of, args.revision)
+            except KeyError as error:
+                print(f'Not found: {error.args[0]}', file=sys.stderr)
+                return 2
+            print(json.dumps(result._asdict(), ensure_ascii=False))
+
+    return 0
+
+
+'''
+    Function: run_compile
+    Purpose: The compile command.  Writes the matrix as a binary matrix file that query workers map
+             read-only with --matrix-file, so they share one copy and open it without parsing.
+'''
+
+
+def run_compile(args):
+    from matrix_file import write_matrix_file
+
+    write_matrix_file(load_workbook_matrix(args), args.output)
+    print(f'Matrix file written to {args.output}', file=sys.stderr)
+    return 0
+
+
+'''
+    Function: run_export
+    Purpose: The export command.  Writes the matrix in long form plus the footnote table as Parquet
+             or Arrow files for analytics, see matrix_export.py.
+'''
+
+
+def run_export(args):
+    from matrix_export import export_matrix
+
+    paths = export_matrix(load_workbook_matrix(args), args.output, args.format, args.sort_by, args.row_group_size)
+    for path in paths.values():
+        print(f'Written {path}', file=sys.stderr)
+    return 0
+
+
+'''
+    Function: run_gui
+    Purpose: Start the tkinter application.  tkinter and customtkinter are only imported here,
+             so the other commands run on machines without them.
+'''
+
+
+def run_gui(args):
+    import app_gui
+
+    # Create instance of tkinter application
+    app = app_gui.App(watch_workbook=args.watch)
+
+    # Start application
+    app.mainloop()
+    return 0
+
+
+'''
+    Function: dump_metrics
+    Purpose: Append the metrics snapshot as one JSON line to a file, '-' means stderr.
+'''
+
+
+def dump_metrics(path):
+    if path == '-':
+        return METRICS.dump(sys.stderr)
+
+    with open(path, 'a', encoding='utf-8') as metrics_file:
+        return METRICS.dump(metrics_file)
+
+
+'''
+    Function: add_workbook_arguments
+    Purpose: Add the options shared by all commands that read the workbook.
+'''
+
+
+def add_workbook_arguments(parser):
+    parser.add_argument('--workbook', default=compatibility_matrix.DEFAULT_WORKBOOK_PATH,
+                        help='compatibility matrix Excel file (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always parse the workbook instead of using the compiled cache')
+    parser.add_argument('--matrix-file', help='memory-map a binary matrix file written by the compile command '
+                                              'instead of reading the workbook')
+
+
+'''
+    Function: build_parser
+    Purpose: Returns the command line parser.  Without a command the GUI is started.
+'''
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py', description='Eagle Compatibility Master')
+    parser.add_argument('--watch', action='store_true',
+                        help='GUI: reload the Excel sheet automatically when a new revision is saved')
+    parser.add_argument('--metrics', nargs='?', const='-', metavar='FILE',
+                        help='record counters and latency histograms and append them as a JSON line to FILE '
+                             'on exit (default: stderr)')
+    parser.add_argument('--profile', metavar='FILE', help='write cProfile statistics of the session to FILE')
+    parser.set_defaults(handler=run_gui)
+
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    query = commands.add_parser('query', help='answer (Eagle version, device) pairs in bulk')
+    query.add_argument('input', nargs='?', default='-',
+                       help='CSV or JSON lines file with version/device pairs (default: stdin)')
+    query.add_argument('--input-format', choices=INPUT_FORMATS,
+                       help='input format (default: from the file extension, csv for stdin)')
+    query.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    query.add_argument('--output-format', choices=OUTPUT_FORMATS,
+                       help='output format (default: from the file extension, jsonl for stdout)')
+    query.add_argument('--resolve', choices=RESOLVE_MODES, default=RESOLVE_EXACT,
+                       help="match raw Eagle versions: 'exact' accepts unlisted spellings and versions inside a "
+                            "listed range, 'floor' also falls back to the nearest lower listed version "
+                            "(default: %(default)s)")
+    add_workbook_arguments(query)
+    query.set_defaults(handler=run_query)
+
+    serve = commands.add_parser('serve', help='answer lookups over HTTP on a local port')
+    serve.add_argument('--host', default='127.0.0.1', help='address to listen on (default: %(default)s)')
+    serve.add_argument('--port', type=int, default=8080, help='port to listen on (default: %(default)s)')
+    add_workbook_arguments(serve)
+    serve.set_defaults(handler=run_serve)
+
+    audit = commands.add_parser('audit', help='audit a fleet inventory of sites against the matrix')
+    audit.add_argument('inventory', help='CSV or Parquet inventory with one row per site')
+    audit.add_argument('-o', '--output', default='-', help='per-site CSV report (default: stdout)')
+    audit.add_argument('--summary', default='-', help='JSON summary counts (default: stderr)')
+    audit.add_argument('--chunk-size', type=int, default=100000, help='inventory rows per chunk (default: %(default)s)')
+    audit.add_argument('--site-column', default='site', help='site column (default: %(default)s)')
+    audit.add_argument('--version-column', default='eagle_version', help='Eagle version column (default: %(default)s)')
+    audit.add_argument('--devices-column', default='devices',
+                       help="column listing the installed devices separated by ';' (default: %(default)s)")
+    add_workbook_arguments(audit)
+    audit.set_defaults(handler=run_audit)
+
+    prerequisites = commands.add_parser('prerequisites',
+                                        help='check peripheral firmware versions of a fleet against the footnotes')
+    prerequisites.add_argument('inventory', help='CSV or Parquet inventory with one row per site and one firmware '
+                                                 "version column per component i.e. 'MICT', 'Radius-7 BB'")
+    prerequisites.add_argument('-o', '--output', default='-', help='per-site CSV report (default: stdout)')
+    prerequisites.add_argument('--summary', default='-', help='JSON summary counts (default: stderr)')
+    prerequisites.add_argument('--chunk-size', type=int, default=100000,
+                               help='inventory rows per chunk (default: %(default)s)')
+    prerequisites.add_argument('--site-column', default='site', help='site column (default: %(default)s)')
+    prerequisites.add_argument('--version-column', default='eagle_version',
+                               help='Eagle version column (default: %(default)s)')
+    prerequisites.add_argument('--devices-column', default='devices',
+                               help="column listing the installed devices separated by ';' (default: %(default)s)")
+    add_workbook_arguments(prerequisites)
+    prerequisites.set_defaults(handler=run_prerequisites)
+
+    select = commands.add_parser('select', help='list the Eagle versions compatible with a set of devices')
+    select.add_argument('--all', dest='all_devices', nargs='+', default=[], metavar='DEVICE',
+                        help='devices that must all be compatible')
+    select.add_argument('--any', dest='any_devices', nargs='+', default=[], metavar='DEVICE',
+                        help='devices of which at least one must be compatible')
+    select.add_argument('--none', dest='none_devices', nargs='+', default=[], metavar='DEVICE',
+                        help='devices that must not be compatible')
+    select.add_argument('--json', action='store_true', help='print the versions as a JSON list')
+    add_workbook_arguments(select)
+    select.set_defaults(handler=run_select)
+
+    plan = commands.add_parser('plan', help='find the minimal Eagle upgrade that supports every device of each site')
+    plan.add_argument('inventory', nargs='?', default='-',
+                      help='CSV inventory with one row per site (default: stdin)')
+    plan.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    plan.add_argument('--output-format', choices=OUTPUT_FORMATS,
+                      help='output format (default: from the file extension, jsonl for stdout)')
+    plan.add_argument('--site-column', default='site', help='site column (default: %(default)s)')
+    plan.add_argument('--version-column', default='eagle_version', help='Eagle version column (default: %(default)s)')
+    plan.add_argument('--devices-column', default='devices',
+                      help="column listing the installed devices separated by ';' (default: %(default)s)")
+    add_workbook_arguments(plan)
+    plan.set_defaults(handler=run_plan)
+
+    diff = commands.add_parser('diff', help='report what changed between two revisions of the workbook')
+    diff.add_argument('old', help='Excel file of the older revision')
+    diff.add_argument('new', help='Excel file of the newer revision')
+    diff.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    diff.add_argument('--json', action='store_true', help='write the differences as JSON instead of a report')
+    diff.add_argument('--no-cache', action='store_true',
+                      help='always parse the workbooks instead of using the compiled cache')
+    diff.set_defaults(handler=run_diff)
+
+    compile_matrix = commands.add_parser('compile', help='write the matrix as a memory-mappable binary file')
+    compile_matrix.add_argument('-o', '--output', required=True, help='binary matrix file to write')
+    add_workbook_arguments(compile_matrix)
+    compile_matrix.set_defaults(handler=run_compile)
+
+    export = commands.add_parser('export', help='write the matrix in long form as Parquet or Arrow for analytics')
+    export.add_argument('-o', '--output', required=True, help='export directory, gets cells and footnotes tables')
+    export.add_argument('--format', choices=('parquet', 'arrow'), default='parquet',
+                        help='file format (default: %(default)s)')
+    export.add_argument('--sort-by', choices=('version', 'device'), default='version',
+                        help='leading sort column, filters on it skip row groups (default: %(default)s)')
+    export.add_argument('--row-group-size', type=int, default=65536, help='rows per row group (default: %(default)s)')
+    add_workbook_arguments(export)
+    export.set_defaults(handler=run_export)
+
+    store = commands.add_parser('store', help='keep every workbook revision in a SQLite store and query its history')
+    store.add_argument('--store', default=compatibility_matrix.DEFAULT_STORE_PATH, help='SQLite store file (default: %(default)s)')
+    store_actions = store.add_subparsers(dest='action', metavar='action', required=True)
+    store_import = store_actions.add_parser('import', help='import workbook revisions, skipping known ones')
+    store_import.add_argument('workbooks', nargs='+', help='Excel files to import')
+    store_import.add_argument('--effective', metavar='DATE',
+                              help='when the revision came into force (default: the file modification time)')
+    store_actions.add_parser('revisions', help='list the imported revisions as JSON lines')
+    store_query = store_actions.add_parser('query', help='look up a version/device pair in the store')
+    store_query.add_argument('version', help="Eagle version i.e. 'V1748'")
+    store_query.add_argument('device', help="software/device i.e. 'Sketch'")
+    store_query.add_argument('--as-of', metavar='DATE', help='use the revision in force at DATE (default: the latest)')
+    store_query.add_argument('--revision', type=int, help='use this revision ID')
+    store.set_defaults(handler=run_store)
+
+    return parser
+
+
+'''
+    Function: main
+    Purpose: Command line entry point, returns the exit code.
+'''
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.metrics is not None:
+        METRICS.enable()
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        return args.handler(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f'Profile written to {args.profile} (python -m pstats {args.profile})', file=sys.stderr)
+        if args.metrics is not None:
+            dump_metrics(args.metrics)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
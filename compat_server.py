@@ -0,0 +1,357 @@
+import asyncio
+import hashlib
+import json
+import sys
+import traceback
+import urllib.parse
+from collections import namedtuple
+
+from compat_cli import RESOLVE_MODES, get_matched_version, get_memoized_result
+from instrumentation import METRICS, timed
+from version_index import RESOLVE_EXACT
+
+# Largest request body accepted by the batch endpoint
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Most header lines accepted per request
+MAX_HEADER_LINES = 100
+
+# Reason phrases of the status codes the server sends
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# Serialized response - body is the encoded JSON and etag its quoted content hash
+Response = namedtuple('Response', ['status', 'body', 'etag'])
+
+
+class HttpError(Exception):
+    '''
+        Raised while handling a request to answer with an error status.
+    '''
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class CompatibilityServer:
+    '''
+        Method: __init__
+        Purpose: Create a local HTTP query service for a loaded matrix.
+
+                 GET  /versions                               Eagle versions and devices
+                 GET  /compatibility?version=V2124&device=MICT single lookup, raw versions like V2120 or V1150
+                                                              resolve to the listed version (&resolve=floor for
+                                                              the nearest lower listed version)
+                 GET  /versions/<version>                     full row of an Eagle version (raw versions resolve)
+                 POST /compatibility                          batch lookup, body [{"version": ..., "device": ...}]
+                 GET  /select?all=SafetyNet&all=MICT&any=...&none=...
+                                                              Eagle versions compatible with all/any/none of
+                                                              the listed devices
+                 GET  /health                                 liveness check
+                 GET  /metrics                                counters and latency histograms (with --metrics)
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+    '''
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+        # Serialized responses of the GET endpoints, built once per route and reused with their ETag.
+        # Only queries naming a listed version and device are stored, so the memo is bounded by the
+        # matrix whatever raw versions clients send; errors are never memoized.
+        self.responses = {}
+
+        # Result dictionaries keyed by (matched version, device), reused by the batch endpoint
+        self.results = {}
+
+        # Number of requests answered
+        self.request_count = 0
+
+    '''
+        Method: make_response
+        Purpose: Serialize a payload as JSON and compute its ETag.
+    '''
+
+    def make_response(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        return Response(status, body, etag)
+
+    '''
+        Method: get_result
+        Purpose: Returns the result dictionary of a pair, memoized by its matched version, see
+                 compat_cli.get_memoized_result.
+    '''
+
+    def get_result(self, version, device, resolve=RESOLVE_EXACT):
+        return get_memoized_result(self.matrix, self.results, version, device, resolve)
+
+    '''
+        Method: precompute
+        Purpose: Serialize every single lookup and row response up front so no request has to build one.
+                 Only worth it for small matrices, larger ones are filled lazily on first use.
+    '''
+
+    def precompute(self):
+        self.handle_versions()
+        for version in self.matrix.versions:
+            self.handle_row(version)
+            for device in self.matrix.devices:
+                self.handle_lookup(version, device)
+
+    '''
+        Method: handle_versions
+        Purpose: GET /versions
+    '''
+
+    def handle_versions(self):
+        key = ('versions',)
+        response = self.responses.get(key)
+
+        if response is None:
+            response = self.make_response({'versions': self.matrix.versions, 'devices': self.matrix.devices})
+            self.responses[key] = response
+
+        return response
+
+    '''
+        Method: handle_lookup
+        Purpose: GET /compatibility?version=...&device=...
+    '''
+
+    def handle_lookup(self, version, device, resolve=RESOLVE_EXACT):
+        key = ('lookup', version, device, resolve)
+        response = self.responses.get(key)
+
+        if response is None:
+            if resolve not in RESOLVE_MODES:
+                raise HttpError(400, f'resolve must be one of {", ".join(RESOLVE_MODES)}')
+            result = self.get_result(version, device, resolve)
+            if result['error'] is not None:
+                raise HttpError(404, result['error'])
+            response = self.make_response(result)
+
+            # Raw versions carry their own spelling in the body, only listed versions are stored
+            if version == result['matched_version']:
+                self.responses[key] = response
+
+        return response
+
+    '''
+        Method: handle_row
+        Purpose: GET /versions/<version>
+    '''
+
+    def handle_row(self, version):
+        # Resolve first, every spelling of a version shares the response of the listed version
+        matched_version = get_matched_version(self.matrix, version)
+        if matched_version is None:
+            raise HttpError(404, 'Unknown Eagle version')
+
+        key = ('row', matched_version)
+        response = self.responses.get(key)
+
+        if response is None:
+            response = self.make_response({'version': matched_version,
+                                           'results': [self.get_result(matched_version, device)
+                                                       for device in self.matrix.devices]})
+            self.responses[key] = response
+
+        return response
+
+    '''
+        Method: handle_select
+        Purpose: GET /select, device set queries answered from the bitset index of the matrix.
+                 Every parameter may be repeated i.e. ?all=SafetyNet&all=MICT.
+    '''
+
+    def handle_select(self, all_devices, any_devices, none_devices):
+        try:
+            versions = self.matrix.find_versions(all_devices, any_devices, none_devices)
+        except KeyError as error:
+            raise HttpError(404, f'Unknown device: {error.args[0]}')
+
+        return self.make_response({'all': all_devices, 'any': any_devices, 'none': none_devices,
+                                   'versions': versions})
+
+    '''
+        Method: handle_batch
+        Purpose: POST /compatibility, the body is a JSON list of {"version": ..., "device": ...} objects
+                 (or {"pairs": [...], "resolve": ...}).  Unknown pairs are answered with an error entry instead
+                 of failing the batch.
+
+                - body: request body.
+                - resolve: resolve mode of the query string, a "resolve" key of the body takes precedence.
+    '''
+
+    def handle_batch(self, body, resolve=RESOLVE_EXACT):
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise HttpError(400, 'Request body is not valid JSON')
+
+        pairs = request.get('pairs') if isinstance(request, dict) else request
+        if not isinstance(pairs, list) or not all(isinstance(pair, dict) for pair in pairs):
+            raise HttpError(400, 'Expected a list of {"version": ..., "device": ...} objects')
+
+        if isinstance(request, dict):
+            resolve = request.get('resolve', resolve)
+        if resolve not in RESOLVE_MODES:
+            raise HttpError(400, f'resolve must be one of {", ".join(RESOLVE_MODES)}')
+
+        return self.make_response([self.get_result(str(pair.get('version', '')), str(pair.get('device', '')), resolve)
+                                   for pair in pairs])
+
+    '''
+        Method: dispatch
+        Purpose: Route a request to its handler and return the Response.
+    '''
+
+    @timed('server.dispatch')
+    def dispatch(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        path = urllib.parse.unquote(url.path)
+
+        if path == '/compatibility':
+            if method not in ('GET', 'POST'):
+                raise HttpError(405, 'Use GET or POST')
+            query = urllib.parse.parse_qs(url.query)
+            if method == 'POST':
+                return self.handle_batch(body, query.get('resolve', [RESOLVE_EXACT])[0])
+            if 'version' not in query or 'device' not in query:
+                raise HttpError(400, 'Both version and device are required')
+            return self.handle_lookup(query['version'][0], query['device'][0],
+                                      query.get('resolve', [RESOLVE_EXACT])[0])
+
+        if method != 'GET':
+            raise HttpError(405, 'Use GET')
+
+        if path == '/versions':
+            return self.handle_versions()
+        if path.startswith('/versions/'):
+            return self.handle_row(path[len('/versions/'):])
+        if path == '/select':
+            query = urllib.parse.parse_qs(url.query)
+            return self.handle_select(query.get('all', []), query.get('any', []), query.get('none', []))
+        if path == '/health':
+            return self.make_response({'status': 'ok', 'requests': self.request_count})
+        if path == '/metrics':
+            if not METRICS.enabled:
+                raise HttpError(404, 'Metrics are disabled, start the server with --metrics')
+            return self.make_response(METRICS.snapshot())
+
+        raise HttpError(404, 'Unknown endpoint')
+
+    '''
+        Method: read_request
+        Purpose: Read one HTTP/1.1 request from the stream.  Returns None when the client closed the connection.
+    '''
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, 'Malformed request line')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADER_LINES:
+                raise HttpError(400, 'Too many headers')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'Invalid Content-Length')
+        if length < 0:
+            raise HttpError(400, 'Invalid Content-Length')
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, 'Request body is too large')
+
+        body = await reader.readexactly(length) if length else b''
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+        return method, target, headers, body, keep_alive
+
+    '''
+        Method: write_response
+        Purpose: Write a Response, answering 304 Not Modified when the client already has the same ETag.
+    '''
+
+    def write_response(self, writer, response, if_none_match, keep_alive):
+        status = response.status
+        body = response.body
+
+        if status == 200 and if_none_match == response.etag:
+            status = 304
+            body = b''
+
+        head = (f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'ETag: {response.etag}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+
+        writer.write(head.encode('latin-1') + body)
+
+    '''
+        Method: handle_connection
+        Purpose: Serve the requests of one keep-alive connection.
+    '''
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as error:
+                    self.write_response(writer, self.make_response({'error': error.message}, error.status), None, False)
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                if request is None:
+                    break
+
+                method, target, headers, body, keep_alive = request
+                self.request_count += 1
+
+                try:
+                    response = self.dispatch(method, target, body)
+                except HttpError as error:
+                    response = self.make_response({'error': error.message}, error.status)
+                except Exception:
+                    # A bug in a handler answers this request with 500 instead of dropping the connection
+                    traceback.print_exc(file=sys.stderr)
+                    response = self.make_response({'error': 'Internal server error'}, 500)
+
+                self.write_response(writer, response, headers.get('if-none-match'), keep_alive)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    '''
+        Method: serve
+        Purpose: Listen on host:port until cancelled.
+    '''
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ', '.join(f'{socket.getsockname()[0]}:{socket.getsockname()[1]}' for socket in server.sockets)
+        print(f'Serving {len(self.matrix.versions)} Eagle versions x {len(self.matrix.devices)} devices on {addresses}')
+
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,658 @@
+import os
+import re
+from array import array
+from collections import namedtuple
+
+from instrumentation import METRICS, timed
+from version_index import RESOLVE_EXACT, VersionIndex
+from workbook_reader import MatrixTableReader
+
+# Base file path
+PATH = os.path.dirname(os.path.realpath(__file__))
+
+# Default Excel file path and compiled cache directory - default path is current project path
+DEFAULT_WORKBOOK_PATH = PATH + "/Compatibility_Matrix_LST-1592.xlsx"
+DEFAULT_CACHE_DIRECTORY = PATH + "/.matrix_cache"
+
+# Default SQLite file of the workbook revision store, see matrix_store.py
+DEFAULT_STORE_PATH = PATH + "/matrix_store.sqlite"
+
+# Status codes stored in the compact status array
+STATUS_UNKNOWN = -1
+STATUS_NO = 0
+STATUS_YES = 1
+
+# Text displayed for each status code
+STATUS_LABELS = {STATUS_YES: 'Yes', STATUS_NO: 'No', STATUS_UNKNOWN: ''}
+
+# Footnote set ID of cells without a footnote, the footnote set table always starts with the empty set
+NO_FOOTNOTE = 0
+
+# Find pattern which contains digits enclosed in brackets example [2] or [10]
+FOOTNOTE_PATTERN = re.compile(r'\[(\d+)\]')
+
+# Dictionary that contains compatible exceptions, used when the Excel sheet has no notes section.
+COMPATIBILITY_EXCEPTIONS_DICTIONARY = {'[1]': 'Requires minimum SafetyNet V4400',
+                                       '[2]': 'Requires minimum SafetyNet V5008',
+                                       '[3]': 'Requires Sedline V1203 to support all features',
+                                       '[4]': 'Requires minimum MICT V1049',
+                                       '[5]': 'Requires minimum Radius-7 IB V1012 for all features supported',
+                                       '[6]': 'Minimum Eagle version to support Falcon-pro.',
+                                       '[7]': 'Requires minimum MICT V1109',
+                                       '[8]': 'Requires minimum Radius-7 V1020',
+                                       '[9]': 'Requires minimum Trace V2026',
+                                       '[10]': 'Requires minimum IB-Pro V205X, requires minimum Radius-7 BB V2015 to support all features',
+                                       '[11]': 'Requires minimum SedLine V2320 for all Eagle enhancements to be available',
+                                       '[12]': 'Added support for Safety Net V5027-5085',
+                                       '[13]': 'Minimum eagle version to support PSN V5647',
+                                       '[14]': 'Requires minimum IB-Pro V206x and minimum IB V103x with minimum BBV202x to support all features',
+                                       '[15]': 'Minimum Eagle version to support PSN V5672',
+                                       '[16]': 'Requires minimum Trace V2.0.2.8',
+                                       '[17]': 'Minimum Eagle version to support Iris Gateway V1613',
+                                       '[18]': 'Minimum Eagle version to support PSN V5675',
+                                       '[19]': 'Requires minimum Trace V3025',
+                                       '[20]': 'Minimum Eagle version to support VSM V1020',
+                                       '[21]': 'V2120 is built from V2106',
+                                       '[22]': 'Requires minimum MICT V1248 to support all features',
+                                       '[23]': 'Requires minimum MICT V1252 to support all features',
+                                       '[24]': 'Requires minimum MICT V1253 to support all features',
+                                       '[25]': 'Requires minimum Trace V3025',
+                                       '[26]': 'Requires minimum Centroid V2101'}
+
+# Result of a single compatibility query
+QueryResult = namedtuple('QueryResult', ['version', 'device', 'status', 'compatible', 'footnote_ids'])
+
+
+class MatrixDiff(namedtuple('MatrixDiff', ['added_versions', 'removed_versions', 'changed_versions',
+                                           'versions_changed', 'devices_changed', 'footnotes_changed',
+                                           'matrix'])):
+    '''
+        Difference between two matrices, produced by CompatibilityMatrix.diff.
+
+            - added_versions / removed_versions: Eagle versions only found in the new / old matrix.
+            - changed_versions: Eagle versions found in both matrices whose row changed.
+            - versions_changed / devices_changed: the list (or order) of versions / devices changed.
+            - footnotes_changed: the footnote text or the combinations of footnotes used by the cells changed.
+            - matrix: the new matrix.
+    '''
+
+    __slots__ = ()
+
+    @property
+    def requires_swap(self):
+        # Rows can only be patched in place when the shape of the matrix is unchanged
+        return self.versions_changed or self.devices_changed or self.footnotes_changed
+
+    @property
+    def is_empty(self):
+        return not self.requires_swap and not self.changed_versions
+
+
+'''
+    Function: parse_status
+    Purpose: Convert a cell value i.e. 'Yes', 'No' or 'Yes[4]' to its status code.
+
+            - value: contains the cell value read from the Excel sheet.
+'''
+
+
+def parse_status(value):
+    if not isinstance(value, str):
+        return STATUS_UNKNOWN
+
+    # Only look at the text in front of the footnote marker i.e. 'Yes' for 'Yes[4]'
+    text = FOOTNOTE_PATTERN.sub('', value).strip().lower()
+
+    if text == 'yes':
+        return STATUS_YES
+    elif text == 'no':
+        return STATUS_NO
+    else:
+        return STATUS_UNKNOWN
+
+
+'''
+    Function: parse_footnote_ids
+    Purpose: Returns every footnote ID of a cell or version i.e. (4,) for 'Yes[4]', (1, 4) for 'Yes[1][4]'
+             and () if there is none.
+
+            - value: contains the cell value or Eagle version read from the Excel sheet.
+'''
+
+
+def parse_footnote_ids(value):
+    if not isinstance(value, str):
+        return ()
+
+    return tuple(int(footnote_id) for footnote_id in FOOTNOTE_PATTERN.findall(value))
+
+
+class CompatibilityMatrix:
+    '''
+        Method: __init__
+        Purpose: Create a matrix from its compact arrays.  The status and footnote arrays are stored
+                 row major, the cell of version row r and device column c is found at r * device_count + c.
+                 Footnotes are dictionary encoded: a cell holds the ID of its set of footnote IDs in
+                 footnote_sets, so cells with several footnotes i.e. 'Yes[1][4]' keep all of them.
+
+                - versions: Eagle versions i.e. ['V1002 – V1303', 'V1412', ...]
+                - devices: software/devices i.e. ['SafetyNet', 'MICT', ...]
+                - status: array('b') of status codes, one per cell.
+                - footnotes: array('H') of footnote set IDs, one per cell.
+                - version_footnotes: array('H') of footnote set IDs, one per Eagle version.
+                - footnote_sets: sorted list of footnote ID tuples, starting with the empty tuple.
+                - exceptions: dictionary of footnote markers i.e. '[4]' to footnote text.
+    '''
+
+    def __init__(self, versions, devices, status, footnotes, version_footnotes, footnote_sets=((),),
+                 exceptions=None):
+        self.versions = list(versions)
+        self.devices = list(devices)
+        self.status = status
+        self.footnotes = footnotes
+        self.version_footnotes = version_footnotes
+        self.footnote_sets = [tuple(footnote_ids) for footnote_ids in footnote_sets]
+
+        # Marker text of every footnote set i.e. '[1][4]', used to rebuild the Excel cell text
+        self.footnote_labels = [''.join(f'[{footnote_id}]' for footnote_id in footnote_ids)
+                                for footnote_ids in self.footnote_sets]
+
+        # Footnote text of every footnote set, see set_exceptions
+        self.set_exceptions(exceptions)
+
+        self.version_count = len(self.versions)
+        self.device_count = len(self.devices)
+
+        if len(self.status) != self.version_count * self.device_count or len(self.footnotes) != len(self.status):
+            raise ValueError('Status and footnote arrays must hold one entry per version and device')
+
+        # Precomputed version -> row and device -> column indexes
+        self.version_index = {version: row for row, version in enumerate(self.versions)}
+        self.device_index = {device: column for column, device in enumerate(self.devices)}
+
+        # Numerically sorted version index, built on first use by get_sorted_version_index
+        self.sorted_version_index = None
+
+        # Bitset index for device set queries, built on first use by get_bitset_index
+        self.bitset_index = None
+
+        # Bumped whenever apply_diff patches rows in place, so caches of answers can tell revisions apart
+        self.revision = 0
+
+    '''
+        Method: from_rows
+        Purpose: Build a matrix from the rows of the Excel table.
+
+                - versions: Eagle versions, one per row.
+                - devices: software/devices, one per column.
+                - rows: cell values i.e. [['Yes[1]', 'Yes', 'No', ...], ...]
+                - exceptions: dictionary of footnote markers to footnote text.
+    '''
+
+    @classmethod
+    def from_rows(cls, versions, devices, rows, exceptions=None):
+        return cls.from_records(devices, zip(versions, rows), exceptions)
+
+    '''
+        Method: from_records
+        Purpose: Build a matrix from a stream of (version, values) records.  The records are consumed
+                 one at a time so only the compact arrays are kept in memory.  Every distinct cell text is
+                 parsed once; the footnote markers are extracted here so queries never run a regex.
+
+                - devices: software/devices, one per column.
+                - records: iterable of (version, values) i.e. ('V1412', ('Yes', 'Yes', 'No', ...))
+                - exceptions: dictionary of footnote markers to footnote text.
+    '''
+
+    @classmethod
+    @timed('load.read_table')
+    def from_records(cls, devices, records, exceptions=None):
+        devices = list(devices)
+        versions = []
+        status = array('b')
+        footnotes = array('H')
+        version_footnotes = array('H')
+
+        # Footnote set -> ID in order of appearance, and parsed (status, footnote set ID) of every distinct cell text
+        footnote_set_ids = {(): NO_FOOTNOTE}
+        parsed_cells = {}
+
+        for version, values in records:
+            values = list(values)
+            if len(values) != len(devices):
+                raise ValueError(f'Expected {len(devices)} cells for {version}, found {len(values)}')
+
+            versions.append(version)
+            version_footnotes.append(footnote_set_ids.setdefault(parse_footnote_ids(version), len(footnote_set_ids)))
+
+            for value in values:
+                parsed = parsed_cells.get(value)
+                if parsed is None:
+                    parsed = (parse_status(value),
+                              footnote_set_ids.setdefault(parse_footnote_ids(value), len(footnote_set_ids)))
+                    parsed_cells[value] = parsed
+                status.append(parsed[0])
+                footnotes.append(parsed[1])
+
+        # Number the footnote sets in sorted order, so two revisions using the same sets share their IDs
+        footnote_sets = sorted(footnote_set_ids)
+        sorted_ids = {footnote_ids: set_id for set_id, footnote_ids in enumerate(footnote_sets)}
+        translation = [0] * len(footnote_sets)
+        for footnote_ids, set_id in footnote_set_ids.items():
+            translation[set_id] = sorted_ids[footnote_ids]
+
+        if translation != list(range(len(translation))):
+            footnotes = array('H', (translation[set_id] for set_id in footnotes))
+            version_footnotes = array('H', (translation[set_id] for set_id in version_footnotes))
+
+        return cls(versions, devices, status, footnotes, version_footnotes, footnote_sets, exceptions)
+
+    '''
+        Method: from_payload
+        Purpose: Build a matrix from the payload produced by to_payload i.e. a compiled cache entry.
+
+                - payload: dictionary of versions, devices, footnote sets and the raw bytes of the arrays.
+    '''
+
+    @classmethod
+    @timed('load.from_payload')
+    def from_payload(cls, payload):
+        status = array('b')
+        status.frombytes(payload['status'])
+        footnotes = array('H')
+        footnotes.frombytes(payload['footnotes'])
+        version_footnotes = array('H')
+        version_footnotes.frombytes(payload['version_footnotes'])
+
+        return cls(payload['versions'], payload['devices'], status, footnotes, version_footnotes,
+                   payload['footnote_sets'], payload['exceptions'])
+
+    '''
+        Method: to_payload
+        Purpose: Returns a plain dictionary of the matrix that can be pickled and loaded without parsing.
+    '''
+
+    def to_payload(self):
+        return {'versions': self.versions,
+                'devices': self.devices,
+                'status': self.status.tobytes(),
+                'footnotes': self.footnotes.tobytes(),
+                'version_footnotes': self.version_footnotes.tobytes(),
+                'footnote_sets': self.footnote_sets,
+                'exceptions': dict(self.exceptions)}
+
+    '''
+        Method: set_exceptions
+        Purpose: Set the footnote text and precompute the notes of every footnote set.
+
+                - exceptions: dictionary of footnote markers i.e. '[4]' to footnote text,
+                              the built-in COMPATIBILITY_EXCEPTIONS_DICTIONARY when empty.
+    '''
+
+    def set_exceptions(self, exceptions):
+        self.exceptions = dict(exceptions) if exceptions else COMPATIBILITY_EXCEPTIONS_DICTIONARY
+
+        # Structured rules of the footnote text, compiled on first use by get_prerequisite_rules
+        self.prerequisite_rules = None
+
+        self.footnote_notes = []
+        for footnote_ids in self.footnote_sets:
+            texts = [self.get_footnote_text(footnote_id) for footnote_id in footnote_ids]
+            self.footnote_notes.append([text for text in texts if text])
+
+    '''
+        Method: get_prerequisite_rules
+        Purpose: Returns (rules, notes_without_rules), the footnote text compiled into
+                 prerequisite_rules.PrerequisiteRule constraints once, see compile_rules.
+    '''
+
+    def get_prerequisite_rules(self):
+        if self.prerequisite_rules is None:
+            # Only imported by the consumers of the rules, keeping the core import slim
+            from prerequisite_rules import compile_rules
+
+            self.prerequisite_rules = compile_rules(self.exceptions)
+        return self.prerequisite_rules
+
+    '''
+        Method: get_sorted_version_index
+        Purpose: Returns the numerically sorted VersionIndex of the Eagle versions, built on first use.
+    '''
+
+    def get_sorted_version_index(self):
+        if self.sorted_version_index is None:
+            self.sorted_version_index = VersionIndex(self.versions)
+        return self.sorted_version_index
+
+    '''
+        Method: get_bitset_index
+        Purpose: Returns the BitsetIndex of the compatible cells, built on first use.
+    '''
+
+    def get_bitset_index(self):
+        if self.bitset_index is None:
+            # Imported here because bitset_index depends on this module
+            from bitset_index import BitsetIndex
+
+            self.bitset_index = BitsetIndex(self)
+        return self.bitset_index
+
+    '''
+        Method: find_versions
+        Purpose: Returns the Eagle versions compatible with all of all_devices, at least one of any_devices
+                 and none of none_devices i.e. find_versions(all_devices=['SafetyNet', 'MICT', 'SedLine']).
+                 Raises KeyError for unknown devices.
+    '''
+
+    def find_versions(self, all_devices=(), any_devices=(), none_devices=()):
+        return self.get_bitset_index().find_versions(all_devices, any_devices, none_devices)
+
+    '''
+        Method: resolve_version
+        Purpose: Returns the listed Eagle version a raw version resolves to, or None.
+                 i.e. 'V2120' -> 'V2120[3]', 'V1150' -> 'V1002 – V1303', see VersionIndex.resolve.
+
+                - version: Eagle version label, raw version string or build number.
+                - mode: version_index.RESOLVE_EXACT or RESOLVE_FLOOR (nearest lower listed version).
+    '''
+
+    def resolve_version(self, version, mode=RESOLVE_EXACT):
+        if version in self.version_index:
+            return version
+        return self.get_sorted_version_index().resolve(version, mode)
+
+    '''
+        Method: get_cell_index
+        Purpose: Returns the position of a cell in the status and footnote arrays.
+                 Raises KeyError for unknown versions or devices.
+
+                - version: Eagle version i.e. 'V1412'
+                - device: software/device i.e. 'SafetyNet'
+    '''
+
+    def get_cell_index(self, version, device):
+        return self.version_index[version] * self.device_count + self.device_index[device]
+
+    '''
+        Method: get_status
+        Purpose: Returns the status code of a version/device pair.
+    '''
+
+    def get_status(self, version, device):
+        return self.status[self.get_cell_index(version, device)]
+
+    '''
+        Method: is_compatible
+        Purpose: Returns True when the version/device pair is compatible.
+    '''
+
+    def is_compatible(self, version, device):
+        return self.get_status(version, device) == STATUS_YES
+
+    '''
+        Method: get_footnote_ids
+        Purpose: Returns the footnote IDs of a version/device pair i.e. (4,), or () if there are none.
+    '''
+
+    def get_footnote_ids(self, version, device):
+        return self.footnote_sets[self.footnotes[self.get_cell_index(version, device)]]
+
+    '''
+        Method: get_version_footnote_ids
+        Purpose: Returns the footnote IDs of an Eagle version i.e. (3,) for 'V2120[3]'.
+    '''
+
+    def get_version_footnote_ids(self, version):
+        return self.footnote_sets[self.version_footnotes[self.version_index[version]]]
+
+    '''
+        Method: get_footnote_text
+        Purpose: Returns the text of a footnote i.e. 'Requires minimum MICT V1049' for 4,
+                 or an empty string if there is none.
+    '''
+
+    def get_footnote_text(self, footnote_id):
+        if footnote_id == NO_FOOTNOTE:
+            return ''
+        return self.exceptions.get(f'[{footnote_id}]', '')
+
+    '''
+        Method: get_version_notes
+        Purpose: Returns the footnote text of an Eagle version i.e. the note of [3] for 'V2120[3]'.
+    '''
+
+    def get_version_notes(self, version):
+        return self.footnote_notes[self.version_footnotes[self.version_index[version]]]
+
+    '''
+        Method: get_cell_notes
+        Purpose: Returns the footnote text of every footnote of a version/device pair.
+    '''
+
+    def get_cell_notes(self, version, device):
+        return self.footnote_notes[self.footnotes[self.get_cell_index(version, device)]]
+
+    '''
+        Method: get_notes
+        Purpose: Returns the special requirements of a version/device pair the same way the GUI shows them:
+                 first the footnotes of the Eagle version (i.e. 'V2120[3]'), then the footnotes of the cell.
+    '''
+
+    def get_notes(self, version, device):
+        return self.get_version_notes(version) + self.get_cell_notes(version, device)
+
+    '''
+        Method: format_cell
+        Purpose: Convert a status code and footnote set ID back to the Excel cell text i.e. 'Yes[4]'.
+    '''
+
+    def format_cell(self, status, footnote_set_id):
+        return STATUS_LABELS[status] + self.footnote_labels[footnote_set_id]
+
+    '''
+        Method: get_cell_text
+        Purpose: Returns the Excel cell text of a version/device pair i.e. 'Yes[4]'.
+    '''
+
+    def get_cell_text(self, version, device):
+        index = self.get_cell_index(version, device)
+        return self.format_cell(self.status[index], self.footnotes[index])
+
+    '''
+        Method: get_row
+        Purpose: Returns the Excel cell text of every device for a version i.e. ['Yes[1]', 'Yes', 'No', ...]
+    '''
+
+    def get_row(self, version):
+        start = self.version_index[version] * self.device_count
+        return [self.format_cell(self.status[index], self.footnotes[index])
+                for index in range(start, start + self.device_count)]
+
+    '''
+        Method: query
+        Purpose: Answer a single compatibility query.
+
+                - version: Eagle version i.e. 'V1412'
+                - device: software/device i.e. 'SafetyNet'
+    '''
+
+    def query(self, version, device):
+        index = self.get_cell_index(version, device)
+        status = self.status[index]
+        return QueryResult(version, device, status, status == STATUS_YES, self.footnote_sets[self.footnotes[index]])
+
+    '''
+        Method: query_many
+        Purpose: Answer an iterable of (version, device) pairs lazily, one QueryResult per pair.
+
+                - pairs: iterable of (version, device) tuples.
+    '''
+
+    def query_many(self, pairs):
+        version_index = self.version_index
+        device_index = self.device_index
+        device_count = self.device_count
+        status = self.status
+        footnotes = self.footnotes
+        footnote_sets = self.footnote_sets
+
+        for version, device in pairs:
+            index = version_index[version] * device_count + device_index[device]
+            code = status[index]
+            yield QueryResult(version, device, code, code == STATUS_YES, footnote_sets[footnotes[index]])
+
+    '''
+        Method: get_statuses
+        Purpose: Returns the status codes of many pairs at once as an array('b').
+
+                - versions: iterable of Eagle versions.
+                - devices: iterable of software/devices, paired with versions by position.
+    '''
+
+    def get_statuses(self, versions, devices):
+        version_index = self.version_index
+        device_index = self.device_index
+        device_count = self.device_count
+        status = self.status
+
+        return array('b', (status[version_index[version] * device_count + device_index[device]]
+                           for version, device in zip(versions, devices)))
+
+    '''
+        Method: get_row_slice
+        Purpose: Returns the slice of the status and footnote arrays that holds a version row.
+
+                - row: row index of the Eagle version.
+    '''
+
+    def get_row_slice(self, row):
+        start = row * self.device_count
+        return slice(start, start + self.device_count)
+
+    '''
+        Method: diff
+        Purpose: Compare this matrix with a newer one row by row.  Rows are compared as packed
+                 array slices so no cell text is rebuilt.  Footnote set IDs are numbered in sorted order,
+                 so they can be compared directly as long as both matrices use the same footnote sets.
+
+                - other: the newer CompatibilityMatrix.
+    '''
+
+    def diff(self, other):
+        added_versions = [version for version in other.versions if version not in self.version_index]
+        removed_versions = [version for version in self.versions if version not in other.version_index]
+        devices_changed = self.devices != other.devices
+        changed_versions = []
+
+        for version, row in other.version_index.items():
+            old_row = self.version_index.get(version)
+            if old_row is None:
+                continue
+
+            # With different devices every shared row counts as changed
+            if devices_changed:
+                changed_versions.append(version)
+                continue
+
+            old_slice = self.get_row_slice(old_row)
+            new_slice = other.get_row_slice(row)
+            if self.status[old_slice] != other.status[new_slice] or \
+                    self.footnotes[old_slice] != other.footnotes[new_slice]:
+                changed_versions.append(version)
+
+        footnotes_changed = self.footnote_sets != other.footnote_sets or self.exceptions != other.exceptions
+
+        return MatrixDiff(added_versions, removed_versions, changed_versions,
+                          self.versions != other.versions, devices_changed, footnotes_changed, other)
+
+    '''
+        Method: apply_diff
+        Purpose: Returns the matrix to use after a diff.  When only cells changed the changed rows
+                 are copied into this matrix in place, so the cost scales with the number of changed
+                 rows.  When versions, devices or footnotes changed the new matrix is returned instead.
+
+                - diff: MatrixDiff produced by diff.
+    '''
+
+    def apply_diff(self, diff):
+        if diff.requires_swap:
+            return diff.matrix
+
+        other = diff.matrix
+        for version in diff.changed_versions:
+            old_slice = self.get_row_slice(self.version_index[version])
+            new_slice = other.get_row_slice(other.version_index[version])
+            self.status[old_slice] = other.status[new_slice]
+            self.footnotes[old_slice] = other.footnotes[new_slice]
+
+        # The bitset index is rebuilt from the patched rows on next use
+        if diff.changed_versions:
+            self.bitset_index = None
+            self.revision += 1
+
+        return self
+
+    '''
+        Method: as_numpy
+        Purpose: Returns zero-copy NumPy views of the status and footnote set ID arrays shaped
+                 (version_count, device_count) for vectorized consumers.  NumPy is only
+                 imported when this method is called.
+    '''
+
+    def as_numpy(self):
+        import numpy as np
+
+        shape = (self.version_count, self.device_count)
+        status = np.frombuffer(self.status, dtype=np.int8).reshape(shape)
+        footnotes = np.frombuffer(self.footnotes, dtype=np.uint16).reshape(shape)
+        return status, footnotes
+
+
+'''
+    Function: process_excel_file
+    Purpose: Stream the compatibility table out of the Excel file and convert it to a CompatibilityMatrix.
+             The Eagle versions, software/devices and footnote text are taken from the sheet itself.
+
+            - file_path: path of the Excel workbook.
+'''
+
+
+@timed('load.parse_workbook')
+def process_excel_file(file_path):
+    with MatrixTableReader(file_path) as reader:
+        matrix = CompatibilityMatrix.from_records(reader.devices, reader)
+
+        # The notes section below the table holds the footnote text
+        matrix.set_exceptions(reader.read_notes())
+
+    return matrix
+
+
+'''
+    Function: load_matrix
+    Purpose: Returns the CompatibilityMatrix of a workbook, using the compiled cache when possible.
+
+            - file_path: path of the Excel workbook.
+            - cache: optional MatrixCache.
+'''
+
+
+@timed('load.matrix')
+def load_matrix(file_path, cache=None):
+    payload = cache.load(file_path) if cache is not None else None
+
+    if payload is not None:
+        METRICS.count('load.cache_hits')
+        return CompatibilityMatrix.from_payload(payload)
+
+    METRICS.count('load.cache_misses')
+
+    # Key the cache entry on the workbook as it was before parsing, a save during the parse is caught by store
+    key = cache.get_cache_key(file_path) if cache is not None else None
+
+    matrix = process_excel_file(file_path)
+
+    if cache is not None:
+        cache.store(file_path, matrix.to_payload(), key)
+
+    return matrix
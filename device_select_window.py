@@ -0,0 +1,113 @@
+import tkinter as tk
+from tkinter import Listbox, Scrollbar, Text
+import customtkinter
+
+# Device set query modes, see CompatibilityMatrix.find_versions
+MODE_ALL = 'all'
+MODE_ANY = 'any'
+MODE_NONE = 'none'
+
+
+class DeviceSelectWindow(customtkinter.CTkToplevel):
+    WIDTH = 420
+    HEIGHT = 620
+
+    '''
+        Method: __init__
+        Purpose: Create the multi-device search window.  The user selects several software/devices and
+                 whether the Eagle versions must be compatible with all, any or none of them.
+
+                - app: the App owning the loaded compatibility matrix.
+    '''
+
+    def __init__(self, app):
+        super().__init__(master=app)
+        self.app = app
+
+        self.title('Multi-Device Search')
+        self.geometry(f"{self.WIDTH}x{self.HEIGHT}")
+
+        # Instruction label
+        self.instruction_label = customtkinter.CTkLabel(master=self,
+                                                        text="Select one or more devices",
+                                                        text_font=('Verdana', 12))
+        self.instruction_label.grid(row=0, column=0, columnspan=3, pady=10, padx=10, sticky='n')
+
+        # Software/device list - several devices can be selected at once
+        self.device_listbox = Listbox(master=self, selectmode='multiple', height=12, width=40,
+                                      exportselection=False, font=('Verdana', 9))
+        self.device_listbox.grid(row=1, column=0, columnspan=3, pady=0, padx=(10, 0), sticky='nsew')
+        self.device_scrollbar = Scrollbar(master=self, command=self.device_listbox.yview)
+        self.device_scrollbar.grid(row=1, column=3, pady=0, padx=(0, 10), sticky='ns')
+        self.device_listbox.configure(yscrollcommand=self.device_scrollbar.set)
+
+        # Query mode
+        self.mode_var = tk.StringVar(value=MODE_ALL)
+        for column, (mode, text) in enumerate(((MODE_ALL, 'all of'), (MODE_ANY, 'any of'), (MODE_NONE, 'none of'))):
+            customtkinter.CTkRadioButton(master=self, text=text, variable=self.mode_var,
+                                         value=mode).grid(row=2, column=column, pady=10, padx=5)
+
+        # Search button
+        self.search_button = customtkinter.CTkButton(master=self,
+                                                     text="Find Eagle Versions",
+                                                     command=self.search_button_callback,
+                                                     border_width=2,
+                                                     border_color='cyan')
+        self.search_button.grid(row=3, column=0, columnspan=3, pady=10, padx=5, sticky='n')
+
+        # Results text box
+        self.results_text = Text(master=self, height=12, width=40, relief='sunken',
+                                 bg='gray81', wrap='word', font=('Verdana', 9))
+        self.results_text.grid(row=4, column=0, columnspan=4, pady=(0, 10), padx=10, sticky='nsew')
+
+        self.refresh_devices()
+
+    '''
+        Method: refresh_devices
+        Purpose: Fill the device list with the devices of the loaded matrix, keeping the current selection.
+    '''
+
+    def refresh_devices(self):
+        selected = set(self.get_selected_devices())
+
+        self.device_listbox.delete(0, 'end')
+        for position, device in enumerate(self.app.matrix.devices):
+            self.device_listbox.insert('end', device)
+            if device in selected:
+                self.device_listbox.selection_set(position)
+
+    '''
+        Method: get_selected_devices
+        Purpose: Returns the software/devices selected in the list.
+    '''
+
+    def get_selected_devices(self):
+        return [self.device_listbox.get(position) for position in self.device_listbox.curselection()]
+
+    '''
+        Method: search_button_callback
+        Purpose: Answer the device set query from the bitset index and display the matching Eagle versions.
+    '''
+
+    def search_button_callback(self):
+        devices = self.get_selected_devices()
+        mode = self.mode_var.get()
+
+        self.results_text.delete('1.0', 'end')
+        if not devices:
+            return self.results_text.insert('end', "Select at least one device.")
+
+        try:
+            versions = self.app.matrix.find_versions(all_devices=devices if mode == MODE_ALL else (),
+                                                     any_devices=devices if mode == MODE_ANY else (),
+                                                     none_devices=devices if mode == MODE_NONE else ())
+        except KeyError:
+            # The Excel sheet was reloaded without one of the selected devices
+            self.refresh_devices()
+            return self.results_text.insert('end', "The device list changed, please select again.")
+
+        if not versions:
+            return self.results_text.insert('end', f"No Eagle version matches {mode} of {', '.join(devices)}.")
+
+        return self.results_text.insert('end', f"{len(versions)} Eagle versions match {mode} of "
+                                               f"{', '.join(devices)}:\n\n" + "\n".join(versions))
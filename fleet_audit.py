@@ -0,0 +1,451 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from compatibility_matrix import NO_FOOTNOTE, STATUS_YES
+from prerequisite_rules import SEVERITY_REQUIRED, normalize_component
+
+# Default inventory columns: one row per site with its Eagle version and the devices installed there
+SITE_COLUMN = 'site'
+VERSION_COLUMN = 'eagle_version'
+DEVICES_COLUMN = 'devices'
+
+# Separator between the devices of one site i.e. 'SafetyNet;MICT;SedLine'
+DEVICE_SEPARATOR = ';'
+
+# Inventory rows read per chunk
+DEFAULT_CHUNK_SIZE = 100000
+
+# Site status written to the report
+SITE_OK = 'ok'
+SITE_INCOMPATIBLE = 'incompatible'
+SITE_UNKNOWN_VERSION = 'unknown_version'
+
+# Columns of the per-site report
+REPORT_COLUMNS = ['site', 'eagle_version', 'status', 'incompatible_devices', 'unknown_devices', 'footnotes']
+
+# Site status written to the prerequisite report: a required firmware minimum is not met, only an
+# 'all features' minimum is not met, or a prerequisite applies but the firmware column is missing/empty
+SITE_PREREQUISITE_FAILED = 'prerequisite_failed'
+SITE_FEATURES_LIMITED = 'features_limited'
+SITE_UNVERIFIED = 'unverified'
+
+# Columns of the per-site prerequisite report
+PREREQUISITE_REPORT_COLUMNS = ['site', 'eagle_version', 'status', 'violations', 'unverified']
+
+'''
+    Function: iter_inventory_chunks
+    Purpose: Read an inventory in chunks of at most chunk_size rows, as CSV or Parquet (by extension).
+             All columns are read as strings.
+
+            - path: inventory file.
+            - columns: the column names to read, None for all columns.
+            - chunk_size: rows per chunk.
+'''
+
+
+def iter_inventory_chunks(path, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas().astype(str)
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+
+'''
+    Function: join_groups
+    Purpose: Join the values of every group with the device separator, returning one string per position.
+
+            - positions: site position of each value.
+            - values: strings to join.
+            - size: number of sites in the chunk.
+'''
+
+
+def join_groups(positions, values, size):
+    joined = np.full(size, '', dtype=object)
+    if len(values):
+        groups = pd.Series(values).groupby(positions, sort=False).agg(DEVICE_SEPARATOR.join)
+        joined[groups.index.to_numpy()] = groups.to_numpy()
+    return joined
+
+
+'''
+    Function: get_version_rows
+    Purpose: Returns the matrix row of every inventory version, -1 when it does not resolve.  Raw spellings
+             i.e. 'V2120' for the listed 'V2120[3]' or a build inside a listed range are resolved with
+             matrix.resolve_version, once per distinct version of the chunk rather than once per site.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - versions: Series of Eagle version strings.
+'''
+
+
+def get_version_rows(matrix, versions):
+    codes, distinct_versions = pd.factorize(versions)
+    distinct_rows = np.array([matrix.version_index.get(matrix.resolve_version(version), -1)
+                              for version in distinct_versions], dtype=np.intp)
+    return distinct_rows[codes]
+
+
+class FleetAudit:
+    '''
+        Method: __init__
+        Purpose: Create an audit of site inventories against a matrix.  The matrix is looked up
+                 through zero-copy NumPy views and pandas indexes, so each chunk is joined against
+                 it with a handful of array operations instead of one dictionary lookup per pair.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+    '''
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.status, self.footnotes = matrix.as_numpy()
+        self.version_footnotes = np.frombuffer(matrix.version_footnotes, dtype=np.uint16)
+        self.device_lookup = pd.Index(matrix.devices)
+
+        # Summary counters, accumulated over all chunks
+        self.site_count = 0
+        self.check_count = 0
+        self.site_counts = {SITE_OK: 0, SITE_INCOMPATIBLE: 0, SITE_UNKNOWN_VERSION: 0}
+        self.incompatible_counts = np.zeros(matrix.device_count, dtype=np.int64)
+        self.footnote_set_counts = np.zeros(len(matrix.footnote_sets), dtype=np.int64)
+
+        # Footnote markers of every footnote set i.e. '[1][4]', so set IDs are turned into text with one take
+        self.footnote_labels = np.array(matrix.footnote_labels, dtype=object)
+        self.unknown_device_counts = {}
+
+    '''
+        Method: audit_chunk
+        Purpose: Audit one chunk of the inventory and return its per-site report as a DataFrame.
+
+                - chunk: DataFrame with the site, version and devices columns.
+                - columns: (site, version, devices) column names.
+    '''
+
+    def audit_chunk(self, chunk, columns=(SITE_COLUMN, VERSION_COLUMN, DEVICES_COLUMN)):
+        site_column, version_column, devices_column = columns
+        chunk = chunk.reset_index(drop=True)
+        size = len(chunk)
+
+        versions = chunk[version_column].fillna('').str.strip()
+        version_rows = get_version_rows(self.matrix, versions)
+
+        # One entry per (site, device): positions point back at the site row of the chunk
+        devices = chunk[devices_column].fillna('').str.split(DEVICE_SEPARATOR).explode().str.strip()
+        devices = devices[devices.notna() & (devices != '')]
+        positions = devices.index.to_numpy()
+        device_names = devices.to_numpy(dtype=object)
+        device_columns = self.device_lookup.get_indexer(devices)
+        rows = version_rows[positions]
+
+        known = (rows >= 0) & (device_columns >= 0)
+        status = self.status[rows[known], device_columns[known]]
+        footnotes = self.footnotes[rows[known], device_columns[known]]
+        known_positions = positions[known]
+
+        # A known pair is incompatible unless its cell status is Yes, footnoted cells i.e. 'Yes[4]' included;
+        # 'No' and blank cells count as incompatible
+        incompatible = status != STATUS_YES
+        incompatible_devices = join_groups(known_positions[incompatible], device_names[known][incompatible], size)
+
+        # Devices the matrix does not know, reported for sites with a known Eagle version
+        unknown = (rows >= 0) & (device_columns < 0)
+        unknown_devices = join_groups(positions[unknown], device_names[unknown], size)
+
+        # Footnotes triggered by the cells and by the Eagle versions themselves
+        cell_footnotes = footnotes != NO_FOOTNOTE
+        site_version_footnotes = np.where(version_rows >= 0, self.version_footnotes[version_rows], NO_FOOTNOTE)
+        version_footnote_sites = np.flatnonzero(site_version_footnotes != NO_FOOTNOTE)
+        footnote_positions = np.concatenate([version_footnote_sites, known_positions[cell_footnotes]])
+        footnote_set_ids = np.concatenate([site_version_footnotes[version_footnote_sites], footnotes[cell_footnotes]])
+        order = np.argsort(footnote_positions, kind='stable')
+        triggered = join_groups(footnote_positions[order], self.footnote_labels[footnote_set_ids[order]], size)
+
+        site_status = np.where(version_rows < 0, SITE_UNKNOWN_VERSION,
+                               np.where(incompatible_devices != '', SITE_INCOMPATIBLE, SITE_OK))
+
+        # Summary counters
+        self.site_count += size
+        self.check_count += int(known.sum())
+        for name, count in zip(*np.unique(site_status, return_counts=True)):
+            self.site_counts[name] += int(count)
+        self.incompatible_counts += np.bincount(device_columns[known][incompatible],
+                                                minlength=self.matrix.device_count)
+        self.footnote_set_counts += np.bincount(footnote_set_ids, minlength=len(self.footnote_set_counts))
+        for name, count in pd.Series(device_names[unknown]).value_counts().items():
+            self.unknown_device_counts[name] = self.unknown_device_counts.get(name, 0) + int(count)
+
+        return pd.DataFrame({'site': chunk[site_column].to_numpy(),
+                             'eagle_version': versions.to_numpy(),
+                             'status': site_status,
+                             'incompatible_devices': incompatible_devices,
+                             'unknown_devices': unknown_devices,
+                             'footnotes': triggered}, columns=REPORT_COLUMNS)
+
+    '''
+        Method: get_summary
+        Purpose: Returns the summary counts of everything audited so far.
+    '''
+
+    def get_summary(self):
+        # Every footnote set counts towards each of its footnotes
+        footnote_counts = {}
+        for footnote_ids, count in zip(self.matrix.footnote_sets, self.footnote_set_counts):
+            for footnote_id in footnote_ids:
+                footnote_counts[footnote_id] = footnote_counts.get(footnote_id, 0) + int(count)
+
+        return {'sites': self.site_count,
+                'checks': self.check_count,
+                'site_status': dict(self.site_counts),
+                'incompatible_by_device': {device: int(count)
+                                           for device, count in zip(self.matrix.devices, self.incompatible_counts)
+                                           if count},
+                'footnotes': {f'[{footnote_id}]': {'count': count,
+                                                   'text': self.matrix.get_footnote_text(footnote_id)}
+                              for footnote_id, count in sorted(footnote_counts.items()) if count},
+                'unknown_devices': dict(self.unknown_device_counts)}
+
+
+'''
+    Function: parse_firmware_column
+    Purpose: Returns the numeric builds of a column of firmware versions as floats, NaN where the
+             version is missing or unreadable.  Same rules as prerequisite_rules.parse_firmware_version.
+
+            - values: Series of firmware version strings i.e. 'V2015', '2.0.2.8'.
+'''
+
+
+def parse_firmware_column(values):
+    numbers = (values.fillna('').astype(str).str.strip()
+               .str.replace(r'^[Vv]\s*', '', regex=True)
+               .str.replace('[Xx]', '0', regex=True))
+
+    # Plain builds, or dotted builds with one digit per segment; multi-digit segments are ambiguous
+    readable = numbers.str.fullmatch(r'\d+|\d(?:\.\d)+')
+    digits = numbers.str.replace('.', '', regex=False)
+    return pd.to_numeric(digits.where(readable, None), errors='coerce').to_numpy(dtype=float)
+
+
+class PrerequisiteAudit:
+    '''
+        Method: __init__
+        Purpose: Create a check of site inventories, including the firmware versions of their peripherals,
+                 against the prerequisite rules compiled from the footnotes.  A rule applies to a site when
+                 its footnote is attached to the site's Eagle version or to the cell of an installed device;
+                 every rule is then checked for the whole chunk with one vectorized comparison.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+    '''
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.rules, self.notes_without_rules = matrix.get_prerequisite_rules()
+        self.footnotes = matrix.as_numpy()[1]
+        self.version_footnotes = np.frombuffer(matrix.version_footnotes, dtype=np.uint16)
+        self.device_lookup = pd.Index(matrix.devices)
+
+        # Membership of footnote IDs in the footnote sets: set_footnotes[set_id, footnote_id]
+        footnote_limit = max([rule.footnote_id for rule in self.rules], default=0) + 1
+        self.set_footnotes = np.zeros((len(matrix.footnote_sets), footnote_limit), dtype=bool)
+        for set_id, footnote_ids in enumerate(matrix.footnote_sets):
+            for footnote_id in footnote_ids:
+                if footnote_id < footnote_limit:
+                    self.set_footnotes[set_id, footnote_id] = True
+
+        # Text written to the report for a failed rule i.e. '[4] MICT >= V1049 (required)'
+        self.rule_labels = [f'[{rule.footnote_id}] {rule.component} {rule.operator} {rule.version_label} '
+                            f'({rule.severity})' for rule in self.rules]
+
+        # Summary counters per rule, accumulated over all chunks
+        self.site_count = 0
+        self.site_counts = {SITE_OK: 0, SITE_PREREQUISITE_FAILED: 0, SITE_FEATURES_LIMITED: 0,
+                            SITE_UNVERIFIED: 0, SITE_UNKNOWN_VERSION: 0}
+        self.applicable_counts = np.zeros(len(self.rules), dtype=np.int64)
+        self.violation_counts = np.zeros(len(self.rules), dtype=np.int64)
+        self.missing_counts = np.zeros(len(self.rules), dtype=np.int64)
+
+    '''
+        Method: get_firmware_columns
+        Purpose: Returns the inventory column of every component, matched on the normalized name
+                 i.e. a 'Radius-7 BB' column holds the firmware version checked by 'Radius-7 BB' rules.
+
+                - chunk_columns: columns of the inventory.
+                - columns: (site, version, devices) column names, never firmware columns.
+    '''
+
+    def get_firmware_columns(self, chunk_columns, columns):
+        return {normalize_component(column): column for column in chunk_columns if column not in columns}
+
+    '''
+        Method: audit_chunk
+        Purpose: Check one chunk of the inventory and return its per-site report as a DataFrame.
+
+                - chunk: DataFrame with the site, version and devices columns plus one column per component.
+                - columns: (site, version, devices) column names.
+    '''
+
+    def audit_chunk(self, chunk, columns=(SITE_COLUMN, VERSION_COLUMN, DEVICES_COLUMN)):
+        site_column, version_column, devices_column = columns
+        chunk = chunk.reset_index(drop=True)
+        size = len(chunk)
+
+        versions = chunk[version_column].fillna('').str.strip()
+        version_rows = get_version_rows(self.matrix, versions)
+
+        # Footnote sets of the site's Eagle version and of the cells of its installed devices
+        devices = chunk[devices_column].fillna('').str.split(DEVICE_SEPARATOR).explode().str.strip()
+        devices = devices[devices.notna() & (devices != '')]
+        positions = devices.index.to_numpy()
+        device_columns = self.device_lookup.get_indexer(devices)
+        rows = version_rows[positions]
+        known = (rows >= 0) & (device_columns >= 0)
+        cell_sets = self.footnotes[rows[known], device_columns[known]]
+        cell_positions = positions[known]
+        version_sets = np.where(version_rows >= 0, self.version_footnotes[version_rows], NO_FOOTNOTE)
+
+        firmware_columns = self.get_firmware_columns(chunk.columns, columns)
+        firmware = {}
+        applicable_by_footnote = {}
+
+        failed_positions, failed_labels = [], []
+        missing_positions, missing_labels = [], []
+        required_failed = np.zeros(size, dtype=bool)
+        features_failed = np.zeros(size, dtype=bool)
+        unverified = np.zeros(size, dtype=bool)
+
+        for number, rule in enumerate(self.rules):
+            applicable = applicable_by_footnote.get(rule.footnote_id)
+            if applicable is None:
+                applicable = self.set_footnotes[version_sets, rule.footnote_id]
+                applicable[cell_positions[self.set_footnotes[cell_sets, rule.footnote_id]]] = True
+                applicable_by_footnote[rule.footnote_id] = applicable
+
+            column = firmware_columns.get(normalize_component(rule.component))
+            if column not in firmware:
+                firmware[column] = np.full(size, np.nan) if column is None else parse_firmware_column(chunk[column])
+            installed = firmware[column]
+
+            missing = applicable & np.isnan(installed)
+            violated = applicable & (installed < rule.version)
+
+            if rule.severity == SEVERITY_REQUIRED:
+                required_failed |= violated
+            else:
+                features_failed |= violated
+            unverified |= missing
+
+            failed_positions.append(np.flatnonzero(violated))
+            failed_labels.append(np.full(int(violated.sum()), self.rule_labels[number], dtype=object))
+            missing_positions.append(np.flatnonzero(missing))
+            missing_labels.append(np.full(int(missing.sum()), rule.component, dtype=object))
+
+            self.applicable_counts[number] += int(applicable.sum())
+            self.violation_counts[number] += int(violated.sum())
+            self.missing_counts[number] += int(missing.sum())
+
+        violations = self.join_sites(failed_positions, failed_labels, size)
+        unverified_components = self.join_sites(missing_positions, missing_labels, size)
+
+        site_status = np.where(version_rows < 0, SITE_UNKNOWN_VERSION,
+                               np.where(required_failed, SITE_PREREQUISITE_FAILED,
+                                        np.where(features_failed, SITE_FEATURES_LIMITED,
+                                                 np.where(unverified, SITE_UNVERIFIED, SITE_OK))))
+
+        self.site_count += size
+        for name, count in zip(*np.unique(site_status, return_counts=True)):
+            self.site_counts[name] += int(count)
+
+        return pd.DataFrame({'site': chunk[site_column].to_numpy(),
+                             'eagle_version': versions.to_numpy(),
+                             'status': site_status,
+                             'violations': violations,
+                             'unverified': unverified_components}, columns=PREREQUISITE_REPORT_COLUMNS)
+
+    '''
+        Method: join_sites
+        Purpose: Join per-rule labels into one string per site, in rule order, see join_groups.
+    '''
+
+    def join_sites(self, positions, labels, size):
+        if not positions:
+            return np.full(size, '', dtype=object)
+
+        positions = np.concatenate(positions)
+        labels = np.concatenate(labels)
+        order = np.argsort(positions, kind='stable')
+        return join_groups(positions[order], labels[order], size)
+
+    '''
+        Method: get_summary
+        Purpose: Returns the summary counts of everything checked so far, per rule.
+    '''
+
+    def get_summary(self):
+        return {'sites': self.site_count,
+                'site_status': dict(self.site_counts),
+                'rules': [{'footnote': f'[{rule.footnote_id}]',
+                           'component': rule.component,
+                           'minimum': rule.version_label,
+                           'severity': rule.severity,
+                           'applicable': int(self.applicable_counts[number]),
+                           'violations': int(self.violation_counts[number]),
+                           'missing_firmware': int(self.missing_counts[number])}
+                          for number, rule in enumerate(self.rules)],
+                'notes_without_rules': list(self.notes_without_rules)}
+
+
+'''
+    Function: audit_inventory
+    Purpose: Audit an inventory chunk by chunk, appending the per-site report to output (a CSV path or
+             a text stream), and return the summary.  Only one chunk is held in memory at a time.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - path: inventory file (CSV or Parquet).
+            - output: report file path or text stream.
+            - columns: (site, version, devices) column names.
+            - chunk_size: inventory rows per chunk.
+'''
+
+
+def audit_inventory(matrix, path, output, columns=(SITE_COLUMN, VERSION_COLUMN, DEVICES_COLUMN),
+                    chunk_size=DEFAULT_CHUNK_SIZE):
+    audit = FleetAudit(matrix)
+    header = True
+
+    for chunk in iter_inventory_chunks(path, list(columns), chunk_size):
+        report = audit.audit_chunk(chunk, columns)
+        report.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+        header = False
+
+    return audit.get_summary()
+
+
+'''
+    Function: check_prerequisites
+    Purpose: Check an inventory with peripheral firmware columns against the prerequisite rules chunk by
+             chunk, appending the per-site report to output (a CSV path or a text stream), and return the summary.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - path: inventory file (CSV or Parquet) with one firmware version column per component.
+            - output: report file path or text stream.
+            - columns: (site, version, devices) column names.
+            - chunk_size: inventory rows per chunk.
+'''
+
+
+def check_prerequisites(matrix, path, output, columns=(SITE_COLUMN, VERSION_COLUMN, DEVICES_COLUMN),
+                        chunk_size=DEFAULT_CHUNK_SIZE):
+    audit = PrerequisiteAudit(matrix)
+    header = True
+
+    # Every column is read, the ones besides site, version and devices are firmware versions
+    for chunk in iter_inventory_chunks(path, None, chunk_size):
+        report = audit.audit_chunk(chunk, columns)
+        report.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+        header = False
+
+    return audit.get_summary()
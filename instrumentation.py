@@ -0,0 +1,184 @@
+'''
+    Optional timing instrumentation of the load pipeline and the query path.
+
+    Functions decorated with @timed('name') record their latency in a histogram and count their calls,
+    but only after enable() was called (python main.py --metrics ...).  While disabled the decorator
+    costs one attribute check per call, and nothing is recorded or kept in memory.
+'''
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets in milliseconds (1-2-5 series from 10 us to 20 s)
+BUCKET_BOUNDS_MS = [scale * 10 ** exponent for exponent in range(-2, 5) for scale in (1, 2, 5)][:-1]
+
+
+class Histogram:
+    '''
+        Method: __init__
+        Purpose: Create a latency histogram with fixed buckets, see BUCKET_BOUNDS_MS.
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+        # One bucket per bound plus the overflow bucket
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    '''
+        Method: observe
+        Purpose: Add one latency in milliseconds.
+    '''
+
+    def observe(self, milliseconds):
+        self.count += 1
+        self.total += milliseconds
+        self.minimum = milliseconds if self.minimum is None else min(self.minimum, milliseconds)
+        self.maximum = milliseconds if self.maximum is None else max(self.maximum, milliseconds)
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+
+    '''
+        Method: get_percentile
+        Purpose: Returns the upper bound of the bucket holding the given percentile (0-100),
+                 the maximum for the overflow bucket.
+    '''
+
+    def get_percentile(self, percent):
+        if not self.count:
+            return None
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for position, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return BUCKET_BOUNDS_MS[position] if position < len(BUCKET_BOUNDS_MS) else self.maximum
+        return self.maximum
+
+    '''
+        Method: to_dict
+        Purpose: Returns the histogram as a JSON serializable dictionary, empty buckets are left out.
+    '''
+
+    def to_dict(self):
+        buckets = {}
+        for position, count in enumerate(self.buckets):
+            if count:
+                label = f'le_{BUCKET_BOUNDS_MS[position]:g}' if position < len(BUCKET_BOUNDS_MS) else 'overflow'
+                buckets[label] = count
+
+        return {'count': self.count,
+                'sum_ms': round(self.total, 3),
+                'min_ms': round(self.minimum, 3) if self.minimum is not None else None,
+                'max_ms': round(self.maximum, 3) if self.maximum is not None else None,
+                'mean_ms': round(self.total / self.count, 3) if self.count else None,
+                'p50_ms': self.get_percentile(50),
+                'p99_ms': self.get_percentile(99),
+                'buckets': buckets}
+
+
+class Metrics:
+    '''
+        Method: __init__
+        Purpose: Create a registry of counters and latency histograms, disabled until enable() is called.
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.started = None
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    '''
+        Method: enable
+        Purpose: Start recording.
+    '''
+
+    def enable(self):
+        self.started = time.time()
+        self.enabled = True
+
+    '''
+        Method: count
+        Purpose: Add to a counter when enabled.
+    '''
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    '''
+        Method: observe
+        Purpose: Record one latency in seconds and count the call when enabled.
+    '''
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds * 1000)
+            self.counters[name + '.calls'] = self.counters.get(name + '.calls', 0) + 1
+
+    '''
+        Method: snapshot
+        Purpose: Returns every counter and histogram as one structured record.
+    '''
+
+    def snapshot(self):
+        with self.lock:
+            return {'event': 'metrics',
+                    'started': self.started,
+                    'uptime_s': round(time.time() - self.started, 3) if self.started else None,
+                    'counters': dict(sorted(self.counters.items())),
+                    'histograms': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}}
+
+    '''
+        Method: dump
+        Purpose: Write the snapshot as one JSON line to a text stream.
+    '''
+
+    def dump(self, stream):
+        import json
+
+        stream.write(json.dumps(self.snapshot(), ensure_ascii=False) + '\n')
+        stream.flush()
+
+
+# Process wide registry used by the @timed decorator
+METRICS = Metrics()
+
+'''
+    Function: timed
+    Purpose: Decorator recording the latency of every call in the histogram 'name' while METRICS is enabled.
+
+            - name: metric name i.e. 'load.parse_workbook'.
+'''
+
+
+def timed(name):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                METRICS.observe(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
@@ -1,17 +1,18 @@
-import app_gui as ap
+import sys
+
+import compat_cli
 
 
 # Steps:
 
 # 1. Open Excel sheet
 # 2. Find second table that contains needed information
-# 3. Read the table into a pandas dataframe
+# 3. Read the table into a compatibility matrix
 # 4. Filter data
 
+# Without a command the tkinter application is started, see compat_cli.py for the other commands
+# i.e. python main.py query pairs.csv
 
-if __name__ == '__main__':
-    # Create instance of tkinter application
-    app = ap.App()
 
-    # Start application
-    app.mainloop()
+if __name__ == '__main__':
+    sys.exit(compat_cli.main())
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import pickle
+import time
+
+from instrumentation import timed
+
+
+class MatrixCache:
+    # Bump whenever the layout of the cached payload changes so stale caches are rebuilt
+    CACHE_FORMAT = 3
+
+    # Hash the workbook in 1 MiB blocks
+    HASH_BLOCK_SIZE = 1 << 20
+
+    # File extension of the compiled cache files
+    CACHE_EXTENSION = '.matrix.pickle'
+
+    '''
+        Method: __init__
+        Purpose: Create a cache that stores compiled matrices in the given directory.
+
+                - cache_directory: directory the compiled cache files are written to.
+    '''
+
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+
+        # Hit/miss counters so cold starts can be measured
+        self.hits = 0
+        self.misses = 0
+
+        # Result of the most recent lookup ('hit' or 'miss') and how long it took in seconds
+        self.last_status = None
+        self.last_elapsed = 0.0
+
+    '''
+        Method: get_cache_path
+        Purpose: Returns the path of the compiled cache file for a workbook
+                 i.e. 'matrix.xlsx.1a2b3c4d5e6f.matrix.pickle'.  The name includes a hash of the absolute path, so workbooks with the same name in different
+                 folders get their own entries.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    def get_cache_path(self, file_path):
+        path_hash = hashlib.sha256(os.path.realpath(file_path).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.cache_directory, f'{os.path.basename(file_path)}.{path_hash}{self.CACHE_EXTENSION}')
+
+    '''
+        Method: get_file_signature
+        Purpose: Returns the cheap part of the cache key (path, size and mtime) of a workbook.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    def get_file_signature(self, file_path):
+        stat = os.stat(file_path)
+        return {'path': os.path.realpath(file_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    '''
+        Method: get_cache_key
+        Purpose: Returns the full cache key (path, size, mtime and content hash) of a workbook, or None
+                 when it cannot be read.  Taken before parsing so the key describes the parsed content.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    def get_cache_key(self, file_path):
+        try:
+            return dict(self.get_file_signature(file_path), sha256=self.hash_file(file_path))
+        except OSError:
+            return None
+
+    '''
+        Method: hash_file
+        Purpose: Returns the SHA-256 content hash of a workbook.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    def hash_file(self, file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(self.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    '''
+        Method: read_cache_entry
+        Purpose: Read a compiled cache entry from disk.  Returns None if the entry is missing,
+                 unreadable or was written by another cache format.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    def read_cache_entry(self, file_path):
+        try:
+            with open(self.get_cache_path(file_path), 'rb') as file:
+                entry = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError):
+            return None
+
+        if not isinstance(entry, dict) or entry.get('format') != self.CACHE_FORMAT:
+            return None
+
+        return entry
+
+    '''
+        Method: write_cache_entry
+        Purpose: Atomically write a compiled cache entry to disk.  The cache is only an optimization,
+                 so failing to write it is not an error.
+
+                - file_path: path of the Excel workbook.
+                - key: cache key (path, size, mtime and content hash).
+                - payload: parsed matrix.
+    '''
+
+    def write_cache_entry(self, file_path, key, payload):
+        cache_path = self.get_cache_path(file_path)
+        temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+        entry = {'format': self.CACHE_FORMAT, 'key': key, 'payload': payload}
+
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            with open(temporary_path, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            # Replace the old cache file in one step so readers never see a partial file
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    '''
+        Method: load
+        Purpose: Returns the cached payload for a workbook or None on a cache miss.
+                 The path, size and mtime are checked first; only when they differ is the
+                 content hash compared, so touching the workbook does not force a re-parse.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    @timed('cache.load')
+    def load(self, file_path):
+        start = time.perf_counter()
+        payload = self.lookup(file_path)
+        self.last_elapsed = time.perf_counter() - start
+
+        if payload is None:
+            self.misses += 1
+            self.last_status = 'miss'
+        else:
+            self.hits += 1
+            self.last_status = 'hit'
+
+        return payload
+
+    '''
+        Method: lookup
+        Purpose: Validate the cache entry of a workbook against the workbook on disk.
+
+                - file_path: path of the Excel workbook.
+    '''
+
+    def lookup(self, file_path):
+        entry = self.read_cache_entry(file_path)
+        if entry is None:
+            return None
+
+        try:
+            signature = self.get_file_signature(file_path)
+        except OSError:
+            return None
+
+        key = entry['key']
+
+        # A different workbook or a workbook with a different size can never match
+        if key['path'] != signature['path'] or key['size'] != signature['size']:
+            return None
+
+        # Same size and mtime - trust the cache without reading the workbook
+        if key['mtime_ns'] == signature['mtime_ns']:
+            return entry['payload']
+
+        # The mtime changed, fall back to the content hash
+        content_hash = self.hash_file(file_path)
+        if content_hash != key['sha256']:
+            return None
+
+        # Content is unchanged, refresh the stored mtime so the next start skips hashing
+        self.write_cache_entry(file_path, dict(signature, sha256=content_hash), entry['payload'])
+        return entry['payload']
+
+    '''
+        Method: store
+        Purpose: Store the parsed matrix of a workbook in the compiled cache.  The entry is skipped when the
+                 workbook changed since key was taken, so a save during the parse never pairs the new file
+                 with the old payload.
+
+                - file_path: path of the Excel workbook.
+                - payload: parsed matrix.
+                - key: get_cache_key of the workbook taken before parsing it.
+    '''
+
+    @timed('cache.store')
+    def store(self, file_path, payload, key):
+        if key is None:
+            return None
+
+        try:
+            signature = self.get_file_signature(file_path)
+        except OSError:
+            return None
+
+        if any(signature[name] != key[name] for name in signature):
+            return None
+
+        return self.write_cache_entry(file_path, key, payload)
+
+    '''
+        Method: report
+        Purpose: Returns a one line summary of the most recent lookup i.e. 'Matrix cache hit in 1.2 ms'.
+    '''
+
+    def report(self):
+        return f'Matrix cache {self.last_status} in {self.last_elapsed * 1000:.1f} ms ' \
+               f'(hits: {self.hits}, misses: {self.misses})'
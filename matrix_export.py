@@ -0,0 +1,231 @@
+'''
+    Columnar export of the parsed matrix for analytics, as Parquet or Arrow IPC files.
+
+    An export is a directory with two tables:
+
+        cells      one row per (Eagle version, device) cell, long form:
+                   version (dictionary), version_key (build number, the lower bound of a range),
+                   device (dictionary), status (int8 status code: 1 Yes, 0 No, -1 unknown),
+                   footnote_ids (list of the cell's footnote IDs) and version_footnote_ids
+        footnotes  footnote_id and text of every footnote of the notes section
+
+    The cells are sorted by (version_key, device) or (device, version_key), so the row group statistics
+    let filters on the leading column skip whole row groups.  pyarrow is only imported by this module.
+'''
+
+import os
+
+from compatibility_matrix import STATUS_LABELS
+from instrumentation import timed
+from version_index import parse_version
+
+# Supported export formats and the file extension of their tables
+EXPORT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Sort orders of the cells table, the first column is the one filters can skip row groups on
+SORT_ORDERS = {'version': ['version_key', 'device'], 'device': ['device', 'version_key']}
+
+# Rows per Parquet row group, small enough that a filter on the sort column skips most of them
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+# Dictionary encoded columns of the cells table
+DICTIONARY_COLUMNS = ['version', 'device']
+
+# Table names inside an export directory
+CELLS_TABLE = 'cells'
+FOOTNOTES_TABLE = 'footnotes'
+
+'''
+    Function: get_version_key
+    Purpose: Returns the numeric sort key of an Eagle version label i.e. 2120 for 'V2120[3]' and 1002 for
+             'V1002 – V1303', or None for labels that are not version numbers.
+'''
+
+
+def get_version_key(label):
+    try:
+        return parse_version(label).low
+    except ValueError:
+        return None
+
+
+'''
+    Function: build_list_array
+    Purpose: Returns a pyarrow list<int16> array holding footnote_sets[set_id] for every set ID, gathered
+             without a Python loop over the cells.
+
+            - set_ids: NumPy array of footnote set IDs.
+            - footnote_sets: footnote ID tuples of the matrix.
+'''
+
+
+def build_list_array(set_ids, footnote_sets):
+    import numpy as np
+    import pyarrow as pa
+
+    set_lengths = np.array([len(footnote_ids) for footnote_ids in footnote_sets], dtype=np.int64)
+    set_starts = np.concatenate(([0], np.cumsum(set_lengths)[:-1]))
+    flat_ids = np.array([footnote_id for footnote_ids in footnote_sets for footnote_id in footnote_ids],
+                        dtype=np.int16)
+
+    lengths = set_lengths[set_ids]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int32)
+
+    # Position of every value inside flat_ids: its set's start plus its position inside the set
+    positions = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1] - set_starts[set_ids], lengths)
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(flat_ids[positions], type=pa.int16()))
+
+
+'''
+    Function: build_cells_table
+    Purpose: Returns the long form cells table of a matrix as a pyarrow Table, sorted by sort_by.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - sort_by: a key of SORT_ORDERS.
+'''
+
+
+def build_cells_table(matrix, sort_by='version'):
+    import numpy as np
+    import pyarrow as pa
+
+    status, footnotes = matrix.as_numpy()
+    version_count, device_count = status.shape
+
+    # Cells are row major, so the version of cell i is i // device_count and its device i % device_count
+    version_rows = np.repeat(np.arange(version_count, dtype=np.int32), device_count)
+    device_columns = np.tile(np.arange(device_count, dtype=np.int32), version_count)
+
+    version_keys = pa.array([get_version_key(version) for version in matrix.versions], type=pa.int64())
+    version_footnotes = np.frombuffer(matrix.version_footnotes, dtype=np.uint16)
+
+    table = pa.table({
+        'version': pa.DictionaryArray.from_arrays(pa.array(version_rows), pa.array(matrix.versions, pa.string())),
+        'version_key': version_keys.take(pa.array(version_rows)),
+        'device': pa.DictionaryArray.from_arrays(pa.array(device_columns), pa.array(matrix.devices, pa.string())),
+        'status': pa.array(status.ravel(), type=pa.int8()),
+        'footnote_ids': build_list_array(footnotes.ravel().astype(np.int64), matrix.footnote_sets),
+        'version_footnote_ids': build_list_array(version_footnotes[version_rows].astype(np.int64),
+                                                 matrix.footnote_sets)})
+
+    # Sort on the build numbers and device names, not on the dictionary indexes.
+    # Labels that are not version numbers sort after every version.
+    key_ranks = np.array([-1 if key is None else key for key in version_keys.to_pylist()], dtype=np.int64)
+    key_ranks[key_ranks < 0] = np.iinfo(np.int64).max
+    device_ranks = np.argsort(np.argsort(np.array(matrix.devices, dtype=object), kind='stable'), kind='stable')
+    sort_columns = {'version_key': key_ranks[version_rows], 'device': device_ranks[device_columns]}
+
+    # lexsort sorts by the last key first
+    indices = np.lexsort([sort_columns[name] for name in reversed(SORT_ORDERS[sort_by])])
+
+    metadata = {'status_codes': ','.join(f'{code}={label or "unknown"}' for code, label in STATUS_LABELS.items()),
+                'sorted_by': ','.join(SORT_ORDERS[sort_by])}
+    return table.take(indices).replace_schema_metadata(metadata)
+
+
+'''
+    Function: build_footnotes_table
+    Purpose: Returns the footnote table of a matrix as a pyarrow Table sorted by footnote ID.
+'''
+
+
+def build_footnotes_table(matrix):
+    import pyarrow as pa
+
+    notes = sorted((int(marker.strip('[]')), text) for marker, text in matrix.exceptions.items())
+    return pa.table({'footnote_id': pa.array([footnote_id for footnote_id, _ in notes], type=pa.int16()),
+                     'text': pa.array([text for _, text in notes], type=pa.string())})
+
+
+'''
+    Function: get_table_path
+    Purpose: Returns the path of a table inside an export directory i.e. 'export/cells.parquet'.
+'''
+
+
+def get_table_path(directory, table_name, export_format='parquet'):
+    return os.path.join(directory, table_name + EXPORT_FORMATS[export_format])
+
+
+'''
+    Function: write_table
+    Purpose: Write one table as Parquet (dictionary encoded, with row group statistics) or Arrow IPC.
+             Parquet stores the dictionary columns as plain strings in its schema: the pages are still
+             dictionary encoded, but pyarrow only prunes row groups on statistics of non-dictionary columns.
+'''
+
+
+def write_table(table, path, export_format, row_group_size):
+    if export_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for name in DICTIONARY_COLUMNS:
+            if name in table.column_names:
+                position = table.column_names.index(name)
+                table = table.set_column(position, name, table.column(name).cast(pa.string()))
+        pq.write_table(table, path, row_group_size=row_group_size, use_dictionary=True, write_statistics=True)
+    else:
+        import pyarrow as pa
+
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=row_group_size)
+
+
+'''
+    Function: export_matrix
+    Purpose: Write the cells and footnotes tables of a matrix to a directory and return their paths.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - directory: export directory, created when missing.
+            - export_format: 'parquet' or 'arrow'.
+            - sort_by: 'version' or 'device', the column filters can skip row groups on.
+            - row_group_size: rows per Parquet row group / Arrow record batch.
+'''
+
+
+@timed('export.matrix')
+def export_matrix(matrix, directory, export_format='parquet', sort_by='version',
+                  row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {CELLS_TABLE: get_table_path(directory, CELLS_TABLE, export_format),
+             FOOTNOTES_TABLE: get_table_path(directory, FOOTNOTES_TABLE, export_format)}
+    write_table(build_cells_table(matrix, sort_by), paths[CELLS_TABLE], export_format, row_group_size)
+    write_table(build_footnotes_table(matrix), paths[FOOTNOTES_TABLE], export_format, row_group_size)
+    return paths
+
+
+'''
+    Function: read_cells
+    Purpose: Returns the cells of a Parquet export as a pyarrow Table, optionally only some versions and/or
+             devices.  The filters are pushed down to the Parquet reader, so row groups outside them are skipped,
+             and the version and device columns come back dictionary encoded.
+
+            - directory: export directory written by export_matrix.
+            - versions: Eagle version labels to keep, None for all.
+            - devices: device names to keep, None for all.
+            - columns: columns to read, None for all.
+'''
+
+
+def read_cells(directory, versions=None, devices=None, columns=None):
+    import pyarrow.parquet as pq
+
+    filters = []
+    if versions is not None:
+        filters.append(('version', 'in', list(versions)))
+    if devices is not None:
+        filters.append(('device', 'in', list(devices)))
+
+    path = get_table_path(directory, CELLS_TABLE)
+    if not filters:
+        return pq.read_table(path, columns=columns, read_dictionary=DICTIONARY_COLUMNS)
+
+    # Reading the columns as dictionaries would disable row group pruning, encode the filtered rows instead
+    table = pq.read_table(path, columns=columns, filters=filters)
+    for name in DICTIONARY_COLUMNS:
+        if name in table.column_names:
+            position = table.column_names.index(name)
+            table = table.set_column(position, name, table.column(name).dictionary_encode())
+    return table
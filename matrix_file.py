@@ -0,0 +1,219 @@
+'''
+    Compact fixed-layout binary matrix file, memory-mapped by query workers.
+
+    The file holds a header followed by 8 byte aligned sections, every integer little endian:
+
+        header             magic, format, counts and the (offset, length) of every section
+        versions           string table of the Eagle version labels
+        devices            string table of the software/device names
+        footnote_sets      uint32 offsets[set_count + 1] into the uint16 footnote IDs of all sets
+        notes              string table of alternating footnote markers and texts i.e. '[4]', 'Requires ...'
+        version_footnotes  uint16 footnote set ID per Eagle version
+        status             int8 status grid, row major (version_count x device_count)
+        footnotes          uint16 footnote set ID grid, row major
+
+    A string table is a uint32 count, uint32 byte offsets[count + 1] into the UTF-8 text, and the text
+    with every string terminated by a NUL byte.
+
+    open_matrix_file maps the file read-only and builds a CompatibilityMatrix whose grids are memoryviews
+    of the mapping, so every worker on a host shares one physical copy through the page cache and
+    as_numpy() returns views of the mapping.  Only the short string tables are decoded when opening.
+'''
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from compatibility_matrix import CompatibilityMatrix
+from instrumentation import timed
+
+# File signature and layout version, bump FILE_FORMAT whenever the layout changes
+MAGIC = b'EAGLEMX\0'
+FILE_FORMAT = 1
+
+# Sections in file order
+SECTIONS = ('versions', 'devices', 'footnote_sets', 'notes', 'version_footnotes', 'status', 'footnotes')
+
+# magic, format, reserved, version_count, device_count, footnote_set_count, note_count,
+# then (offset, length) of every section
+HEADER = struct.Struct('<8sHHIIII' + 'QQ' * len(SECTIONS))
+
+# Alignment of every section, so the uint16 and uint32 sections can be viewed in place
+SECTION_ALIGNMENT = 8
+
+# Default extension of compiled matrix files
+MATRIX_FILE_EXTENSION = '.eaglemx'
+
+'''
+    Function: encode_string_table
+    Purpose: Returns a list of strings as a string table section.
+'''
+
+
+def encode_string_table(strings):
+    encoded = []
+    for string in strings:
+        if '\0' in string:
+            raise ValueError(f'Strings of the matrix file cannot contain NUL: {string!r}')
+        encoded.append(string.encode('utf-8') + b'\0')
+
+    offsets = array('I', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    return struct.pack('<I', len(encoded)) + to_little_endian(offsets) + b''.join(encoded)
+
+
+'''
+    Function: decode_string_table
+    Purpose: Returns the strings of a string table section.  The NUL terminators let the whole text be
+             decoded and split in one pass instead of slicing every string by its offsets.
+'''
+
+
+def decode_string_table(section):
+    count, = struct.unpack_from('<I', section)
+    if not count:
+        return []
+    text_start = 4 + (count + 1) * 4
+    strings = bytes(section[text_start:]).decode('utf-8').split('\0')
+    if len(strings) != count + 1:
+        raise ValueError('Corrupt string table in matrix file')
+    return strings[:-1]
+
+
+'''
+    Function: to_little_endian
+    Purpose: Returns the bytes of an array in little endian order whatever the byte order of the host.
+'''
+
+
+def to_little_endian(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+'''
+    Function: view_section
+    Purpose: Returns a memoryview of a section cast to an array type code.  On big endian hosts the
+             uint16/uint32 sections are copied and byte swapped instead, single bytes are always views.
+'''
+
+
+def view_section(section, typecode):
+    if sys.byteorder != 'little' and typecode not in 'bB':
+        values = array(typecode)
+        values.frombytes(section)
+        values.byteswap()
+        return values
+    return section.cast(typecode)
+
+
+'''
+    Function: write_matrix_file
+    Purpose: Write a matrix to a compact binary matrix file.  The file is written next to its final name
+             and moved into place in one step, so workers mapping the old file never see a partial one.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - path: output file.
+'''
+
+
+@timed('matrix_file.write')
+def write_matrix_file(matrix, path):
+    set_offsets = array('I', [0])
+    set_ids = array('H')
+    for footnote_ids in matrix.footnote_sets:
+        set_ids.extend(footnote_ids)
+        set_offsets.append(len(set_ids))
+
+    notes = []
+    for marker, text in matrix.exceptions.items():
+        notes.extend((marker, text))
+
+    sections = {'versions': encode_string_table(matrix.versions),
+                'devices': encode_string_table(matrix.devices),
+                'footnote_sets': to_little_endian(set_offsets) + to_little_endian(set_ids),
+                'notes': encode_string_table(notes),
+                'version_footnotes': to_little_endian(array('H', matrix.version_footnotes)),
+                'status': bytes(matrix.status),
+                'footnotes': to_little_endian(array('H', matrix.footnotes))}
+
+    layout = []
+    offset = HEADER.size
+    for name in SECTIONS:
+        offset += -offset % SECTION_ALIGNMENT
+        layout.extend((offset, len(sections[name])))
+        offset += len(sections[name])
+
+    header = HEADER.pack(MAGIC, FILE_FORMAT, 0, matrix.version_count, matrix.device_count,
+                         len(matrix.footnote_sets), len(matrix.exceptions), *layout)
+
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary_path, 'wb') as file:
+            file.write(header)
+            for name, section_offset in zip(SECTIONS, layout[::2]):
+                file.write(b'\0' * (section_offset - file.tell()))
+                file.write(sections[name])
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+    return path
+
+
+'''
+    Function: open_matrix_file
+    Purpose: Memory-map a binary matrix file read-only and return it as a CompatibilityMatrix whose
+             status and footnote grids are zero-copy views of the mapping.  The matrix is read-only,
+             apply_diff cannot patch it in place.  Raises ValueError for files of another format.
+
+            - path: binary matrix file written by write_matrix_file.
+'''
+
+
+@timed('matrix_file.open')
+def open_matrix_file(path):
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data = memoryview(mapping)
+    if len(data) < HEADER.size:
+        raise ValueError(f'{path} is not a matrix file')
+
+    magic, file_format, _, version_count, device_count, set_count, note_count, *layout = HEADER.unpack_from(data)
+    if magic != MAGIC or file_format != FILE_FORMAT:
+        raise ValueError(f'{path} is not a matrix file of format {FILE_FORMAT}')
+
+    sections = {}
+    for name, offset, length in zip(SECTIONS, layout[::2], layout[1::2]):
+        if offset + length > len(data):
+            raise ValueError(f'{path} is truncated')
+        sections[name] = data[offset:offset + length]
+
+    set_offsets = view_section(sections['footnote_sets'][:(set_count + 1) * 4], 'I')
+    set_ids = view_section(sections['footnote_sets'][(set_count + 1) * 4:], 'H')
+    footnote_sets = [tuple(set_ids[set_offsets[set_id]:set_offsets[set_id + 1]]) for set_id in range(set_count)]
+
+    notes = decode_string_table(sections['notes'])
+    exceptions = dict(zip(notes[::2], notes[1::2]))
+    if len(exceptions) != note_count:
+        raise ValueError(f'{path} has a corrupt notes section')
+
+    matrix = CompatibilityMatrix(decode_string_table(sections['versions']), decode_string_table(sections['devices']),
+                                 view_section(sections['status'], 'b'), view_section(sections['footnotes'], 'H'),
+                                 view_section(sections['version_footnotes'], 'H'), footnote_sets, exceptions)
+
+    if matrix.version_count != version_count or matrix.device_count != device_count:
+        raise ValueError(f'{path} has a corrupt header')
+
+    return matrix
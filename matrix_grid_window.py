@@ -0,0 +1,414 @@
+import tkinter as tk
+from tkinter import Canvas, Scrollbar
+import customtkinter
+
+from compatibility_matrix import NO_FOOTNOTE, STATUS_LABELS, STATUS_NO, STATUS_YES
+from version_index import parse_version
+
+# Cell size and header sizes of the grid in pixels
+CELL_WIDTH = 96
+CELL_HEIGHT = 22
+ROW_HEADER_WIDTH = 140
+COLUMN_HEADER_HEIGHT = 26
+
+# Cell colors: compatible, compatible with a footnote, not compatible, unknown
+COLOR_YES = '#9be39b'
+COLOR_YES_NOTE = '#d8e890'
+COLOR_NO = '#f0a0a0'
+COLOR_UNKNOWN = '#d0d0d0'
+COLOR_HEADER = '#a9c4d8'
+COLOR_TOOLTIP = '#ffffe0'
+
+# Separator of the device filter i.e. 'SafetyNet, MICT'
+FILTER_SEPARATOR = ','
+
+
+class MatrixGridWindow(customtkinter.CTkToplevel):
+    WIDTH = 1000
+    HEIGHT = 640
+
+    '''
+        Method: __init__
+        Purpose: Create the full matrix grid window.  Every Eagle version row is shown against every
+                 software/device column on one canvas, but only the cells that fit in the window are drawn:
+                 a fixed pool of canvas items is reconfigured as the view scrolls, so scrolling and filtering
+                 cost the same with 50 or 50,000 Eagle versions.
+
+                - app: the App owning the loaded compatibility matrix.
+    '''
+
+    def __init__(self, app):
+        super().__init__(master=app)
+        self.app = app
+
+        self.title('Compatibility Matrix')
+        self.geometry(f"{self.WIDTH}x{self.HEIGHT}")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # ============ Filters Start ============
+
+        self.filter_frame = customtkinter.CTkFrame(master=self, corner_radius=0)
+        self.filter_frame.grid(row=0, column=0, columnspan=2, sticky='ew')
+
+        self.device_filter_var = tk.StringVar()
+        self.version_from_var = tk.StringVar()
+        self.version_to_var = tk.StringVar()
+
+        for column, (text, variable, width) in enumerate((('Devices', self.device_filter_var, 260),
+                                                          ('Eagle from', self.version_from_var, 90),
+                                                          ('to', self.version_to_var, 90))):
+            customtkinter.CTkLabel(master=self.filter_frame, text=text, width=40).grid(row=0, column=column * 2,
+                                                                                     padx=(10, 2), pady=8)
+            entry = customtkinter.CTkEntry(master=self.filter_frame, textvariable=variable, width=width)
+            entry.grid(row=0, column=column * 2 + 1, padx=2, pady=8)
+            entry.bind('<Return>', self.apply_filters)
+
+        self.filter_button = customtkinter.CTkButton(master=self.filter_frame, text='Filter', width=80,
+                                                     command=self.apply_filters)
+        self.filter_button.grid(row=0, column=6, padx=10, pady=8)
+
+        self.filter_label = customtkinter.CTkLabel(master=self.filter_frame, text='')
+        self.filter_label.grid(row=0, column=7, padx=10, pady=8)
+
+        # ============ Filters End ============
+
+        # ============ Grid Start ============
+
+        self.canvas = Canvas(master=self, bg='white', highlightthickness=0)
+        self.canvas.grid(row=1, column=0, sticky='nsew')
+
+        self.vertical_scrollbar = Scrollbar(master=self, orient='vertical', command=self.scroll_rows)
+        self.vertical_scrollbar.grid(row=1, column=1, sticky='ns')
+        self.horizontal_scrollbar = Scrollbar(master=self, orient='horizontal', command=self.scroll_columns)
+        self.horizontal_scrollbar.grid(row=2, column=0, sticky='ew')
+
+        # First visible row and column of the filtered view
+        self.top_row = 0
+        self.left_column = 0
+
+        # Matrix rows and columns shown after filtering, in sheet order
+        self.rows = []
+        self.columns = []
+
+        # Pools of canvas items: [rectangle, text] per visible cell and per header, reused on every redraw
+        self.cell_items = []
+        self.row_header_items = []
+        self.column_header_items = []
+        self.tooltip_items = None
+        self.hovered_cell = None
+
+        self.canvas.bind('<Configure>', lambda event: self.render())
+        self.canvas.bind('<Motion>', self.show_tooltip)
+        self.canvas.bind('<Leave>', lambda event: self.hide_tooltip())
+        self.canvas.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.canvas.bind('<Shift-MouseWheel>', lambda event: self.scroll_columns('scroll', -event.delta // 120, 'units'))
+        self.canvas.bind('<Button-4>', lambda event: self.scroll_rows('scroll', -3, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.scroll_rows('scroll', 3, 'units'))
+
+        # ============ Grid End ============
+
+        self.apply_filters()
+
+    '''
+        Method: get_filtered_columns
+        Purpose: Returns the device columns matching the device filter, every column when it is empty.
+                 Each comma separated term matches devices containing it, ignoring case.
+    '''
+
+    def get_filtered_columns(self):
+        devices = self.app.matrix.devices
+        terms = [term.strip().lower() for term in self.device_filter_var.get().split(FILTER_SEPARATOR) if term.strip()]
+        if not terms:
+            return list(range(len(devices)))
+
+        return [column for column, device in enumerate(devices) if any(term in device.lower() for term in terms)]
+
+    '''
+        Method: get_filtered_rows
+        Purpose: Returns the Eagle version rows overlapping the version range filter, every row when it is empty.
+                 Raises ValueError when a bound is not an Eagle version.
+    '''
+
+    def get_filtered_rows(self):
+        versions = self.app.matrix.versions
+        low_text = self.version_from_var.get().strip()
+        high_text = self.version_to_var.get().strip()
+        if not low_text and not high_text:
+            return list(range(len(versions)))
+
+        low = parse_version(low_text).low if low_text else float('-inf')
+        high = parse_version(high_text).high if high_text else float('inf')
+
+        rows = []
+        for row, version in enumerate(versions):
+            try:
+                parsed = parse_version(version)
+            except ValueError:
+                continue
+            if parsed.high >= low and parsed.low <= high:
+                rows.append(row)
+        return rows
+
+    '''
+        Method: apply_filters
+        Purpose: Recompute the filtered rows and columns and redraw from the top left corner.
+    '''
+
+    def apply_filters(self, event=None):
+        try:
+            rows = self.get_filtered_rows()
+        except ValueError as error:
+            return self.filter_label.configure(text=str(error))
+
+        self.rows = rows
+        self.columns = self.get_filtered_columns()
+        self.top_row = 0
+        self.left_column = 0
+        self.filter_label.configure(text=f"{len(self.rows)} versions x {len(self.columns)} devices")
+        return self.render()
+
+    '''
+        Method: refresh
+        Purpose: Redraw after the matrix was reloaded, keeping the filters and, when possible, the scroll position.
+    '''
+
+    def refresh(self):
+        top_row, left_column = self.top_row, self.left_column
+        self.apply_filters()
+        self.top_row, self.left_column = top_row, left_column
+        return self.render()
+
+    '''
+        Method: get_visible_size
+        Purpose: Returns (rows, columns) of cells drawn in the canvas, counting a partly visible last row/column.
+    '''
+
+    def get_visible_size(self):
+        width = max(self.canvas.winfo_width() - ROW_HEADER_WIDTH, 0)
+        height = max(self.canvas.winfo_height() - COLUMN_HEADER_HEIGHT, 0)
+        return -(-height // CELL_HEIGHT), -(-width // CELL_WIDTH)
+
+    '''
+        Method: get_full_size
+        Purpose: Returns (rows, columns) of cells that fit completely in the canvas, at least one each.
+    '''
+
+    def get_full_size(self):
+        width = max(self.canvas.winfo_width() - ROW_HEADER_WIDTH, 0)
+        height = max(self.canvas.winfo_height() - COLUMN_HEADER_HEIGHT, 0)
+        return max(height // CELL_HEIGHT, 1), max(width // CELL_WIDTH, 1)
+
+    '''
+        Method: get_item_pair
+        Purpose: Returns the [rectangle, text] pair at a position of a pool, creating missing pairs.
+    '''
+
+    def get_item_pair(self, pool, position):
+        while len(pool) <= position:
+            pool.append([self.canvas.create_rectangle(0, 0, 0, 0, outline='white'),
+                         self.canvas.create_text(0, 0, anchor='w', font=('Verdana', 8))])
+        return pool[position]
+
+    '''
+        Method: place_item_pair
+        Purpose: Move a [rectangle, text] pair to a box and set its color and text.
+    '''
+
+    def place_item_pair(self, pair, x, y, width, height, color, text):
+        rectangle, label = pair
+        self.canvas.coords(rectangle, x, y, x + width, y + height)
+        self.canvas.itemconfigure(rectangle, fill=color, state='normal')
+        self.canvas.coords(label, x + 4, y + height / 2)
+        self.canvas.itemconfigure(label, text=text, state='normal')
+
+    '''
+        Method: hide_unused
+        Purpose: Hide the pairs of a pool from a position on.
+    '''
+
+    def hide_unused(self, pool, start):
+        for rectangle, label in pool[start:]:
+            self.canvas.itemconfigure(rectangle, state='hidden')
+            self.canvas.itemconfigure(label, state='hidden')
+
+    '''
+        Method: get_cell_color
+        Purpose: Returns the color of a cell from its status code and footnote set.
+    '''
+
+    def get_cell_color(self, status, footnote_set_id):
+        if status == STATUS_YES:
+            return COLOR_YES if footnote_set_id == NO_FOOTNOTE else COLOR_YES_NOTE
+        if status == STATUS_NO:
+            return COLOR_NO
+        return COLOR_UNKNOWN
+
+    '''
+        Method: render
+        Purpose: Draw the visible part of the filtered matrix: only the rows and columns that fit in the
+                 canvas are read from the matrix arrays, and the item pools are reconfigured in place.
+    '''
+
+    def render(self):
+        matrix = self.app.matrix
+        visible_rows, visible_columns = self.get_visible_size()
+        full_rows, full_columns = self.get_full_size()
+
+        # Keep the view inside the filtered matrix: at the end the last row/column is fully visible,
+        # so no blank slot is left after it (the partly visible slot only shows when the canvas has one)
+        self.top_row = max(0, min(self.top_row, len(self.rows) - full_rows))
+        self.left_column = max(0, min(self.left_column, len(self.columns) - full_columns))
+        rows = self.rows[self.top_row:self.top_row + visible_rows]
+        columns = self.columns[self.left_column:self.left_column + visible_columns]
+
+        device_count = matrix.device_count
+        status = matrix.status
+        footnotes = matrix.footnotes
+        position = 0
+
+        for y, row in enumerate(rows):
+            top = COLUMN_HEADER_HEIGHT + y * CELL_HEIGHT
+            offset = row * device_count
+            for x, column in enumerate(columns):
+                index = offset + column
+                pair = self.get_item_pair(self.cell_items, position)
+                self.place_item_pair(pair, ROW_HEADER_WIDTH + x * CELL_WIDTH, top, CELL_WIDTH, CELL_HEIGHT,
+                                     self.get_cell_color(status[index], footnotes[index]),
+                                     matrix.format_cell(status[index], footnotes[index]))
+                position += 1
+        self.hide_unused(self.cell_items, position)
+
+        # Headers are drawn after the cells so they stay on top
+        for y, row in enumerate(rows):
+            pair = self.get_item_pair(self.row_header_items, y)
+            self.place_item_pair(pair, 0, COLUMN_HEADER_HEIGHT + y * CELL_HEIGHT, ROW_HEADER_WIDTH, CELL_HEIGHT,
+                                 COLOR_HEADER, matrix.versions[row])
+            self.canvas.tag_raise(pair[0])
+            self.canvas.tag_raise(pair[1])
+        self.hide_unused(self.row_header_items, len(rows))
+
+        for x, column in enumerate(columns):
+            pair = self.get_item_pair(self.column_header_items, x)
+            self.place_item_pair(pair, ROW_HEADER_WIDTH + x * CELL_WIDTH, 0, CELL_WIDTH, COLUMN_HEADER_HEIGHT,
+                                 COLOR_HEADER, matrix.devices[column])
+            self.canvas.tag_raise(pair[0])
+            self.canvas.tag_raise(pair[1])
+        self.hide_unused(self.column_header_items, len(columns))
+
+        self.vertical_scrollbar.set(*self.get_scroll_fractions(self.top_row, visible_rows, len(self.rows)))
+        self.horizontal_scrollbar.set(*self.get_scroll_fractions(self.left_column, visible_columns, len(self.columns)))
+        self.hovered_cell = None
+        return self.hide_tooltip()
+
+    '''
+        Method: get_scroll_fractions
+        Purpose: Returns the (first, last) scrollbar fractions of a view.
+    '''
+
+    def get_scroll_fractions(self, first, visible, total):
+        if total == 0:
+            return 0.0, 1.0
+        return first / total, min(1.0, (first + visible) / total)
+
+    '''
+        Method: scroll
+        Purpose: Returns the new first row/column of a scrollbar command ('moveto' or 'scroll').
+    '''
+
+    def scroll(self, first, visible, total, action, amount, unit=None):
+        if action == 'moveto':
+            return int(float(amount) * total)
+        step = max(visible - 1, 1) if unit == 'pages' else 1
+        return first + int(amount) * step
+
+    '''
+        Method: scroll_rows
+        Purpose: Vertical scrollbar and mouse wheel command.
+    '''
+
+    def scroll_rows(self, action, amount, unit=None):
+        self.top_row = self.scroll(self.top_row, self.get_visible_size()[0], len(self.rows), action, amount, unit)
+        return self.render()
+
+    '''
+        Method: scroll_columns
+        Purpose: Horizontal scrollbar command.
+    '''
+
+    def scroll_columns(self, action, amount, unit=None):
+        self.left_column = self.scroll(self.left_column, self.get_visible_size()[1], len(self.columns),
+                                       action, amount, unit)
+        return self.render()
+
+    '''
+        Method: on_mouse_wheel
+        Purpose: Scroll three rows per wheel step.
+    '''
+
+    def on_mouse_wheel(self, event):
+        return self.scroll_rows('scroll', -3 if event.delta > 0 else 3, 'units')
+
+    '''
+        Method: get_cell_at
+        Purpose: Returns the (row, column) of the matrix under a canvas position, or None over the headers.
+    '''
+
+    def get_cell_at(self, x, y):
+        if x < ROW_HEADER_WIDTH or y < COLUMN_HEADER_HEIGHT:
+            return None
+
+        position_y = self.top_row + int((y - COLUMN_HEADER_HEIGHT) // CELL_HEIGHT)
+        position_x = self.left_column + int((x - ROW_HEADER_WIDTH) // CELL_WIDTH)
+        if position_y >= len(self.rows) or position_x >= len(self.columns):
+            return None
+        return self.rows[position_y], self.columns[position_x]
+
+    '''
+        Method: show_tooltip
+        Purpose: Show the footnote text of the cell under the mouse.
+    '''
+
+    def show_tooltip(self, event):
+        cell = self.get_cell_at(event.x, event.y)
+        if cell == self.hovered_cell:
+            return None
+        self.hovered_cell = cell
+
+        if cell is None:
+            return self.hide_tooltip()
+
+        matrix = self.app.matrix
+        version, device = matrix.versions[cell[0]], matrix.devices[cell[1]]
+        index = cell[0] * matrix.device_count + cell[1]
+        notes = matrix.get_notes(version, device)
+        text = f"{version} / {device}: {STATUS_LABELS[matrix.status[index]]}"
+        if notes:
+            text += '\n' + '\n'.join(notes)
+
+        if self.tooltip_items is None:
+            self.tooltip_items = [self.canvas.create_rectangle(0, 0, 0, 0, fill=COLOR_TOOLTIP, outline='gray40'),
+                                  self.canvas.create_text(0, 0, anchor='nw', font=('Verdana', 8), width=320)]
+        rectangle, label = self.tooltip_items
+
+        # Keep the tooltip inside the canvas
+        self.canvas.itemconfigure(label, text=text, state='normal')
+        self.canvas.coords(label, 0, 0)
+        left, top, right, bottom = self.canvas.bbox(label)
+        x = min(event.x + 12, max(self.canvas.winfo_width() - (right - left) - 8, 0))
+        y = min(event.y + 12, max(self.canvas.winfo_height() - (bottom - top) - 8, 0))
+        self.canvas.coords(label, x + 4, y + 2)
+        self.canvas.coords(rectangle, x, y, x + (right - left) + 8, y + (bottom - top) + 4)
+        self.canvas.itemconfigure(rectangle, state='normal')
+        self.canvas.tag_raise(rectangle)
+        return self.canvas.tag_raise(label)
+
+    '''
+        Method: hide_tooltip
+        Purpose: Hide the footnote tooltip.
+    '''
+
+    def hide_tooltip(self):
+        if self.tooltip_items is not None:
+            for item in self.tooltip_items:
+                self.canvas.itemconfigure(item, state='hidden')
@@ -0,0 +1,435 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+from collections import namedtuple
+
+from compatibility_matrix import (DEFAULT_STORE_PATH, STATUS_LABELS, STATUS_YES, CompatibilityMatrix,
+                                  parse_footnote_ids, process_excel_file)
+from instrumentation import timed
+from version_index import parse_number, parse_version
+
+# Hash workbooks in 1 MiB blocks
+HASH_BLOCK_SIZE = 1 << 20
+
+# Timestamps are stored as naive UTC text in this layout, so they sort and compare as strings
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Normalized schema: every version label and device name is stored once, cells hold one row per
+# (revision, version, device) and only cells with footnotes get rows in cell_footnotes.
+# The primary keys are the lookup indexes, so a cell of any revision is found with one B-tree search.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    effective_at TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    version_count INTEGER NOT NULL,
+    device_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS revisions_effective_at ON revisions (effective_at, id);
+
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    base TEXT NOT NULL,
+    low INTEGER,
+    high INTEGER
+);
+CREATE INDEX IF NOT EXISTS versions_base ON versions (base);
+CREATE INDEX IF NOT EXISTS versions_low ON versions (low, high);
+
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS revision_versions (
+    revision_id INTEGER NOT NULL REFERENCES revisions (id),
+    version_id INTEGER NOT NULL REFERENCES versions (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (revision_id, version_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS revision_devices (
+    revision_id INTEGER NOT NULL REFERENCES revisions (id),
+    device_id INTEGER NOT NULL REFERENCES devices (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (revision_id, device_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cells (
+    revision_id INTEGER NOT NULL REFERENCES revisions (id),
+    version_id INTEGER NOT NULL REFERENCES versions (id),
+    device_id INTEGER NOT NULL REFERENCES devices (id),
+    status INTEGER NOT NULL,
+    PRIMARY KEY (revision_id, version_id, device_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cell_footnotes (
+    revision_id INTEGER NOT NULL,
+    version_id INTEGER NOT NULL,
+    device_id INTEGER NOT NULL,
+    footnote_id INTEGER NOT NULL,
+    PRIMARY KEY (revision_id, version_id, device_id, footnote_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS footnotes (
+    revision_id INTEGER NOT NULL REFERENCES revisions (id),
+    footnote_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (revision_id, footnote_id)
+) WITHOUT ROWID;
+'''
+
+# Imported workbook revision, effective_at is when it came into force (UTC)
+Revision = namedtuple('Revision', ['id', 'content_hash', 'source', 'effective_at', 'imported_at',
+                                   'version_count', 'device_count'])
+
+# Answer of a store lookup, matched_version is the listed version the queried one resolved to and
+# status its label ('Yes', 'No' or ''), the same shape as the query command's results
+StoreResult = namedtuple('StoreResult', ['revision_id', 'effective_at', 'version', 'matched_version', 'device',
+                                         'status', 'compatible', 'footnote_ids', 'notes'])
+
+'''
+    Function: hash_workbook
+    Purpose: Returns the SHA-256 content hash of a workbook, the identity of a revision in the store.
+'''
+
+
+def hash_workbook(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+'''
+    Function: parse_timestamp
+    Purpose: Returns a timestamp in TIMESTAMP_FORMAT.  Accepts datetime/date objects and ISO text
+             i.e. '2026-03-15' or '2026-03-15T08:30:00+01:00'; aware times are converted to UTC and naive
+             ones are taken as UTC.
+
+            - value: timestamp to normalize.
+            - end_of_day: a bare date means the end of that day instead of its start, so '2026-03-31'
+                          as an as-of date includes the revisions that came into force that day.
+'''
+
+
+def parse_timestamp(value, end_of_day=False):
+    if isinstance(value, str):
+        text = value.strip()
+        value = datetime.datetime.fromisoformat(text) if 'T' in text or ' ' in text or ':' in text \
+            else datetime.date.fromisoformat(text)
+
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.max if end_of_day else datetime.time.min)
+
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+'''
+    Function: get_version_bounds
+    Purpose: Returns (base, low, high) of an Eagle version label, low and high are None when the label
+             is not a version number.
+'''
+
+
+def get_version_bounds(label):
+    try:
+        parsed = parse_version(label)
+    except ValueError:
+        return label, None, None
+    return parsed.base, parsed.low, parsed.high
+
+
+class MatrixStore:
+    '''
+        Method: __init__
+        Purpose: Open (or create) the SQLite store of imported workbook revisions.  Every revision is kept
+                 in normalized tables, so a lookup against the current revision or the one in force at
+                 any past date goes through the primary key indexes.
+
+                - path: SQLite database file, ':memory:' for a temporary store.
+    '''
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    '''
+        Method: close
+        Purpose: Close the database connection.
+    '''
+
+    def close(self):
+        self.connection.close()
+
+    '''
+        Method: find_revision_by_hash
+        Purpose: Returns the ID of the revision with a content hash, or None if it was never imported.
+    '''
+
+    def find_revision_by_hash(self, content_hash):
+        row = self.connection.execute('SELECT id FROM revisions WHERE content_hash = ?', (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    '''
+        Method: import_workbook
+        Purpose: Import a workbook revision and return (revision ID, imported).  A workbook whose content
+                 hash is already stored is neither parsed nor inserted again, imported is then False.
+
+                - file_path: path of the Excel workbook.
+                - effective_at: when the revision came into force, the modification time of the file by default.
+    '''
+
+    @timed('store.import_workbook')
+    def import_workbook(self, file_path, effective_at=None):
+        content_hash = hash_workbook(file_path)
+        revision_id = self.find_revision_by_hash(content_hash)
+        if revision_id is not None:
+            return revision_id, False
+
+        if effective_at is None:
+            effective_at = datetime.datetime.fromtimestamp(os.stat(file_path).st_mtime, datetime.timezone.utc)
+
+        matrix = process_excel_file(file_path)
+        return self.import_matrix(matrix, content_hash, os.path.realpath(file_path), effective_at), True
+
+    '''
+        Method: get_version_ids
+        Purpose: Returns {label: id} of Eagle version labels, inserting the labels seen for the first time.
+    '''
+
+    def get_version_ids(self, labels):
+        cursor = self.connection.cursor()
+        cursor.executemany('INSERT OR IGNORE INTO versions (label, base, low, high) VALUES (?, ?, ?, ?)',
+                           ((label,) + get_version_bounds(label) for label in labels))
+        return dict(cursor.execute('SELECT label, id FROM versions'))
+
+    '''
+        Method: get_device_ids
+        Purpose: Returns {name: id} of device names, inserting the names seen for the first time.
+    '''
+
+    def get_device_ids(self, names):
+        cursor = self.connection.cursor()
+        cursor.executemany('INSERT OR IGNORE INTO devices (name) VALUES (?)', ((name,) for name in names))
+        return dict(cursor.execute('SELECT name, id FROM devices'))
+
+    '''
+        Method: import_matrix
+        Purpose: Insert a parsed matrix as a new revision with bulk inserts in one transaction and return its ID.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+                - content_hash: content hash identifying the revision.
+                - source: where the revision came from i.e. the workbook path.
+                - effective_at: when the revision came into force, see parse_timestamp.
+    '''
+
+    @timed('store.import_matrix')
+    def import_matrix(self, matrix, content_hash, source, effective_at):
+        imported_at = parse_timestamp(datetime.datetime.now(datetime.timezone.utc))
+
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO revisions (content_hash, source, effective_at, imported_at, version_count, device_count) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (content_hash, source, parse_timestamp(effective_at), imported_at,
+                 matrix.version_count, matrix.device_count))
+            revision_id = cursor.lastrowid
+
+            version_ids = self.get_version_ids(matrix.versions)
+            device_ids = self.get_device_ids(matrix.devices)
+            row_ids = [version_ids[version] for version in matrix.versions]
+            column_ids = [device_ids[device] for device in matrix.devices]
+
+            cursor.executemany('INSERT INTO revision_versions VALUES (?, ?, ?)',
+                               ((revision_id, version_id, row) for row, version_id in enumerate(row_ids)))
+            cursor.executemany('INSERT INTO revision_devices VALUES (?, ?, ?)',
+                               ((revision_id, device_id, column) for column, device_id in enumerate(column_ids)))
+
+            device_count = matrix.device_count
+            cursor.executemany('INSERT INTO cells VALUES (?, ?, ?, ?)',
+                               ((revision_id, row_ids[index // device_count], column_ids[index % device_count], code)
+                                for index, code in enumerate(matrix.status)))
+
+            footnote_sets = matrix.footnote_sets
+            cursor.executemany('INSERT INTO cell_footnotes VALUES (?, ?, ?, ?)',
+                               ((revision_id, row_ids[index // device_count], column_ids[index % device_count],
+                                 footnote_id)
+                                for index, set_id in enumerate(matrix.footnotes) if set_id
+                                for footnote_id in footnote_sets[set_id]))
+
+            cursor.executemany('INSERT INTO footnotes VALUES (?, ?, ?)',
+                               ((revision_id, int(marker.strip('[]')), text)
+                                for marker, text in matrix.exceptions.items()))
+
+        return revision_id
+
+    '''
+        Method: get_revisions
+        Purpose: Returns every imported Revision, oldest in force first.
+    '''
+
+    def get_revisions(self):
+        return [Revision(*row) for row in self.connection.execute(
+            'SELECT * FROM revisions ORDER BY effective_at, id')]
+
+    '''
+        Method: get_revision
+        Purpose: Returns the Revision in force at a point in time, the latest one when as_of is None,
+                 or None when no revision was in force yet.
+
+                - as_of: date or timestamp, see parse_timestamp.
+    '''
+
+    def get_revision(self, as_of=None):
+        if as_of is None:
+            row = self.connection.execute('SELECT * FROM revisions ORDER BY effective_at DESC, id DESC LIMIT 1')
+        else:
+            row = self.connection.execute('SELECT * FROM revisions WHERE effective_at <= ? '
+                                          'ORDER BY effective_at DESC, id DESC LIMIT 1',
+                                          (parse_timestamp(as_of, end_of_day=True),))
+        row = row.fetchone()
+        return Revision(*row) if row else None
+
+    '''
+        Method: resolve_version
+        Purpose: Returns (version ID, label) of the listed version of a revision a raw version resolves to,
+                 or None.  Tries the listed spelling, then the label without footnotes i.e. 'V2120' ->
+                 'V2120[3]', then the numeric ranges i.e. 'V1150' -> 'V1002 – V1303'.
+
+                - revision_id: revision to search.
+                - version: Eagle version label or raw version string.
+    '''
+
+    def resolve_version(self, revision_id, version):
+        listed = ('SELECT v.id, v.label FROM versions v JOIN revision_versions r '
+                  'ON r.version_id = v.id AND r.revision_id = ? ')
+
+        row = self.connection.execute(listed + 'WHERE v.label = ?', (revision_id, version)).fetchone()
+        if row is None:
+            row = self.connection.execute(listed + 'WHERE v.base = ? ORDER BY r.position LIMIT 1',
+                                          (revision_id, version.strip())).fetchone()
+        if row is None:
+            try:
+                number = parse_number(version)
+            except ValueError:
+                return None
+
+            # Listed versions never overlap, so only the highest lower bound <= number can contain it.
+            # Walking versions_low downwards (CROSS JOIN keeps it the outer loop) stops at the first listed one.
+            row = self.connection.execute('SELECT v.id, v.label, v.high FROM versions v CROSS JOIN revision_versions r '
+                                          'ON r.version_id = v.id AND r.revision_id = ? '
+                                          'WHERE v.low <= ? ORDER BY v.low DESC LIMIT 1',
+                                          (revision_id, number)).fetchone()
+            if row is None or row[2] < number:
+                return None
+            row = row[:2]
+        return row
+
+    '''
+        Method: query
+        Purpose: Answer a compatibility query against the current revision, the one in force at as_of,
+                 or a given revision.  Raises KeyError when there is no such revision, version or device.
+
+                - version: Eagle version i.e. 'V1748', raw versions resolve like in the sheet.
+                - device: software/device i.e. 'Sketch'
+                - as_of: date or timestamp, see get_revision.
+                - revision_id: revision to query, overrides as_of.
+    '''
+
+    @timed('store.query')
+    def query(self, version, device, as_of=None, revision_id=None):
+        if revision_id is None:
+            revision = self.get_revision(as_of)
+            if revision is None:
+                raise KeyError(f'No revision in force at {as_of}')
+        else:
+            row = self.connection.execute('SELECT * FROM revisions WHERE id = ?', (revision_id,)).fetchone()
+            if row is None:
+                raise KeyError(f'Unknown revision {revision_id}')
+            revision = Revision(*row)
+
+        resolved = self.resolve_version(revision.id, version)
+        if resolved is None:
+            raise KeyError(version)
+        version_id, label = resolved
+
+        row = self.connection.execute('SELECT d.id, c.status FROM devices d JOIN cells c ON c.device_id = d.id '
+                                      'AND c.revision_id = ? AND c.version_id = ? WHERE d.name = ?',
+                                      (revision.id, version_id, device)).fetchone()
+        if row is None:
+            raise KeyError(device)
+        device_id, status = row
+
+        footnote_ids = tuple(footnote_id for footnote_id, in self.connection.execute(
+            'SELECT footnote_id FROM cell_footnotes WHERE revision_id = ? AND version_id = ? AND device_id = ? '
+            'ORDER BY footnote_id', (revision.id, version_id, device_id)))
+
+        # Version footnotes first, then the cell's, the same order the GUI shows them in
+        notes = []
+        for footnote_id in parse_footnote_ids(label) + footnote_ids:
+            text = self.connection.execute('SELECT text FROM footnotes WHERE revision_id = ? AND footnote_id = ?',
+                                           (revision.id, footnote_id)).fetchone()
+            if text:
+                notes.append(text[0])
+
+        return StoreResult(revision.id, revision.effective_at, version, label, device, STATUS_LABELS[status],
+                           status == STATUS_YES, footnote_ids, notes)
+
+    '''
+        Method: load_matrix
+        Purpose: Rebuild the CompatibilityMatrix of a stored revision, i.e. to diff two historical revisions.
+    '''
+
+    def load_matrix(self, revision_id):
+        versions = [label for label, in self.connection.execute(
+            'SELECT v.label FROM revision_versions r JOIN versions v ON v.id = r.version_id '
+            'WHERE r.revision_id = ? ORDER BY r.position', (revision_id,))]
+        devices = [name for name, in self.connection.execute(
+            'SELECT d.name FROM revision_devices r JOIN devices d ON d.id = r.device_id '
+            'WHERE r.revision_id = ? ORDER BY r.position', (revision_id,))]
+        if not versions:
+            raise KeyError(f'Unknown revision {revision_id}')
+
+        footnote_ids = {}
+        for version_id, device_id, footnote_id in self.connection.execute(
+                'SELECT version_id, device_id, footnote_id FROM cell_footnotes WHERE revision_id = ? '
+                'ORDER BY version_id, device_id, footnote_id', (revision_id,)):
+            footnote_ids.setdefault((version_id, device_id), []).append(footnote_id)
+
+        # Cells in sheet order, turned back into their Excel text so the matrix is built like a parsed workbook
+        cells = self.connection.execute(
+            'SELECT c.version_id, c.device_id, c.status FROM cells c '
+            'JOIN revision_versions rv ON rv.revision_id = c.revision_id AND rv.version_id = c.version_id '
+            'JOIN revision_devices rd ON rd.revision_id = c.revision_id AND rd.device_id = c.device_id '
+            'WHERE c.revision_id = ? ORDER BY rv.position, rd.position', (revision_id,))
+
+        def iter_records():
+            device_count = len(devices)
+            for version in versions:
+                values = []
+                for version_id, device_id, status in cells.fetchmany(device_count):
+                    cell_footnote_ids = footnote_ids.get((version_id, device_id), ())
+                    markers = ''.join(f'[{footnote_id}]' for footnote_id in cell_footnote_ids)
+                    values.append(STATUS_LABELS[status] + markers or None)
+                yield version, values
+
+        exceptions = {f'[{footnote_id}]': text for footnote_id, text in self.connection.execute(
+            'SELECT footnote_id, text FROM footnotes WHERE revision_id = ? ORDER BY footnote_id', (revision_id,))}
+        return CompatibilityMatrix.from_records(devices, iter_records(), exceptions)
@@ -0,0 +1,81 @@
+import os
+import threading
+
+
+class WorkbookWatcher:
+    '''
+        Method: __init__
+        Purpose: Create a watcher that polls a workbook and calls on_change on the watcher thread
+                 whenever its size or mtime changes.
+
+                - file_path: path of the Excel workbook.
+                - on_change: callable without arguments, called after the workbook changed.
+                - interval: seconds between two polls.
+    '''
+
+    def __init__(self, file_path, on_change, interval=2.0):
+        self.file_path = file_path
+        self.on_change = on_change
+        self.interval = interval
+
+        self.signature = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    '''
+        Method: get_signature
+        Purpose: Returns (size, mtime) of the workbook or None while it does not exist,
+                 i.e. while it is being replaced.
+    '''
+
+    def get_signature(self):
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    '''
+        Method: start
+        Purpose: Remember the current state of the workbook and start polling it.
+    '''
+
+    def start(self):
+        self.signature = self.get_signature()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name='workbook-watcher', daemon=True)
+        return self.thread.start()
+
+    '''
+        Method: stop
+        Purpose: Stop polling the workbook.
+    '''
+
+    def stop(self):
+        return self.stop_event.set()
+
+    '''
+        Method: run
+        Purpose: Poll loop of the watcher thread.  A change is only reported once the workbook
+                 has looked the same for two polls in a row, so a workbook that is still being
+                 copied onto a network share is not parsed half-written.
+    '''
+
+    def run(self):
+        pending = None
+
+        while not self.stop_event.wait(self.interval):
+            signature = self.get_signature()
+
+            if signature is None or signature == self.signature:
+                pending = None
+                continue
+
+            # Still being written, wait for the next poll
+            if signature != pending:
+                pending = signature
+                continue
+
+            self.signature = signature
+            pending = None
+            self.on_change()
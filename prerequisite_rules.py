@@ -0,0 +1,109 @@
+'''
+    Structured prerequisite rules compiled from the footnote text of the matrix.
+
+    Footnotes like 'Requires minimum SafetyNet V4400' or 'Requires minimum IB-Pro V205X, requires minimum
+    Radius-7 BB V2015 to support all features' are parsed once into PrerequisiteRule constraints on the
+    firmware version of a device or component.  Footnotes that do not constrain a peripheral
+    (i.e. 'Minimum Eagle version to support PSN V5647') are kept as text only.
+'''
+
+import re
+from collections import namedtuple
+
+from version_index import parse_number
+
+# Comparison of the compiled rules: the installed firmware must be at least the rule version
+OPERATOR_MINIMUM = '>='
+
+# Severity of a rule: the firmware is needed at all, or only to support every feature
+SEVERITY_REQUIRED = 'required'
+SEVERITY_ALL_FEATURES = 'all_features'
+
+# One minimum firmware clause i.e. 'Requires minimum Radius-7 BB V2015', 'minimum BBV202x', 'Requires Sedline V1203'.
+# The component is one or two words directly followed by its version, wildcard digits are written x or X.
+CLAUSE_PATTERN = re.compile(r'(?i:requires\s+minimum|requires|minimum)\s+'
+                            r'(?P<component>[A-Za-z][\w\-]*?(?: [A-Za-z][\w\-]*?)?)\s*'
+                            r'V(?P<version>\d[\dXx.]*)')
+
+# Phrases marking a clause as only needed for the full feature set
+ALL_FEATURES_PATTERN = re.compile(r'all (?:\w+ )?(?:features|enhancements)', re.IGNORECASE)
+
+# Compiled rule of one footnote clause, version is the numeric minimum and version_label the text i.e. 'V205X'
+PrerequisiteRule = namedtuple('PrerequisiteRule', ['footnote_id', 'component', 'operator', 'version',
+                                                   'version_label', 'severity', 'text'])
+
+'''
+    Function: normalize_component
+    Purpose: Returns the key a component name is matched on, so 'Safety Net', 'SafetyNet' and 'safetynet'
+             or 'Sedline' and 'SedLine' refer to the same inventory column.
+
+            - name: device or component name.
+'''
+
+
+def normalize_component(name):
+    return re.sub(r'[\s\-_]+', '', str(name)).lower()
+
+
+'''
+    Function: parse_firmware_version
+    Purpose: Returns the numeric build of a firmware version i.e. 2015 for 'V2015', 2028 for 'V2.0.2.8'
+             and 2050 for the wildcard 'V205X' (wildcard digits count as 0, the lowest build they match).
+
+            - text: firmware version text.
+'''
+
+
+def parse_firmware_version(text):
+    return parse_number(re.sub('[Xx]', '0', str(text)))
+
+
+'''
+    Function: parse_rules
+    Purpose: Returns the PrerequisiteRules of one footnote.  The text is split into sentences at commas,
+             a sentence mentioning 'all features' marks all of its clauses as SEVERITY_ALL_FEATURES.
+
+            - footnote_id: footnote number i.e. 10 for '[10]'.
+            - text: footnote text.
+'''
+
+
+def parse_rules(footnote_id, text):
+    rules = []
+
+    for sentence in text.split(','):
+        severity = SEVERITY_ALL_FEATURES if ALL_FEATURES_PATTERN.search(sentence) else SEVERITY_REQUIRED
+
+        for match in CLAUSE_PATTERN.finditer(sentence):
+            version_label = 'V' + match.group('version').rstrip('.')
+            try:
+                version = parse_firmware_version(version_label)
+            except ValueError:
+                continue
+            rules.append(PrerequisiteRule(footnote_id, match.group('component'), OPERATOR_MINIMUM, version,
+                                          version_label, severity, text))
+
+    return rules
+
+
+'''
+    Function: compile_rules
+    Purpose: Returns (rules, notes_without_rules) for a footnote dictionary: the PrerequisiteRules of every
+             footnote, ordered by footnote ID, and the footnote markers that did not yield any rule.
+
+            - exceptions: dictionary of footnote markers i.e. '[4]' to footnote text.
+'''
+
+
+def compile_rules(exceptions):
+    rules = []
+    notes_without_rules = []
+
+    for marker, text in sorted(exceptions.items(), key=lambda item: int(item[0].strip('[]'))):
+        footnote_rules = parse_rules(int(marker.strip('[]')), text)
+        if footnote_rules:
+            rules.extend(footnote_rules)
+        else:
+            notes_without_rules.append(marker)
+
+    return rules, notes_without_rules
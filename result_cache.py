@@ -0,0 +1,140 @@
+from collections import OrderedDict
+
+from instrumentation import METRICS, timed
+
+# Matrices up to this many cells have every answer built when the cache is reset
+PRECOMPUTE_CELL_LIMIT = 100000
+
+# Most answers kept for larger matrices, the least recently used ones are evicted first
+DEFAULT_CAPACITY = 4096
+
+
+class ResultCache:
+    '''
+        Method: __init__
+        Purpose: Create a cache of finished answers keyed by (matrix revision, version, device).
+                 One revision is cached at a time: the table is tagged with the matrix object and its
+                 revision counter, and the first lookup against another matrix or revision drops it,
+                 so a repeated query costs two identity checks and one dictionary lookup.
+
+                 Small matrices are precomputed eagerly on reset, larger ones fill a bounded LRU.
+
+                - build_result: function(matrix, version, device) returning the answer to cache,
+                                it may raise KeyError for unknown versions or devices.
+                - capacity: most answers kept in LRU mode.
+                - precompute_limit: matrices up to this many cells are precomputed, 0 disables it.
+    '''
+
+    def __init__(self, build_result, capacity=DEFAULT_CAPACITY, precompute_limit=PRECOMPUTE_CELL_LIMIT):
+        self.build_result = build_result
+        self.capacity = capacity
+        self.precompute_limit = precompute_limit
+
+        # Matrix and revision the cached answers belong to
+        self.matrix = None
+        self.revision = None
+
+        # (version, device) -> answer, an OrderedDict in LRU mode
+        self.results = {}
+        self.precomputed = False
+
+        # Statistics since the cache was created
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    '''
+        Method: precompute
+        Purpose: Returns every answer of a matrix small enough to be precomputed, or None for larger ones.
+                 It only reads the matrix, so a loader thread can build the table and hand it to reset.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+    '''
+
+    @timed('results.precompute')
+    def precompute(self, matrix):
+        if matrix.version_count * matrix.device_count > self.precompute_limit:
+            return None
+
+        build_result = self.build_result
+        return {(version, device): build_result(matrix, version, device)
+                for version in matrix.versions for device in matrix.devices}
+
+    '''
+        Method: reset
+        Purpose: Drop every cached answer and bind the cache to a matrix revision.  Matrices small enough
+                 are precomputed right away, so every Submit afterwards is a hit.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+                - results: table returned by precompute for a matrix with the same cells, built off the
+                           calling thread.  None precomputes here when the matrix is small enough.
+    '''
+
+    def reset(self, matrix, results=None):
+        if self.matrix is not None:
+            self.invalidations += 1
+            METRICS.count('results.invalidations')
+
+        self.matrix = matrix
+        self.revision = matrix.revision
+
+        if results is None:
+            results = self.precompute(matrix)
+
+        self.precomputed = results is not None
+        self.results = results if self.precomputed else OrderedDict()
+
+    '''
+        Method: get
+        Purpose: Returns the answer of a version/device pair of a matrix, building and caching it on a miss.
+                 Raises KeyError for unknown versions or devices, errors are never cached.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix the answer must come from.
+                - version: Eagle version i.e. 'V1412'
+                - device: software/device i.e. 'SafetyNet'
+    '''
+
+    def get(self, matrix, version, device):
+        if matrix is not self.matrix or matrix.revision != self.revision:
+            self.reset(matrix)
+
+        key = (version, device)
+        result = self.results.get(key)
+
+        if result is not None:
+            self.hits += 1
+            METRICS.count('results.hits')
+            if not self.precomputed:
+                self.results.move_to_end(key)
+            return result
+
+        self.misses += 1
+        METRICS.count('results.misses')
+        result = self.build_result(matrix, version, device)
+
+        # A precomputed table already holds every valid pair, only the LRU grows
+        if not self.precomputed:
+            self.results[key] = result
+            if len(self.results) > self.capacity:
+                self.results.popitem(last=False)
+                self.evictions += 1
+                METRICS.count('results.evictions')
+
+        return result
+
+    '''
+        Method: get_stats
+        Purpose: Returns the hit/miss statistics and the current size of the cache.
+    '''
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {'mode': 'precomputed' if self.precomputed else 'lru',
+                'size': len(self.results),
+                'capacity': None if self.precomputed else self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations}
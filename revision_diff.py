@@ -0,0 +1,238 @@
+'''
+    Revision diff between two compatibility workbooks.
+
+    Both workbooks are streamed into compact matrices, every Eagle version row is reduced to a
+    16 byte digest of its packed status and footnote cells, and only the rows whose digests differ
+    are compared cell by cell.  Rows are keyed by Eagle version without its footnote, so a version
+    whose own footnote changed ('V2120[3]' -> 'V2120[4]') is reported as a change, not as a
+    removed and an added version.
+'''
+
+import hashlib
+
+from compatibility_matrix import FOOTNOTE_PATTERN, STATUS_LABELS, load_matrix
+from instrumentation import timed
+
+# Size of the row digests in bytes
+DIGEST_SIZE = 16
+
+'''
+    Function: get_version_keys
+    Purpose: Returns {key: row} of a matrix, the key of a version is its label without footnotes
+             i.e. 'V2120' for 'V2120[3]'.  Labels that would collide keep their full spelling.
+'''
+
+
+def get_version_keys(matrix):
+    keys = {}
+    for row, version in enumerate(matrix.versions):
+        key = FOOTNOTE_PATTERN.sub('', version).strip()
+        keys[version if key in keys else key] = row
+    return keys
+
+
+'''
+    Function: get_footnote_translation
+    Purpose: Returns the footnote set IDs of the new matrix translated to those of the old one, so the
+             packed footnote cells of both can be compared, or None when both use the same footnote sets.
+             Sets only used by the new matrix get IDs past the end of the old table.
+'''
+
+
+def get_footnote_translation(old, new):
+    if old.footnote_sets == new.footnote_sets:
+        return None
+
+    old_ids = {footnote_ids: set_id for set_id, footnote_ids in enumerate(old.footnote_sets)}
+    translation = []
+    for footnote_ids in new.footnote_sets:
+        if footnote_ids not in old_ids:
+            old_ids[footnote_ids] = len(old_ids)
+        translation.append(old_ids[footnote_ids])
+    return translation
+
+
+'''
+    Function: get_row_digests
+    Purpose: Returns one digest per Eagle version row over the given device columns.  When the columns are
+             the whole row in order and no translation is needed the packed row slices are hashed as they are.
+             Otherwise the columns are gathered and the footnote set IDs translated for the whole grid at once
+             with NumPy, and the rows of the result are hashed the same way.
+
+            - matrix: compatibility_matrix.CompatibilityMatrix.
+            - columns: device columns to hash, in the order shared by both revisions.
+            - translation: footnote set ID translation, see get_footnote_translation.
+'''
+
+
+def get_row_digests(matrix, columns, translation=None):
+    if translation is None and columns == list(range(matrix.device_count)):
+        status = matrix.status
+        footnotes = matrix.footnotes
+        row_slices = (matrix.get_row_slice(row) for row in range(matrix.version_count))
+        rows = ((status[row_slice].tobytes(), footnotes[row_slice].tobytes()) for row_slice in row_slices)
+    else:
+        import numpy as np
+
+        status, footnotes = matrix.as_numpy()
+        columns = np.array(columns, dtype=np.intp)
+        status = status[:, columns].tobytes()
+        footnotes = footnotes[:, columns]
+        if translation is not None:
+            footnotes = np.array(translation, dtype=np.uint16)[footnotes]
+        footnotes = footnotes.tobytes()
+
+        # Row major bytes of the gathered grids, one int8 and one uint16 per column
+        status_size, footnote_size = len(columns), len(columns) * 2
+        rows = ((status[row * status_size:(row + 1) * status_size],
+                 footnotes[row * footnote_size:(row + 1) * footnote_size]) for row in range(matrix.version_count))
+
+    return [hashlib.blake2b(row_status + row_footnotes, digest_size=DIGEST_SIZE).digest()
+            for row_status, row_footnotes in rows]
+
+
+'''
+    Function: diff_notes
+    Purpose: Returns the footnotes whose text was added, removed or changed between two revisions.
+'''
+
+
+def diff_notes(old_notes, new_notes):
+    changes = []
+    for marker in sorted(set(old_notes) | set(new_notes), key=lambda marker: int(marker.strip('[]'))):
+        old_text, new_text = old_notes.get(marker), new_notes.get(marker)
+        if old_text != new_text:
+            changes.append({'footnote': marker, 'old': old_text, 'new': new_text})
+    return changes
+
+
+'''
+    Function: diff_matrices
+    Purpose: Returns the differences between two revisions of the matrix as a JSON serializable dictionary:
+             added/removed versions and devices, versions whose own footnote changed, flipped cells
+             (status changed), cells whose footnotes changed and footnote text changes.
+
+            - old: CompatibilityMatrix of the older revision.
+            - new: CompatibilityMatrix of the newer revision.
+'''
+
+
+@timed('diff.matrices')
+def diff_matrices(old, new):
+    old_keys = get_version_keys(old)
+    new_keys = get_version_keys(new)
+
+    shared_devices = [device for device in new.devices if device in old.device_index]
+    old_columns = [old.device_index[device] for device in shared_devices]
+    new_columns = [new.device_index[device] for device in shared_devices]
+
+    old_digests = get_row_digests(old, old_columns)
+    new_digests = get_row_digests(new, new_columns, get_footnote_translation(old, new))
+
+    version_footnote_changes = []
+    flipped_cells = []
+    footnote_changes = []
+    changed_versions = []
+
+    for key, new_row in new_keys.items():
+        old_row = old_keys.get(key)
+        if old_row is None:
+            continue
+
+        old_version, new_version = old.versions[old_row], new.versions[new_row]
+        if old_version != new_version:
+            version_footnote_changes.append({'version': key, 'old': old_version, 'new': new_version})
+
+        # Identical digests mean identical rows, only the others are compared cell by cell
+        if old_digests[old_row] == new_digests[new_row]:
+            continue
+        changed_versions.append(key)
+
+        old_offset = old_row * old.device_count
+        new_offset = new_row * new.device_count
+        for device, old_column, new_column in zip(shared_devices, old_columns, new_columns):
+            old_status, new_status = old.status[old_offset + old_column], new.status[new_offset + new_column]
+            old_set, new_set = old.footnotes[old_offset + old_column], new.footnotes[new_offset + new_column]
+            if old_status == new_status and old.footnote_sets[old_set] == new.footnote_sets[new_set]:
+                continue
+
+            change = {'version': key, 'device': device,
+                      'old': old.format_cell(old_status, old_set), 'new': new.format_cell(new_status, new_set)}
+            if old_status != new_status:
+                change['old_status'] = STATUS_LABELS[old_status]
+                change['new_status'] = STATUS_LABELS[new_status]
+                flipped_cells.append(change)
+            else:
+                footnote_changes.append(change)
+
+    diff = {'added_versions': [new.versions[row] for key, row in new_keys.items() if key not in old_keys],
+            'removed_versions': [old.versions[row] for key, row in old_keys.items() if key not in new_keys],
+            'added_devices': [device for device in new.devices if device not in old.device_index],
+            'removed_devices': [device for device in old.devices if device not in new.device_index],
+            'version_footnote_changes': version_footnote_changes,
+            'changed_versions': changed_versions,
+            'flipped_cells': flipped_cells,
+            'footnote_changes': footnote_changes,
+            'note_changes': diff_notes(old.exceptions, new.exceptions)}
+
+    diff['summary'] = {name: len(diff[name]) for name in list(diff)}
+    diff['summary']['identical'] = not any(diff['summary'].values())
+    return diff
+
+
+'''
+    Function: diff_workbooks
+    Purpose: Returns diff_matrices of two workbooks plus their paths and sizes.
+
+            - old_path: Excel workbook of the older revision.
+            - new_path: Excel workbook of the newer revision.
+            - cache: optional matrix_cache.MatrixCache.
+'''
+
+
+def diff_workbooks(old_path, new_path, cache=None):
+    old = load_matrix(old_path, cache)
+    new = load_matrix(new_path, cache)
+
+    diff = {'old': {'path': old_path, 'versions': old.version_count, 'devices': old.device_count},
+            'new': {'path': new_path, 'versions': new.version_count, 'devices': new.device_count}}
+    diff.update(diff_matrices(old, new))
+    return diff
+
+
+'''
+    Function: format_report
+    Purpose: Returns a diff as a human readable report that can be attached to a change ticket.
+'''
+
+
+def format_report(diff):
+    lines = ["Compatibility matrix revision diff",
+             f"  old: {diff['old']['path']} ({diff['old']['versions']} versions x {diff['old']['devices']} devices)",
+             f"  new: {diff['new']['path']} ({diff['new']['versions']} versions x {diff['new']['devices']} devices)",
+             '']
+
+    if diff['summary']['identical']:
+        lines.append('No differences.')
+        return '\n'.join(lines) + '\n'
+
+    def section(title, entries, format_entry):
+        if entries:
+            lines.append(f'{title} ({len(entries)}):')
+            lines.extend('  ' + format_entry(entry) for entry in entries)
+            lines.append('')
+
+    section('Added Eagle versions', diff['added_versions'], str)
+    section('Removed Eagle versions', diff['removed_versions'], str)
+    section('Added devices', diff['added_devices'], str)
+    section('Removed devices', diff['removed_devices'], str)
+    section('Eagle version footnotes changed', diff['version_footnote_changes'],
+            lambda change: f"{change['version']}: {change['old']} -> {change['new']}")
+    section('Flipped cells', diff['flipped_cells'],
+            lambda change: f"{change['version']} / {change['device']}: {change['old']} -> {change['new']}")
+    section('Cell footnotes changed', diff['footnote_changes'],
+            lambda change: f"{change['version']} / {change['device']}: {change['old']} -> {change['new']}")
+    section('Footnote text changed', diff['note_changes'],
+            lambda change: f"{change['footnote']}: {change['old'] or '(none)'} -> {change['new'] or '(none)'}")
+
+    return '\n'.join(lines)
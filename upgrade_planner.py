@@ -0,0 +1,205 @@
+import csv
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+
+from compatibility_matrix import STATUS_YES
+from version_index import parse_version
+
+# Separator between the devices of one site i.e. 'SafetyNet;MICT;SedLine'
+DEVICE_SEPARATOR = ';'
+
+# Most plans memoized per planner, the least recently used ones are evicted first
+PLAN_CACHE_CAPACITY = 4096
+
+# Upgrade plan of one site:
+#   - matched_version: listed Eagle version the current version falls in, None when it is older than every listing.
+#   - target_version: lowest listed Eagle version, at or above the current one, compatible with every device,
+#                     None when there is none or the current version is newer than every listing.
+#   - upgrade_required: False when the current version already supports every device.
+#   - incompatible_devices: devices the current version does not support.
+#   - prerequisites: footnote text of the target version and of its cells for the site's devices.
+UpgradePlan = namedtuple('UpgradePlan', ['site', 'version', 'matched_version', 'target_version', 'upgrade_required',
+                                         'devices', 'incompatible_devices', 'prerequisites', 'error'])
+
+
+class UpgradePlanner:
+    '''
+        Method: __init__
+        Purpose: Create an upgrade planner for a matrix.  For every device the positions of its compatible
+                 Eagle versions, in numerically sorted order, are precomputed once.  A query then bisects
+                 each device's list and intersects them by leapfrogging to the highest head, so it never
+                 scans the versions one by one.
+
+                - matrix: compatibility_matrix.CompatibilityMatrix.
+    '''
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.sorted_version_index = matrix.get_sorted_version_index()
+
+        # Sorted position -> matrix row of every numerically indexed Eagle version
+        self.rows = [matrix.version_index[label] for label in self.sorted_version_index.labels]
+
+        # Compatible sorted positions of every device column, ascending
+        device_count = matrix.device_count
+        self.device_positions = [array('l') for _ in range(device_count)]
+        for position, row in enumerate(self.rows):
+            for column, code in enumerate(matrix.status[matrix.get_row_slice(row)]):
+                if code == STATUS_YES:
+                    self.device_positions[column].append(position)
+
+        # Plans memoized by (start position, device set), sites often share the same set up.
+        # Device sets are caller supplied, so the memo is a bounded LRU.
+        self.plans = OrderedDict()
+
+    '''
+        Method: get_start_position
+        Purpose: Returns (sorted position of the current Eagle version, first candidate position).
+                 A version inside a listed range starts at that range; a version between two listings
+                 can only move up to the next one.
+
+                - version: current Eagle version, raw or listed i.e. 'V2123' or 'V1002 – V1303'.
+    '''
+
+    def get_start_position(self, version):
+        number = parse_version(version).low
+        index = self.sorted_version_index
+        position = index.find_position(number)
+
+        if position >= 0 and number <= index.highs[position]:
+            return position, position
+        return position, position + 1
+
+    '''
+        Method: find_first_common
+        Purpose: Returns the lowest sorted position at or after start that is compatible with every
+                 device column, or None.  Each device's position list is bisected to the current candidate;
+                 any list whose next position is higher raises the candidate until all lists agree.
+
+                - columns: device columns.
+                - start: first candidate position.
+    '''
+
+    def find_first_common(self, columns, start):
+        candidate = start
+        if candidate >= len(self.rows):
+            return None
+
+        while True:
+            advanced = False
+            for column in columns:
+                positions = self.device_positions[column]
+                index = bisect_left(positions, candidate)
+                if index == len(positions):
+                    return None
+                if positions[index] != candidate:
+                    candidate = positions[index]
+                    advanced = True
+            if not advanced:
+                return candidate
+
+    '''
+        Method: get_prerequisites
+        Purpose: Returns the footnote text that comes with an Eagle version for a set of devices,
+                 the version's own notes first, without duplicates.
+    '''
+
+    def get_prerequisites(self, version, devices):
+        notes = list(self.matrix.get_version_notes(version))
+        for device in devices:
+            notes.extend(self.matrix.get_cell_notes(version, device))
+        return list(dict.fromkeys(notes))
+
+    '''
+        Method: plan
+        Purpose: Returns the UpgradePlan of one site.
+
+                - version: current Eagle version i.e. 'V2123'.
+                - devices: software/devices the site runs i.e. ['SafetyNet', 'MICT'].
+                - site: site identifier copied into the plan.
+    '''
+
+    def plan(self, version, devices, site=None):
+        devices = tuple(dict.fromkeys(devices))
+
+        try:
+            current, start = self.get_start_position(version)
+        except ValueError:
+            return UpgradePlan(site, version, None, None, None, list(devices), [], [], 'Unknown Eagle version')
+
+        unknown = [device for device in devices if device not in self.matrix.device_index]
+        if unknown:
+            return UpgradePlan(site, version, None, None, None, list(devices), [], [],
+                               'Unknown device: ' + ', '.join(unknown))
+
+        key = (current, start, frozenset(devices))
+        plan = self.plans.get(key)
+
+        if plan is None:
+            plan = self.build_plan(current, start, devices)
+            self.plans[key] = plan
+            if len(self.plans) > PLAN_CACHE_CAPACITY:
+                self.plans.popitem(last=False)
+        else:
+            self.plans.move_to_end(key)
+
+        return plan._replace(site=site, version=version, devices=list(devices))
+
+    '''
+        Method: build_plan
+        Purpose: Answer one (current position, device set) query, see plan.
+    '''
+
+    def build_plan(self, current, start, devices):
+        labels = self.sorted_version_index.labels
+        columns = sorted(self.matrix.device_index[device] for device in devices)
+
+        # Past the last listing the matrix cannot say anything about the version, it is not a failure
+        if start >= len(labels):
+            return UpgradePlan(None, None, None, None, None, list(devices), [], [],
+                               'Eagle version is newer than the matrix')
+
+        matched_version = labels[current] if current == start else None
+        incompatible = [] if matched_version is None else \
+            [device for device in devices if not self.matrix.is_compatible(matched_version, device)]
+
+        target = self.find_first_common(columns, start)
+        if target is None:
+            return UpgradePlan(None, None, matched_version, None, None, list(devices), incompatible, [],
+                               'No listed Eagle version at or above the current one supports every device')
+
+        target_version = labels[target]
+        upgrade_required = matched_version is None or target != start
+        return UpgradePlan(None, None, matched_version, target_version, upgrade_required, list(devices), incompatible,
+                           self.get_prerequisites(target_version, devices), None)
+
+    '''
+        Method: plan_many
+        Purpose: Yield the UpgradePlan of every site lazily, for batches of thousands of sites.
+
+                - sites: iterable of (site, version, devices).
+    '''
+
+    def plan_many(self, sites):
+        for site, version, devices in sites:
+            yield self.plan(version, devices, site)
+
+
+'''
+    Function: read_inventory_sites
+    Purpose: Yield (site, version, devices) from a CSV inventory with one row per site, the same layout
+             as the fleet audit i.e. 'site,eagle_version,devices' with devices separated by ';'.
+
+            - file: text file opened with newline=''.
+            - columns: (site, version, devices) column names.
+'''
+
+
+def read_inventory_sites(file, columns=('site', 'eagle_version', 'devices')):
+    site_column, version_column, devices_column = columns
+
+    for row in csv.DictReader(file):
+        devices = [device.strip() for device in (row.get(devices_column) or '').split(DEVICE_SEPARATOR)]
+        yield (row.get(site_column) or '', (row.get(version_column) or '').strip(),
+               [device for device in devices if device])
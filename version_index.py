@@ -0,0 +1,150 @@
+import re
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+# Footnote markers that may follow a version i.e. 'V2120[3]'
+FOOTNOTE_PATTERN = re.compile(r'\[(\d+)\]')
+
+# Separators of version ranges i.e. 'V1002 – V1303' (en dash), also accepting hyphens and em dashes
+RANGE_PATTERN = re.compile(r'\s*[–—-]\s*')
+
+# One version number: 'V2120', 'v2120', '2120' or the dotted form 'V2.1.2.0'
+NUMBER_PATTERN = re.compile(r'^[Vv]?\s*(\d+(?:\.\d+)*)$')
+
+# Resolution modes
+RESOLVE_EXACT = 'exact'
+RESOLVE_FLOOR = 'floor'
+
+# Parsed Eagle version: label as listed in the sheet, base label without footnotes,
+# numeric build range (low == high for single versions) and footnote IDs split off the label
+ParsedVersion = namedtuple('ParsedVersion', ['label', 'base', 'low', 'high', 'footnote_ids'])
+
+'''
+    Function: parse_number
+    Purpose: Returns the build number of one version i.e. 2120 for 'V2120' and 1514 for 'V1.5.1.4',
+             the dotted form used for software versions elsewhere in the workbook.  The dotted form spells
+             the build one digit per segment, so a multi-digit segment i.e. 'V1.10.0.0' is rejected:
+             joining it would sort it after 'V2.0.0.0' and collide with 'V11.0.0.0'.
+
+            - text: version text without footnotes.
+'''
+
+
+def parse_number(text):
+    match = NUMBER_PATTERN.match(text.strip())
+    if match is None:
+        raise ValueError(f'Not an Eagle version: {text!r}')
+
+    segments = match.group(1).split('.')
+    if len(segments) > 1 and any(len(segment) > 1 for segment in segments):
+        raise ValueError(f'Ambiguous dotted version, every segment must be a single digit: {text!r}')
+    return int(''.join(segments))
+
+
+'''
+    Function: parse_version
+    Purpose: Parse an Eagle version label i.e. 'V1002 – V1303' or 'V2120[3]', or a raw build number.
+
+            - label: Eagle version label, raw version string or integer build number.
+'''
+
+
+def parse_version(label):
+    if isinstance(label, int):
+        return ParsedVersion(f'V{label}', f'V{label}', label, label, ())
+
+    text = str(label)
+    footnote_ids = tuple(int(footnote_id) for footnote_id in FOOTNOTE_PATTERN.findall(text))
+    base = FOOTNOTE_PATTERN.sub('', text).strip()
+
+    parts = RANGE_PATTERN.split(base)
+    if len(parts) == 1:
+        low = high = parse_number(parts[0])
+    elif len(parts) == 2:
+        low, high = parse_number(parts[0]), parse_number(parts[1])
+    else:
+        raise ValueError(f'Not an Eagle version: {label!r}')
+
+    if low > high:
+        low, high = high, low
+
+    return ParsedVersion(text, base, low, high, footnote_ids)
+
+
+class VersionIndex:
+    '''
+        Method: __init__
+        Purpose: Build a numerically sorted index of Eagle version labels.  Lookups bisect the sorted
+                 lower bounds, so resolving a raw version is O(log n) whatever the spelling.
+
+                - labels: Eagle version labels as listed in the sheet.
+    '''
+
+    def __init__(self, labels):
+        parsed = []
+        for label in labels:
+            # Labels that are not version numbers can still be looked up exactly, they are just not indexed
+            try:
+                parsed.append(parse_version(label))
+            except ValueError:
+                continue
+        parsed.sort(key=lambda version: (version.low, version.high))
+
+        self.versions = parsed
+        self.labels = [version.label for version in parsed]
+        self.lows = array('q', (version.low for version in parsed))
+        self.highs = array('q', (version.high for version in parsed))
+
+        # Label lookups by listed spelling and by base label without footnotes i.e. 'V2120' -> 'V2120[3]'
+        self.by_label = {version.label: version for version in parsed}
+        self.by_base = {version.base: version for version in parsed}
+
+    '''
+        Method: find_position
+        Purpose: Returns the position of the last listed version whose lower bound is <= number, or -1.
+    '''
+
+    def find_position(self, number):
+        return bisect_right(self.lows, number) - 1
+
+    '''
+        Method: resolve
+        Purpose: Returns the listed label an Eagle version resolves to, or None.
+
+                 - exact: the version is listed (with or without its footnote) or falls inside a listed range,
+                          i.e. 'V2120' -> 'V2120[3]' and 'V1150' -> 'V1002 – V1303'.
+                 - floor: like exact, otherwise the nearest lower listed version i.e. 'V2123' -> 'V2122'.
+
+                - version: Eagle version label, raw version string or integer build number.
+                - mode: RESOLVE_EXACT or RESOLVE_FLOOR.
+    '''
+
+    def resolve(self, version, mode=RESOLVE_EXACT):
+        # Fast path for spellings found in the sheet
+        if isinstance(version, str):
+            parsed = self.by_label.get(version) or self.by_base.get(version.strip())
+            if parsed is not None:
+                return parsed.label
+
+        try:
+            number = parse_version(version).low
+        except ValueError:
+            return None
+
+        position = self.find_position(number)
+        if position < 0:
+            return None
+
+        if number <= self.highs[position] or mode == RESOLVE_FLOOR:
+            return self.labels[position]
+
+        return None
+
+    '''
+        Method: get_footnote_ids
+        Purpose: Returns the footnote IDs split off a listed label i.e. (3,) for 'V2120[3]'.
+    '''
+
+    def get_footnote_ids(self, label):
+        return self.by_label[label].footnote_ids
@@ -0,0 +1,194 @@
+'''
+    Streaming reader for the compatibility table of the LST-1592 workbook.
+
+    The workbook is opened in openpyxl read-only mode and its rows are scanned lazily:
+    the table is located by its 'Eagle Version' header cell and rows are read until the
+    first row without an Eagle version.  Only one row is held in memory at a time.
+    The notes section below the table ('[4] Requires minimum ...') holds the footnote text.
+'''
+
+import re
+
+from instrumentation import timed
+
+# Label of the header cell that starts the compatibility table
+HEADER_LABEL = 'Eagle Version'
+
+# One footnote of the notes section i.e. '[4] Requires minimum ...'
+NOTE_PATTERN = re.compile(r'^\[(\d+)\]\s*(.+)$', re.DOTALL)
+
+
+'''
+    Function: normalize_cell
+    Purpose: Returns the stripped text of a cell or None for empty cells.
+
+            - value: contains the cell value read from the Excel sheet.
+'''
+
+
+def normalize_cell(value):
+    if value is None:
+        return None
+
+    text = str(value).strip()
+    return text if text else None
+
+
+class MatrixTableReader:
+    '''
+        Method: __init__
+        Purpose: Create a reader for the compatibility table of a workbook.  Use it as a context manager:
+
+                 with MatrixTableReader(file_path) as reader:
+                     reader.devices              # ['SafetyNet', 'MICT', ...]
+                     for version, values in reader:
+                         ...                     # ('V1412', ('Yes', 'Yes', 'No', ...))
+
+                - file_path: path of the Excel workbook.
+                - header_label: text of the header cell above the Eagle versions.
+    '''
+
+    def __init__(self, file_path, header_label=HEADER_LABEL):
+        self.file_path = file_path
+        self.header_label = header_label
+        self.workbook = None
+        self.rows = None
+
+        # Position of the table inside the sheet, found by locate_table
+        self.header_row = None
+        self.version_column = None
+        self.devices = []
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    '''
+        Method: open
+        Purpose: Open the workbook in read-only mode and locate the compatibility table.
+    '''
+
+    @timed('load.open_workbook')
+    def open(self):
+        # openpyxl is only needed when the workbook actually has to be parsed
+        import openpyxl
+
+        self.workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+
+        try:
+            self.locate_table()
+        except Exception:
+            self.close()
+            raise
+
+    '''
+        Method: close
+        Purpose: Close the workbook and release its file handle.
+    '''
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+        self.workbook = None
+        self.rows = None
+
+    '''
+        Method: locate_table
+        Purpose: Scan the sheets row by row until the header cell is found, then read the
+                 software/device names to the right of it up to the first empty header cell.
+    '''
+
+    def locate_table(self):
+        label = self.header_label.lower()
+
+        for sheet in self.workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+
+            for row_number, row in enumerate(rows, start=1):
+                for column, value in enumerate(row):
+                    text = normalize_cell(value)
+                    if text is None or text.lower() != label:
+                        continue
+
+                    self.header_row = row_number
+                    self.version_column = column
+                    self.devices = self.read_devices(row[column + 1:])
+                    # Continue reading from the row below the header
+                    self.rows = rows
+                    return
+
+        raise ValueError(f"No '{self.header_label}' table found in {self.file_path}")
+
+    '''
+        Method: read_devices
+        Purpose: Returns the software/device names of the header row up to the first empty cell.
+
+                - values: header cells to the right of the 'Eagle Version' cell.
+    '''
+
+    def read_devices(self, values):
+        devices = []
+
+        for value in values:
+            text = normalize_cell(value)
+            if text is None:
+                break
+            devices.append(text)
+
+        if not devices:
+            raise ValueError(f"The '{self.header_label}' table in {self.file_path} has no device columns")
+
+        return devices
+
+    '''
+        Method: __iter__
+        Purpose: Yield (version, values) for every row of the table until the first row
+                 without an Eagle version.  Rows shorter than the header are padded with None.
+    '''
+
+    def __iter__(self):
+        if self.rows is None:
+            raise ValueError('The workbook is not open')
+
+        first = self.version_column + 1
+        last = first + len(self.devices)
+        padding = (None,) * len(self.devices)
+
+        for row in self.rows:
+            version = normalize_cell(row[self.version_column]) if len(row) > self.version_column else None
+
+            # The table ends at the first row without an Eagle version
+            if version is None:
+                break
+
+            values = tuple(row[first:last])
+            if len(values) < len(self.devices):
+                values = (values + padding)[:len(self.devices)]
+
+            yield version, values
+
+    '''
+        Method: read_notes
+        Purpose: Read the notes section below the table and return its footnote markers and text
+                 i.e. {'[4]': 'Requires minimum ...'}.  Call after iterating the table, the rows
+                 below it are scanned until the end of the sheet.
+    '''
+
+    @timed('load.read_notes')
+    def read_notes(self):
+        if self.rows is None:
+            raise ValueError('The workbook is not open')
+
+        notes = {}
+        for row in self.rows:
+            for value in row:
+                text = normalize_cell(value)
+                match = NOTE_PATTERN.match(text) if text is not None else None
+                if match:
+                    notes[f'[{match.group(1)}]'] = match.group(2).strip()
+
+        return notes